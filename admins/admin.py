@@ -1,40 +1,19 @@
-from utils.estatisticas import gerar_estatisticas_usuarios, gerar_estatisticas_acessos, gerar_estatisticas_avaliacoes
-import json
+from utils import agregados, paginacao
+from utils.repositorio import (
+    pagina_cursos, carregar_conteudo, contar_cursos, buscar_curso,
+    inserir_curso, atualizar_curso, remover_curso
+)
 import hashlib
-import os
-import logging
 import getpass
+from utils.log import obter_logger
 
-USUARIO_ARQUIVO = "data/usuario.json"
-CURSO_ARQUIVO = "data/cursos.json"
-ACESSO_ARQUIVO = "data/acessos.json"
-AVALIACOES_ARQUIVO = "data/avaliacoes.json"
 MAX_CONTEUDO_CURSO = 5000
 
 ADMIN_USUARIO = "admin"
 ADMIN_SENHA = "admin123"
 ADMIN_SENHA_HASH = hashlib.sha256(ADMIN_SENHA.encode()).hexdigest()
 
-LOG_ADMIN = "logs/logger_admin.log"
-
-logger_admin = logging.getLogger('admin')
-logger_admin.setLevel(logging.INFO)
-file_handler_admin = logging.FileHandler(LOG_ADMIN)
-file_handler_admin.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-logger_admin.addHandler(file_handler_admin)
-
-def carregar_dados(arquivo):
-    if os.path.exists(arquivo):
-        with open(arquivo, "r", encoding="utf-8") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return []
-    return []
-
-def salvar_dados(arquivo, dados):
-    with open(arquivo, "w", encoding="utf-8") as f:
-        json.dump(dados, f, indent=4)
+logger_admin = obter_logger('admin')
 
 def autenticar_admin():
     tentativas = 0
@@ -60,11 +39,11 @@ def autenticar_admin():
 
         if usuario == ADMIN_USUARIO and hashlib.sha256(senha.encode()).hexdigest() == ADMIN_SENHA_HASH:
             print("Acesso concedido ao admin.\n")
-            logger_admin.info(f"Admin '{usuario}' logado.")
+            logger_admin.info("Admin logado.", extra={"evento": "login_admin", "usuario": usuario})
             return True
         else:
             print("Credenciais incorretas.\n")
-            logger_admin.warning("Tentativa de login admin inválida.")
+            logger_admin.warning("Tentativa de login admin inválida.", extra={"evento": "login_admin_invalido", "usuario": usuario})
             tentativas += 1
             print(f"Tentativas restantes: {max_tentativas - tentativas}\n")
 
@@ -72,8 +51,6 @@ def autenticar_admin():
     return False
 
 def cadastrar_curso():
-    cursos = carregar_dados(CURSO_ARQUIVO)
-
     print("===================================================")
     print(" ")
     print("============ MENU DE CADASTRO DE CURSO ============")
@@ -99,14 +76,13 @@ def cadastrar_curso():
         print("Nível inválido. Curso não cadastrado.")
         return
 
-    cursos_nivel = [c for c in cursos if c["nivel"] == nivel]
-    if len(cursos_nivel) >= 7:
+    if contar_cursos(nivel) >= 7:
         print(f"Limite de 7 cursos para o nível '{nivel}' já atingido.")
         return
 
     nome = input("Nome do curso: ").strip()
 
-    if any(c["nome"].lower() == nome.lower() for c in cursos):
+    if buscar_curso(nome):
         print("Curso já cadastrado.")
         return
 
@@ -130,15 +106,12 @@ def cadastrar_curso():
         "nivel": nivel
     }
 
-    cursos.append(novo_curso)
-    salvar_dados(CURSO_ARQUIVO, cursos)
-    logger_admin.info(f"Curso cadastrado: {nome} ({nivel})")
+    inserir_curso(novo_curso)
+    logger_admin.info("Curso cadastrado.", extra={"evento": "cadastro_curso", "curso": nome, "nivel_curso": nivel})
     print(f"Curso '{nome}' cadastrado com sucesso no nível {nivel}.\n")
 
 def ver_cursos():
-    cursos = carregar_dados(CURSO_ARQUIVO)
-
-    if not cursos:
+    if not contar_cursos():
         print("Nenhum curso cadastrado.")
         return
 
@@ -166,40 +139,29 @@ def ver_cursos():
             continue
 
         nivel = niveis[int(opcao) - 1]
-        cursos_nivel = [c for c in cursos if c["nivel"] == nivel]
 
-        if not cursos_nivel:
+        if not contar_cursos(nivel):
             print(f"Não há cursos cadastrados para o nível {nivel}.")
             continue
 
+        cursos_nivel = paginacao.janela(lambda **cursor: pagina_cursos(nivel, **cursor), lambda: contar_cursos(nivel))
         while True:
-            print("===================================================")
-            print(" ")
-            print(f"========= CURSOS NÍVEL {nivel.upper()} =========")
-            print(" ")
-            print("===================================================")
-            for idx, curso in enumerate(cursos_nivel, 1):
-                print(f"[{idx}] {curso['nome']}")
-            print(f"[{len(cursos_nivel) + 1}] Voltar")
-
-            escolha = input("Escolha um curso para ver o conteúdo: ").strip()
-
-            if escolha == str(len(cursos_nivel) + 1):
+            notas = agregados.notas_por_curso()
+            curso_selecionado = paginacao.escolher(
+                cursos_nivel,
+                lambda curso: f"{curso['nome']} - {agregados.descrever_notas(notas.get(curso['nome']))}",
+                "Escolha um curso para ver o conteúdo: ",
+                titulo=f"========= CURSOS NÍVEL {nivel.upper()} ========="
+            )
+            if curso_selecionado is None:
                 break
 
-            if not escolha.isdigit() or int(escolha) < 1 or int(escolha) > len(cursos_nivel):
-                print("Opção inválida.")
-                continue
-
-            curso_selecionado = cursos_nivel[int(escolha) - 1]
             print(f"\nConteúdo do curso '{curso_selecionado['nome']}':")
-            print(curso_selecionado['conteudo'])
+            print(carregar_conteudo(curso_selecionado))
             input("\nPressione Enter para voltar ao menu de cursos.")
 
 def editar_curso():
-    cursos = carregar_dados(CURSO_ARQUIVO)
-
-    if not cursos:
+    if not contar_cursos():
         print("Nenhum curso cadastrado para editar.")
         return
 
@@ -228,34 +190,24 @@ def editar_curso():
             print("Opção inválida. Tente novamente.")
             continue
 
-        cursos_nivel = [c for c in cursos if c["nivel"] == nivel_escolhido]
-        if not cursos_nivel:
+        if not contar_cursos(nivel_escolhido):
             print(f"Não há cursos cadastrados no nível '{nivel_escolhido}'.")
             continue
 
+        cursos_nivel = paginacao.janela(
+            lambda **cursor: pagina_cursos(nivel_escolhido, **cursor), lambda: contar_cursos(nivel_escolhido)
+        )
         while True:
-
-            print("===================================================")
-            print(" ")
-            print(f"========= CURSOS NÍVEL {nivel_escolhido.capitalize()} =========")
-            print(" ")
-            print("===================================================")
-            for idx, curso in enumerate(cursos_nivel, 1):
-                print(f"[{idx}] {curso['nome']}")
-            print("[0] Voltar")
-            print(" ")
-            print("===================================================")
-
-            escolha = input("Escolha o curso que deseja editar (ou 0 para voltar): ").strip()
-
-            if escolha == "0":
+            curso = paginacao.escolher(
+                cursos_nivel,
+                lambda curso: curso["nome"],
+                "Escolha o curso que deseja editar (ou 0 para voltar): ",
+                titulo=f"========= CURSOS NÍVEL {nivel_escolhido.capitalize()} ========="
+            )
+            if curso is None:
                 break
 
-            if not escolha.isdigit() or int(escolha) < 1 or int(escolha) > len(cursos_nivel):
-                print("Opção inválida. Tente novamente.")
-                continue
-
-            curso = cursos_nivel[int(escolha) - 1]
+            nome_original = curso["nome"]
 
             print("===================================================")
             print(" ")
@@ -265,7 +217,8 @@ def editar_curso():
 
             novo_nome = input(f"Novo nome (deixe vazio para manter '{curso['nome']}'): ").strip()
             if novo_nome:
-                if any(c["nome"].lower() == novo_nome.lower() and c != curso for c in cursos):
+                existente = buscar_curso(novo_nome)
+                if existente and existente["nome"] != nome_original:
                     print("Já existe um curso com esse nome. Edição cancelada.")
                     continue
                 curso["nome"] = novo_nome
@@ -303,8 +256,8 @@ def editar_curso():
             else:
                 novo_nivel = niveis.get(nivel_opcao)
                 if novo_nivel:
-                    outros_cursos_nivel = [c for c in cursos if c["nivel"] == novo_nivel and c != curso]
-                    if len(outros_cursos_nivel) >= 7:
+                    outros_cursos_nivel = contar_cursos(novo_nivel) - (novo_nivel == nivel_escolhido)
+                    if outros_cursos_nivel >= 7:
                         print(f"Limite de 7 cursos para o nível '{novo_nivel}' já atingido. Nível não alterado.")
                     else:
                         curso["nivel"] = novo_nivel
@@ -312,49 +265,37 @@ def editar_curso():
                 else:
                     print("Nível inválido. Nível não alterado.")
 
-            salvar_dados(CURSO_ARQUIVO, cursos)
-            logger_admin.info(f"Curso editado: {curso['nome']} ({curso['nivel']})")
+            atualizar_curso(nome_original, curso)
+            logger_admin.info("Curso editado.", extra={"evento": "edicao_curso", "curso": curso["nome"], "nivel_curso": curso["nivel"]})
             print(f"Curso '{curso['nome']}' editado com sucesso.\n")
 
 def excluir_curso():
-    cursos = carregar_dados(CURSO_ARQUIVO)
-
-    if not cursos:
+    if not contar_cursos():
         print("Nenhum curso cadastrado para excluir.")
         return
 
-    print("===================================================")
-    print(" ")
-    print("============ MENU DE EXCLUSÃO DE CURSO ============")
-    print(" ")
-    print("===================================================")
-    for idx, curso in enumerate(cursos, 1):
-        print(f"[{idx}] {curso['nome']} (Nível: {curso['nivel']})")
-    print(f"[{len(cursos) + 1}] Cancelar")
-
-    escolha = input("Escolha o curso que deseja excluir: ").strip()
-
-    if escolha == str(len(cursos) + 1):
+    curso = paginacao.escolher(
+        paginacao.janela(pagina_cursos, contar_cursos),
+        lambda curso: f"{curso['nome']} (Nível: {curso['nivel']})",
+        "Escolha o curso que deseja excluir: ",
+        voltar="Cancelar",
+        titulo="============ MENU DE EXCLUSÃO DE CURSO ============"
+    )
+    if curso is None:
         print("Exclusão cancelada.")
         return
 
-    if not escolha.isdigit() or int(escolha) < 1 or int(escolha) > len(cursos):
-        print("Opção inválida.")
-        return
-
-    idx_curso = int(escolha) - 1
-    curso = cursos[idx_curso]
-
     confirmar = input(f"Tem certeza que deseja excluir o curso '{curso['nome']}'? (s/n): ").strip().lower()
     if confirmar == "s":
-        cursos.pop(idx_curso)
-        salvar_dados(CURSO_ARQUIVO, cursos)
-        logger_admin.info(f"Curso excluído: {curso['nome']}")
+        remover_curso(curso["nome"])
+        logger_admin.info("Curso excluído.", extra={"evento": "exclusao_curso", "curso": curso["nome"]})
         print(f"Curso '{curso['nome']}' excluído com sucesso.\n")
     else:
         print("Exclusão cancelada.")
 
 def mostrar_estatisticas():
+    # Importado aqui: o módulo de estatísticas carrega o matplotlib, usado só nesta tela.
+    from utils.estatisticas import gerar_estatisticas_usuarios, gerar_estatisticas_acessos, gerar_estatisticas_avaliacoes
 
     print("===================================================")
     print(" ")
@@ -414,7 +355,7 @@ def menu_admin():
             confirmar = input("Tem certeza que deseja fazer logout? (s/n): ").strip().lower()
             if confirmar == "s":
                 print("Logout realizado com sucesso.\n")
-                logger_admin.info("Admin realizou logout.")
+                logger_admin.info("Admin realizou logout.", extra={"evento": "logout_admin"})
                 break
         else:
             print("Opção inválida.\n")
@@ -1,17 +1,11 @@
-import logging
-from user.usuario import menu_usuario
-from admins.admin import menu_admin
+from utils.repositorio import compactar_journal, iniciar_compactacao_periodica
+from utils.buffer_acessos import descarregar as descarregar_acessos
+from utils.log import obter_logger
+from utils import metricas
 
-LOG_APP = "logs/logger_system.log"
+logger_app = obter_logger('app')
 
-logger_app = logging.getLogger('app')
-logger_app.setLevel(logging.INFO)
-file_handler_app = logging.FileHandler(LOG_APP)
-file_handler_app.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-logger_app.addHandler(file_handler_app)
-
-def main():
-    logger_app.info("Início da execução do sistema.")
+def menu_principal():
     while True:
         print("===================================================")
         print(" ")
@@ -30,15 +24,25 @@ def main():
             continue
 
         if opcao == "1":
-            logger_app.info("Usuário selecionou o menu de usuário.")
+            logger_app.info("Usuário selecionou o menu de usuário.", extra={"evento": "menu_usuario"})
+            from user.usuario import menu_usuario
             menu_usuario()
         elif opcao == "2":
-            logger_app.info("Usuário selecionou o menu de administrador.")
+            logger_app.info("Usuário selecionou o menu de administrador.", extra={"evento": "menu_admin"})
+            from admins.admin import menu_admin
             menu_admin()
         elif opcao == "3":
-            logger_app.info("Encerramento do sistema solicitado.")
-            print("Encerrando sistema.")
             break
 
+def main():
+    logger_app.info("Início da execução do sistema.", extra={"evento": "inicio"})
+    iniciar_compactacao_periodica()
+    metricas.iniciar()
+    menu_principal()
+    logger_app.info("Encerramento do sistema solicitado.", extra={"evento": "encerramento"})
+    descarregar_acessos()
+    compactar_journal()
+    print("Encerrando sistema.")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Sem janelas no servidor: os gráficos das estatísticas não são exibidos nas sessões remotas.
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+from main import menu_principal
+from utils import metricas, sessao
+from utils.buffer_acessos import descarregar as descarregar_acessos
+from utils.log import obter_logger
+from utils.repositorio import compactar_journal, iniciar_compactacao_periodica
+
+# Modo servidor: os menus do sistema atendem vários clientes TCP (telnet/nc) em um único
+# processo, que compartilha os dados carregados em memória. O asyncio cuida das conexões;
+# cada sessão roda os menus em uma thread, com a entrada e a saída redirecionadas para o
+# cliente, e o bcrypt continua no pool de senhas.
+#
+# Limite: é uma thread do sistema operacional por sessão (os menus usam input()/print()
+# bloqueantes, redirecionados por thread em utils.sessao), não uma corrotina. O asyncio só
+# repassa os dados dos sockets; memória e troca de contexto crescem com o número de sessões
+# abertas, inclusive as ociosas. Por isso o padrão de MAX_SESSOES é modesto; as conexões
+# além dele recebem "Servidor lotado". Para muito mais sessões, rode vários servidores (as
+# travas de arquivo já coordenam processos sobre a mesma pasta data/).
+HOST = os.environ.get("SISTEMA_HOST", "127.0.0.1")
+PORTA = int(os.environ.get("SISTEMA_PORTA", "2323"))
+MAX_SESSOES = int(os.environ.get("SISTEMA_MAX_SESSOES", "64"))
+
+logger_app = obter_logger('app')
+
+_sessoes = set()
+
+def executar_sessao(escrever, ler):
+    with sessao.sessao(escrever, ler):
+        try:
+            menu_principal()
+            print("Sessão encerrada.")
+        except EOFError:
+            # Cliente desconectado no meio de um menu.
+            pass
+        except Exception:
+            logger_app.exception("Erro em sessão remota.", extra={"evento": "erro_sessao"})
+
+async def atender(reader, writer, executor):
+    loop = asyncio.get_running_loop()
+    endereco = writer.get_extra_info("peername")
+
+    if len(_sessoes) >= MAX_SESSOES:
+        writer.write("Servidor lotado. Tente novamente mais tarde.\r\n".encode("utf-8"))
+        await writer.drain()
+        writer.close()
+        return
+
+    entrada = queue.Queue()
+    fim = []
+
+    def escrever(texto):
+        dados = texto.replace("\n", "\r\n").encode("utf-8")
+        try:
+            loop.call_soon_threadsafe(writer.write, dados)
+        except RuntimeError:
+            pass
+
+    def ler():
+        if fim:
+            return ""
+        linha = entrada.get()
+        if linha is None:
+            fim.append(True)
+            return ""
+        return linha
+
+    logger_app.info("Sessão remota iniciada.", extra={"evento": "sessao_inicio", "endereco": str(endereco)})
+    _sessoes.add(writer)
+    inicio = time.monotonic()
+    tarefa = loop.run_in_executor(executor, executar_sessao, escrever, ler)
+    try:
+        while True:
+            leitura = asyncio.ensure_future(reader.readline())
+            feitas, _ = await asyncio.wait({leitura, tarefa}, return_when=asyncio.FIRST_COMPLETED)
+            if leitura not in feitas:
+                leitura.cancel()
+                break
+            try:
+                dados = leitura.result()
+            except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+                break
+            if not dados:
+                break
+            entrada.put(dados.decode("utf-8", "replace").rstrip("\r\n") + "\n")
+    finally:
+        entrada.put(None)
+        await tarefa
+        _sessoes.discard(writer)
+        logger_app.info("Sessão remota encerrada.", extra={
+            "evento": "sessao_fim", "endereco": str(endereco), "duracao": round(time.monotonic() - inicio, 3)
+        })
+        try:
+            await writer.drain()
+            writer.close()
+        except ConnectionError:
+            pass
+
+async def servir(host=HOST, porta=PORTA, max_sessoes=MAX_SESSOES):
+    executor = ThreadPoolExecutor(max_workers=max_sessoes, thread_name_prefix="sessao")
+    servidor = await asyncio.start_server(lambda r, w: atender(r, w, executor), host, porta)
+    enderecos = ", ".join(str(s.getsockname()) for s in servidor.sockets)
+    logger_app.info("Servidor iniciado.", extra={"evento": "servidor_inicio", "endereco": enderecos})
+    print(f"Servidor aguardando conexões em {enderecos} (Ctrl+C para encerrar).")
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        executor.shutdown(wait=False)
+
+def main():
+    global MAX_SESSOES
+
+    parser = argparse.ArgumentParser(description="Atende os menus do sistema para vários clientes TCP.")
+    parser.add_argument("--host", default=HOST, help="Endereço de escuta.")
+    parser.add_argument("--porta", type=int, default=PORTA, help="Porta TCP.")
+    parser.add_argument("--max-sessoes", type=int, default=MAX_SESSOES, help="Limite de sessões simultâneas.")
+    args = parser.parse_args()
+    MAX_SESSOES = args.max_sessoes
+
+    sessao.instalar()
+    iniciar_compactacao_periodica()
+    metricas.iniciar()
+    try:
+        asyncio.run(servir(args.host, args.porta, args.max_sessoes))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger_app.info("Encerramento do servidor.", extra={"evento": "servidor_fim"})
+        descarregar_acessos()
+        compactar_journal()
+        print("Servidor encerrado.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import csv
+import json
+import os
+import time
+
+from user.usuario import logger_usuario, validar_nome_usuario, validar_senha, validar_genero, validar_idade
+from utils.repositorio import inserir_usuarios
+from utils.senhas import hash_senhas_em_lote
+
+CAMPOS = ("usuario", "senha", "genero", "idade")
+
+def ler_linhas(arquivo, formato=None):
+    formato = formato or ("jsonl" if arquivo.endswith(".jsonl") else "csv")
+    with open(arquivo, "r", encoding="utf-8", newline="") as f:
+        if formato == "csv":
+            for numero, linha in enumerate(csv.DictReader(f), 2):
+                yield numero, linha
+        else:
+            for numero, linha in enumerate(f, 1):
+                if not linha.strip():
+                    continue
+                try:
+                    yield numero, json.loads(linha)
+                except json.JSONDecodeError:
+                    yield numero, None
+
+def validar_linha(linha, vistos):
+    if not isinstance(linha, dict):
+        return None, "Linha mal formatada."
+
+    faltando = [campo for campo in CAMPOS if linha.get(campo) in (None, "")]
+    if faltando:
+        return None, f"Campos ausentes: {', '.join(faltando)}."
+
+    usuario = str(linha["usuario"]).strip()
+    senha = str(linha["senha"]).strip()
+    genero = str(linha["genero"]).strip().lower()
+
+    erro = validar_nome_usuario(usuario) or validar_senha(senha) or validar_genero(genero)
+    if not erro and usuario in vistos:
+        erro = "Usuário repetido no arquivo."
+    if erro:
+        return None, erro
+
+    idade, erro = validar_idade(str(linha["idade"]).strip())
+    if erro:
+        return None, erro
+
+    return {"usuario": usuario, "senha": senha, "tipo": "usuario", "genero": genero, "idade": idade}, None
+
+def importar(arquivo, formato=None, trabalhadores=None):
+    inicio = time.time()
+    validos = []
+    numeros = []
+    erros = []
+    vistos = set()
+
+    for numero, linha in ler_linhas(arquivo, formato):
+        novo, erro = validar_linha(linha, vistos)
+        if erro:
+            erros.append((numero, erro))
+        else:
+            vistos.add(novo["usuario"])
+            validos.append(novo)
+            numeros.append(numero)
+
+    hashes = hash_senhas_em_lote([u["senha"] for u in validos], trabalhadores)
+    for usuario, senha_hash in zip(validos, hashes):
+        usuario["senha"] = senha_hash
+
+    if validos:
+        inseridos = inserir_usuarios(validos)
+        nomes = {u["usuario"] for u in inseridos}
+        for numero, usuario in zip(numeros, validos):
+            if usuario["usuario"] not in nomes:
+                erros.append((numero, "Usuário já cadastrado."))
+        validos = inseridos
+        logger_usuario.info("Usuários importados em lote.", extra={
+            "evento": "importacao_usuarios", "arquivo": arquivo, "quantidade": len(validos),
+            "duracao": round(time.time() - inicio, 3)
+        })
+
+    return validos, erros, time.time() - inicio
+
+def main():
+    parser = argparse.ArgumentParser(description="Importação em lote de usuários a partir de CSV ou JSONL.")
+    parser.add_argument("arquivo", help="Arquivo com as colunas usuario, senha, genero e idade.")
+    parser.add_argument("--formato", choices=["csv", "jsonl"], help="Formato do arquivo (padrão: pela extensão).")
+    parser.add_argument("--trabalhadores", type=int, default=None, help="Processos usados para gerar os hashes.")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.arquivo):
+        print(f"Arquivo '{args.arquivo}' não encontrado.")
+        return
+
+    validos, erros, duracao = importar(args.arquivo, args.formato, args.trabalhadores)
+
+    for numero, erro in erros:
+        print(f"Linha {numero}: {erro}")
+    print(f"Usuários importados: {len(validos)}")
+    print(f"Linhas com erro: {len(erros)}")
+    print(f"Tempo total: {duracao:.2f} s ({len(validos) / duracao if duracao else 0:.1f} contas/s)")
+
+if __name__ == "__main__":
+    main()
@@ -1,70 +1,45 @@
 from datetime import datetime
 import time
-import shutil
-import json
-import os
-import logging
 import getpass
-import bcrypt
-
-USUARIO_ARQUIVO = "data/usuario.json"
-CURSO_ARQUIVO = "data/cursos.json"
-ACESSO_ARQUIVO = "data/acessos.json"
-AVALIACOES_ARQUIVO = "data/avaliacoes.json"
-BACKUP_PASTA = "data/backups"
-
-LOG_USUARIO = "logs/logger_user.log"
-
-logger_usuario = logging.getLogger('lusuario')
-logger_usuario.setLevel(logging.INFO)
-file_handler_usuario = logging.FileHandler(LOG_USUARIO)
-file_handler_usuario.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-logger_usuario.addHandler(file_handler_usuario)
+from utils.senhas import hash_senha_async, verificar_senha_async
+from utils.buffer_acessos import registrar_acesso, descarregar as descarregar_acessos
+from utils import agregados, busca, paginacao
+from utils.repositorio import (
+    registrar_avaliacao, avaliacao_existe, buscar_usuario, inserir_usuario,
+    atualizar_usuario, remover_usuario, contar_cursos, pagina_cursos, carregar_conteudo, buscar_curso
+)
+from utils.backup import criar_backup
+from utils.log import obter_logger
+
+logger_usuario = obter_logger('lusuario')
+
+def validar_nome_usuario(usuario):
+    if len(usuario) < 3 or " " in usuario:
+        return "Usuário inválido (mínimo 3 caracteres, sem espaços)."
+    if buscar_usuario(usuario):
+        return "Usuário já cadastrado."
+    return None
 
-def hash_senha(senha: str) -> str:
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(senha.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
+def validar_senha(senha):
+    if len(senha) < 6:
+        return "Senha muito curta."
+    return None
 
-def verificar_senha(senha: str, hashed: str) -> bool:
-    try:
-        return bcrypt.checkpw(senha.encode('utf-8'), hashed.encode('utf-8'))
-    except ValueError:
-        return False
+def validar_genero(genero):
+    if genero not in ["masculino", "feminino"]:
+        return "Gênero inválido."
+    return None
 
-def carregar_dados(arquivo: str):
-    if os.path.exists(arquivo):
-        try:
-            with open(arquivo, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            logger_usuario.warning(f"Falha ao carregar dados do arquivo {arquivo}.")
-            return []
-    return []
-
-def salvar_dados(arquivo: str, dados):
-    with open(arquivo, "w", encoding="utf-8") as f:
-        json.dump(dados, f, indent=4)
-
-def criar_backup():
-    if not os.path.exists(BACKUP_PASTA):
-        os.makedirs(BACKUP_PASTA)
-
-def backup_arquivo(origem: str):
-    criar_backup()
-    data_hora = datetime.now().strftime("%Y%m%d_%H%M%S")
-    nome_backup = os.path.join(BACKUP_PASTA, f"backup_{os.path.basename(origem).replace('.json','')}_{data_hora}.json")
+def validar_idade(idade_input):
     try:
-        shutil.copy(origem, nome_backup)
-        logger_usuario.info(f"Backup criado: {nome_backup}")
-        print(f"Backup criado: {nome_backup}")
-    except Exception as e:
-        logger_usuario.error(f"Erro ao criar backup do arquivo {origem}: {e}")
-        print(f"Erro ao criar backup: {e}")
+        idade = int(idade_input)
+    except (TypeError, ValueError):
+        return None, "Idade inválida. Por favor, insira um número inteiro."
+    if idade <= 0:
+        return None, "Idade inválida. A idade deve ser um número positivo."
+    return idade, None
 
 def cadastrar_usuario():
-    usuarios = carregar_dados(USUARIO_ARQUIVO)
-
     print("===================================================")
     print(" ")
     print("============== CADASTRO DE USUÁRIO ================")
@@ -74,20 +49,18 @@ def cadastrar_usuario():
     if usuario.lower() == "voltar":
         print("Cadastro cancelado.\n")
         return
-    if len(usuario) < 3 or " " in usuario:
-        print("Usuário inválido. Tente novamente.\n")
-        return
-
-    if any(u["usuario"] == usuario for u in usuarios):
-        print("Usuário já cadastrado.\n")
+    erro = validar_nome_usuario(usuario)
+    if erro:
+        print(f"{erro}\n")
         return
 
     senha = getpass.getpass("Informe a senha (mínimo 6 caracteres (ou 'voltar' para sair): ").strip()
     if senha.lower() == "voltar":
         print("Cadastro cancelado.\n")
         return
-    if len(senha) < 6:
-        print("Senha muito curta.\n")
+    erro = validar_senha(senha)
+    if erro:
+        print(f"{erro}\n")
         return
 
     confirma = getpass.getpass("Confirme a senha: ").strip()
@@ -98,43 +71,43 @@ def cadastrar_usuario():
         print("Senhas não conferem.\n")
         return
 
+    # O hash é calculado no pool enquanto o usuário preenche o restante do cadastro.
+    senha_hash = hash_senha_async(senha)
+
     genero = input("Gênero (masculino/feminino (ou 'voltar' para sair): ").strip().lower()
     if genero == "voltar":
         print("Cadastro cancelado.\n")
         return
-    if genero not in ["masculino", "feminino"]:
-        print("Gênero inválido.\n")
+    erro = validar_genero(genero)
+    if erro:
+        print(f"{erro}\n")
         return
 
     idade_input = input("Informe sua idade (ou 'voltar' para sair): ").strip()
     if idade_input.lower() == "voltar":
         print("Cadastro cancelado.\n")
         return
-    try:
-        idade = int(idade_input)
-        if idade <= 0:
-            print("Idade inválida. A idade deve ser um número positivo.\n")
-            return
-    except ValueError:
-        print("Idade inválida. Por favor, insira um número inteiro.\n")
+    idade, erro = validar_idade(idade_input)
+    if erro:
+        print(f"{erro}\n")
         return
 
     novo = {
         "usuario": usuario,
-        "senha": hash_senha(senha),
+        "senha": senha_hash.result(),
         "tipo": "usuario",
         "genero": genero,
         "idade": idade
     }
 
-    usuarios.append(novo)
-    salvar_dados(USUARIO_ARQUIVO, usuarios)
-    logger_usuario.info(f"Usuário '{usuario}' cadastrado.")
+    if not inserir_usuario(novo):
+        # Outra sessão cadastrou o mesmo nome durante o preenchimento.
+        print("Usuário já cadastrado.\n")
+        return
+    logger_usuario.info("Usuário cadastrado.", extra={"evento": "cadastro_usuario", "usuario": usuario})
     print("Cadastro realizado com sucesso.\n")
 
 def autenticar_usuario():
-    usuarios = carregar_dados(USUARIO_ARQUIVO)
-
     while True:
         print("===================================================")
         print(" ")
@@ -150,18 +123,42 @@ def autenticar_usuario():
             print("Login cancelado.\n")
             return
 
-        user = next((u for u in usuarios if u["usuario"] == usuario), None)
-        if user and verificar_senha(senha, user["senha"]):
-            logger_usuario.info(f"Usuário '{usuario}' autenticado.")
+        user = buscar_usuario(usuario)
+        if user and verificar_senha_async(senha, user["senha"]).result():
+            logger_usuario.info("Usuário autenticado.", extra={"evento": "login_usuario", "usuario": usuario})
             print(f"Bem-vindo, {usuario}!\n")
             menu_usuario_autenticado(user)
             return
         else:
             print("Credenciais inválidas.\n")
 
+def acessar_curso(usuario, curso_selecionado):
+    print(f"\nConteúdo do curso '{curso_selecionado['nome']}':")
+    print(carregar_conteudo(curso_selecionado))
+
+    inicio_tempo = time.time()
+
+    input("\nPressione Enter para voltar ao menu de cursos.")
+
+    fim_tempo = time.time()
+    tempo_acesso = round(fim_tempo - inicio_tempo, 2)
+
+    registrar_acesso(
+        usuario["usuario"],
+        curso_selecionado['nome'],
+        curso_selecionado['nivel'],
+        tempo_acesso,
+        datetime.now().isoformat()
+    )
+
+    logger_usuario.info("Curso acessado.", extra={
+        "evento": "acesso_curso", "usuario": usuario["usuario"], "curso": curso_selecionado['nome'],
+        "nivel_curso": curso_selecionado['nivel'], "duracao": tempo_acesso
+    })
+    print(f"Acesso registrado: {curso_selecionado['nome']}, duração {tempo_acesso} segundos.\n")
+
 def ver_cursos(usuario):
-    cursos = carregar_dados(CURSO_ARQUIVO)
-    if not cursos:
+    if not contar_cursos():
         print("Nenhum curso disponível.\n")
         return
 
@@ -188,72 +185,69 @@ def ver_cursos(usuario):
             continue
 
         nivel = niveis[int(opcao) - 1]
-        cursos_nivel = [c for c in cursos if c["nivel"] == nivel]
 
-        if not cursos_nivel:
+        if not contar_cursos(nivel):
             print(f"Não há cursos cadastrados para o nível {nivel}.\n")
             continue
 
+        cursos_nivel = paginacao.janela(lambda **cursor: pagina_cursos(nivel, **cursor), lambda: contar_cursos(nivel))
         while True:
-            print("===================================================")
-            print(" ")
-            print(f"========= CURSOS NÍVEL {nivel.upper()} =========")
-            print(" ")
-            print("===================================================")
-            for idx, curso in enumerate(cursos_nivel, 1):
-                print(f"[{idx}] {curso['nome']}")
-            print(f"[{len(cursos_nivel) + 1}] Voltar")
-
-            escolha = input("Escolha um curso para ver o conteúdo: ").strip()
-
-            if escolha == str(len(cursos_nivel) + 1):
+            notas = agregados.notas_por_curso()
+            curso_selecionado = paginacao.escolher(
+                cursos_nivel,
+                lambda curso: f"{curso['nome']} - {agregados.descrever_notas(notas.get(curso['nome']))}",
+                "Escolha um curso para ver o conteúdo: ",
+                titulo=f"========= CURSOS NÍVEL {nivel.upper()} ========="
+            )
+            if curso_selecionado is None:
                 break
 
-            if not escolha.isdigit() or not (1 <= int(escolha) <= len(cursos_nivel)):
-                print("Opção inválida.\n")
-                continue
+            acessar_curso(usuario, curso_selecionado)
 
-            curso_selecionado = cursos_nivel[int(escolha) - 1]
-            print(f"\nConteúdo do curso '{curso_selecionado['nome']}':")
-            print(curso_selecionado['conteudo'])
+def buscar_cursos(usuario):
+    if not contar_cursos():
+        print("Nenhum curso disponível.\n")
+        return
 
-            inicio_tempo = time.time()
+    while True:
+        print("===================================================")
+        print(" ")
+        print("================ BUSCA NOS CURSOS =================")
+        print(" ")
+        print("===================================================")
+        consulta = input("Digite os termos da busca (ou Enter para voltar): ").strip()
+        if not consulta:
+            return
 
-            input("\nPressione Enter para voltar ao menu de cursos.")
+        inicio = time.perf_counter()
+        resultados = busca.buscar(consulta)
+        duracao = (time.perf_counter() - inicio) * 1000
 
-            fim_tempo = time.time()
-            tempo_acesso = round(fim_tempo - inicio_tempo, 2)
+        if not resultados:
+            print(f"Nenhum resultado para '{consulta}'.\n")
+            continue
 
-            acessos = carregar_dados(ACESSO_ARQUIVO)
+        print(f"{len(resultados)} resultado(s) em {duracao:.1f} ms:\n")
+        for idx, resultado in enumerate(resultados, 1):
+            print(f"[{idx}] {resultado['curso']} ({resultado['nivel']}) - {resultado['secao']}")
+            print(f"    {resultado['trecho']}")
+        print(" ")
 
-            acesso_existente = next(
-                (a for a in acessos if a["usuario"] == usuario["usuario"] and a["curso"] == curso_selecionado['nome']),
-                None
-            )
+        escolha = input("Escolha um resultado para ver o curso (ou Enter para nova busca): ").strip()
+        if not escolha:
+            continue
+        if not escolha.isdigit() or not (1 <= int(escolha) <= len(resultados)):
+            print("Opção inválida.\n")
+            continue
 
-            if acesso_existente:
-                acesso_existente["quantidade"] += 1
-                acesso_existente["tempo"] += tempo_acesso
-                acesso_existente["ultimo_acesso"] = datetime.now().isoformat()
-            else:
-                novo_acesso = {
-                    "usuario": usuario["usuario"],
-                    "curso": curso_selecionado['nome'],
-                    "nivel": curso_selecionado['nivel'],
-                    "quantidade": 1,
-                    "tempo": tempo_acesso,
-                    "primeiro_acesso": datetime.now().isoformat(),
-                    "ultimo_acesso": datetime.now().isoformat()
-                }
-                acessos.append(novo_acesso)
-
-            salvar_dados(ACESSO_ARQUIVO, acessos)
-
-            print(f"Acesso registrado: {curso_selecionado['nome']}, duração {tempo_acesso} segundos.\n")
+        curso = buscar_curso(resultados[int(escolha) - 1]["curso"])
+        if curso is None:
+            print("Curso não encontrado (pode ter sido excluído).\n")
+            continue
+        acessar_curso(usuario, curso)
 
 def avaliar_curso(usuario):
-    cursos = carregar_dados(CURSO_ARQUIVO)
-    if not cursos:
+    if not contar_cursos():
         print("Nenhum curso disponível para avaliação.\n")
         return
 
@@ -279,36 +273,27 @@ def avaliar_curso(usuario):
             continue
 
         nivel_escolhido = niveis[int(escolha_nivel) - 1]
-        cursos_nivel = [c for c in cursos if c.get("nivel") == nivel_escolhido]
 
-        if not cursos_nivel:
+        if not contar_cursos(nivel_escolhido):
             print(f"Não há cursos cadastrados para o nível {nivel_escolhido}.\n")
             continue
 
-        print("===================================================")
-        print(" ")
-        print(f"==== SELECIONE O CURSO DO NÍVEL {nivel_escolhido.capitalize()} =====")
-        print(" ")
-        print("===================================================")
-        for i, curso in enumerate(cursos_nivel, 1):
-            print(f"[{i}] {curso['nome']}")
-        print(f"[{len(cursos_nivel)+1}] Voltar ao menu de níveis")
-
-        escolha_curso = input("Escolha o número do curso que deseja avaliar: ").strip()
-
-        if escolha_curso == str(len(cursos_nivel)+1):
+        curso_escolhido = paginacao.escolher(
+            paginacao.janela(
+                lambda **cursor: pagina_cursos(nivel_escolhido, **cursor), lambda: contar_cursos(nivel_escolhido)
+            ),
+            lambda curso: curso["nome"],
+            "Escolha o número do curso que deseja avaliar: ",
+            voltar="Voltar ao menu de níveis",
+            titulo=f"==== SELECIONE O CURSO DO NÍVEL {nivel_escolhido.capitalize()} ====="
+        )
+        if curso_escolhido is None:
             continue
 
-        if not escolha_curso.isdigit() or not (1 <= int(escolha_curso) <= len(cursos_nivel)):
-            print("Opção inválida. Tente novamente.\n")
-            continue
-
-        curso_escolhido = cursos_nivel[int(escolha_curso) - 1]
         nome_curso = curso_escolhido["nome"]
         nivel_curso = curso_escolhido.get("nivel", "não especificado")
 
-        avaliacoes = carregar_dados(AVALIACOES_ARQUIVO)
-        if any(av["usuario"] == usuario["usuario"] and av["curso"] == nome_curso for av in avaliacoes):
+        if avaliacao_existe(usuario["usuario"], nome_curso):
             print("Você já avaliou este curso.\n")
             return
 
@@ -321,15 +306,19 @@ def avaliar_curso(usuario):
             print("Nota inválida.\n")
             return
 
-        avaliacoes.append({
+        registrada = registrar_avaliacao({
             "usuario": usuario["usuario"],
             "curso": nome_curso,
             "nivel": nivel_curso,
             "nota": nota,
             "timestamp": datetime.now().isoformat()
         })
-
-        salvar_dados(AVALIACOES_ARQUIVO, avaliacoes)
+        if not registrada:
+            print("Você já avaliou este curso.\n")
+            return
+        logger_usuario.info("Curso avaliado.", extra={
+            "evento": "avaliacao_curso", "usuario": usuario["usuario"], "curso": nome_curso, "nivel_curso": nivel_curso, "nota": nota
+        })
         print("Avaliação registrada com sucesso.\n")
         return
 
@@ -350,20 +339,25 @@ def editar_dados(usuario):
         print(" ")
         print("===================================================")
         opcao = input("Escolha uma opção (1-6): ").strip()
+        # Só os campos editados vão para a camada de dados, que os aplica sobre o registro atual.
+        alteracoes = {}
 
         if opcao == "1":
             novo_nome = input("Digite o novo nome (ou pressione Enter para cancelar): ").strip()
             if not novo_nome:
                 print("Edição de nome cancelada.")
                 continue
-            usuario["usuario"] = novo_nome
+            if buscar_usuario(novo_nome):
+                print("Usuário já cadastrado.")
+                continue
+            alteracoes["usuario"] = novo_nome
 
         elif opcao == "2":
             nova_senha = getpass.getpass("Digite a nova senha (ou pressione Enter para cancelar): ").strip()
             if not nova_senha:
                 print("Edição de senha cancelada.")
                 continue
-            usuario["senha"] = hash_senha(nova_senha)
+            alteracoes["senha"] = hash_senha_async(nova_senha).result()
 
         elif opcao == "3":
             entrada = input("Digite a nova idade (ou pressione Enter para cancelar): ").strip()
@@ -374,14 +368,14 @@ def editar_dados(usuario):
                 print("Idade inválida.")
                 continue
             nova_idade = int(entrada)
-            usuario["idade"] = nova_idade
+            alteracoes["idade"] = nova_idade
 
         elif opcao == "4":
             novo_genero = input("Digite o novo gênero (masculino/feminino (ou pressione Enter para cancelar): ").strip().lower()
             if not novo_genero:
                 print("Edição de gênero cancelada.")
                 continue
-            usuario["genero"] = novo_genero
+            alteracoes["genero"] = novo_genero
 
         elif opcao == "5":
             deletar_usuario(usuario)
@@ -394,13 +388,13 @@ def editar_dados(usuario):
             print("Opção inválida.")
             continue
 
-        usuarios = carregar_dados(USUARIO_ARQUIVO)
-        for i, u in enumerate(usuarios):
-            if u["usuario"] == nome_antigo:
-                usuarios[i] = usuario
-                salvar_dados(USUARIO_ARQUIVO, usuarios)
-                print("Dados atualizados com sucesso!")
-                break
+        atualizado = atualizar_usuario(nome_antigo, alteracoes)
+        if atualizado:
+            usuario.update(atualizado)
+            nome_antigo = usuario["usuario"]
+            print("Dados atualizados com sucesso!")
+        else:
+            print("Não foi possível atualizar os dados (a conta pode ter sido excluída ou o nome cadastrado por outra sessão).")
 
 def deletar_usuario(usuario):
     confirm = input(f"Tem certeza que deseja excluir a conta '{usuario['usuario']}'? (s/n): ").strip().lower()
@@ -408,11 +402,16 @@ def deletar_usuario(usuario):
         print("Exclusão cancelada.")
         return
 
-    backup_arquivo(USUARIO_ARQUIVO)
-    usuarios = carregar_dados(USUARIO_ARQUIVO)
-    usuarios = [u for u in usuarios if u["usuario"] != usuario["usuario"]]
-    salvar_dados(USUARIO_ARQUIVO, usuarios)
-    logger_usuario.info(f"Usuário '{usuario['usuario']}' excluído.")
+    try:
+        identificador = criar_backup(f"exclusão da conta {usuario['usuario']}")
+        if identificador:
+            logger_usuario.info("Backup criado.", extra={"evento": "backup", "backup": identificador})
+            print(f"Backup criado: {identificador}")
+    except Exception as e:
+        logger_usuario.error("Erro ao criar backup.", extra={"evento": "erro_backup", "erro": str(e)})
+        print(f"Erro ao criar backup: {e}")
+    remover_usuario(usuario["usuario"])
+    logger_usuario.info("Usuário excluído.", extra={"evento": "exclusao_usuario", "usuario": usuario["usuario"]})
     print("Conta excluída com sucesso.")
 
 def menu_usuario_autenticado(usuario):
@@ -423,26 +422,31 @@ def menu_usuario_autenticado(usuario):
         print(" ")
         print("===================================================")
         print("[1] Ver cursos")
-        print("[2] Avaliar curso")
-        print("[3] Editar dados pessoais")
-        print("[4] Logout")
+        print("[2] Buscar nos cursos")
+        print("[3] Avaliar curso")
+        print("[4] Editar dados pessoais")
+        print("[5] Logout")
         print(" ")
         print("===================================================")
-        opcao = input("Escolha uma opção entre (1-4): ").strip()
+        opcao = input("Escolha uma opção entre (1-5): ").strip()
 
         if opcao == "1":
             ver_cursos(usuario)
         elif opcao == "2":
-            avaliar_curso(usuario)
+            buscar_cursos(usuario)
         elif opcao == "3":
+            avaliar_curso(usuario)
+        elif opcao == "4":
             editar_dados(usuario)
             break
-        elif opcao == "4":
+        elif opcao == "5":
             print("Logout realizado.\n")
             break
         else:
             print("Opção inválida.\n")
 
+    descarregar_acessos()
+
 def menu_usuario():
     while True:
         print("===================================================")
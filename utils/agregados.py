@@ -0,0 +1,432 @@
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+
+from utils import colunar, travas
+
+AGREGADOS_ARQUIVO = "data/agregados.json"
+# Cada escrita anexa só a sua alteração ao journal (um JSON por linha); o snapshot acima é
+# reescrito apenas na compactação (periódica, ao sair ou quando o journal passa de
+# LIMITE_JOURNAL bytes). Assim o custo de uma escrita não cresce com o tamanho dos dados.
+AGREGADOS_JOURNAL = "data/agregados.jsonl"
+LIMITE_JOURNAL = int(os.environ.get("SISTEMA_AGREGADOS_LIMITE_JOURNAL", str(4 * 1024 * 1024)))
+
+# Agregados das estatísticas mantidos a cada escrita, para que a tela de estatísticas não
+# precise reler e recalcular todos os dados. Cada série guarda contagem, soma, soma dos
+# quadrados e a tabela de frequências dos valores (usada para moda, mediana e gráficos).
+SERIES = ("idades", "generos", "acessos_quantidade", "acessos_tempo")
+
+# Empate na moda: vence o valor com o menor número de "ordem", atribuído quando o valor passa
+# a existir na série (e descartado quando a última ocorrência é removida). Após reconstruir,
+# a ordem é a da primeira ocorrência nos dados, a mesma regra do statistics.mode; depois, um
+# valor que some e volta vai para o fim, e remover só o primeiro registro de um valor não o
+# adianta. Confira com: python -m utils.agregados --verificar
+
+# Resumo das notas por curso e por nível: contagem, soma, mínima, máxima e a quantidade de
+# cada nota de 1 a 5 ("histograma"). Arquivos de versões anteriores são reconstruídos.
+VERSAO = 5
+NOTA_MINIMA = 1
+NOTA_MAXIMA = 5
+
+_estado = {"assinatura": None, "dados": None, "posicao": 0}
+
+def travar():
+    # Trava dos agregados (entre threads e processos). Quem grava um dado bruto e o agregado
+    # correspondente a mantém durante as duas escritas; é sempre a primeira trava obtida.
+    return travas.travar(AGREGADOS_ARQUIVO)
+
+def _nova_serie():
+    return {"contagem": 0, "soma": 0, "soma_quadrados": 0, "frequencias": {}, "ordem": {}, "sequencia": 0}
+
+def _adicionar(dados, nome, valor):
+    serie = dados[nome]
+    if valor not in serie["frequencias"]:
+        serie["ordem"][valor] = serie["sequencia"]
+        serie["sequencia"] += 1
+    serie["frequencias"][valor] = serie["frequencias"].get(valor, 0) + 1
+    serie["contagem"] += 1
+    if isinstance(valor, (int, float)):
+        serie["soma"] += valor
+        serie["soma_quadrados"] += valor * valor
+
+def _remover(dados, nome, valor):
+    serie = dados[nome]
+    restante = serie["frequencias"].get(valor, 0) - 1
+    if restante < 0:
+        return
+    if restante:
+        serie["frequencias"][valor] = restante
+    else:
+        del serie["frequencias"][valor]
+        del serie["ordem"][valor]
+    serie["contagem"] -= 1
+    if isinstance(valor, (int, float)):
+        serie["soma"] -= valor
+        serie["soma_quadrados"] -= valor * valor
+
+def _somar_nota(grupos, chave, nota):
+    agregado = grupos.get(chave)
+    if agregado is None:
+        agregado = grupos[chave] = {
+            "contagem": 0, "soma": 0, "minima": nota, "maxima": nota,
+            "histograma": [0] * (NOTA_MAXIMA - NOTA_MINIMA + 1)
+        }
+    agregado["contagem"] += 1
+    agregado["soma"] += nota
+    agregado["minima"] = min(agregado["minima"], nota)
+    agregado["maxima"] = max(agregado["maxima"], nota)
+    if NOTA_MINIMA <= nota <= NOTA_MAXIMA:
+        agregado["histograma"][int(nota) - NOTA_MINIMA] += 1
+
+def _adicionar_nota(dados, curso, nivel, nota):
+    _somar_nota(dados["cursos"], curso, nota)
+    _somar_nota(dados["niveis"], nivel, nota)
+
+# Operações gravadas no journal: ["+", serie, valor], ["-", serie, valor] e
+# ["nota", curso, nivel, nota].
+def _aplicar(dados, operacoes):
+    for operacao in operacoes:
+        if operacao[0] == "+":
+            _adicionar(dados, operacao[1], operacao[2])
+        elif operacao[0] == "-":
+            _remover(dados, operacao[1], operacao[2])
+        elif operacao[0] == "nota":
+            _adicionar_nota(dados, operacao[1], operacao[2], operacao[3])
+
+def _novos_agregados():
+    dados = {nome: _nova_serie() for nome in SERIES}
+    dados["versao"] = VERSAO
+    dados["geracao"] = None
+    dados["cursos"] = {}
+    dados["niveis"] = {}
+    return dados
+
+def _resumo_notas(grupos, notas):
+    resumo = colunar.agrupar_por_curso(grupos, notas)
+    histogramas = colunar.contar_notas(grupos, notas, NOTA_MINIMA, NOTA_MAXIMA)
+    for chave, agregado in resumo.items():
+        agregado["histograma"] = histogramas.get(chave, [0] * (NOTA_MAXIMA - NOTA_MINIMA + 1))
+    return resumo
+
+def _serie_da_coluna(coluna):
+    serie = _nova_serie()
+    serie["frequencias"] = colunar.frequencias(coluna)
+    serie["contagem"] = len(coluna)
+    if len(coluna) and not isinstance(coluna[0], str):
+        serie["soma"] = sum(valor * quantidade for valor, quantidade in serie["frequencias"].items())
+        serie["soma_quadrados"] = sum(valor * valor * quantidade for valor, quantidade in serie["frequencias"].items())
+    # frequencias() devolve os valores na ordem da primeira ocorrência.
+    serie["ordem"] = {chave: posicao for posicao, chave in enumerate(serie["frequencias"])}
+    serie["sequencia"] = len(serie["ordem"])
+    return serie
+
+def reconstruir():
+    colunas = colunar.carregar_colunas()
+
+    dados = _novos_agregados()
+    for nome in SERIES:
+        dados[nome] = _serie_da_coluna(colunas[nome])
+    dados["cursos"] = _resumo_notas(colunas["cursos_notas"], colunas["notas"])
+    dados["niveis"] = _resumo_notas(colunas["niveis_notas"], colunas["notas"])
+
+    with travar():
+        _salvar(dados)
+    return dados
+
+def _assinatura():
+    try:
+        st = os.stat(AGREGADOS_ARQUIVO)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def _tamanho_journal():
+    try:
+        return os.path.getsize(AGREGADOS_JOURNAL)
+    except OSError:
+        return 0
+
+def _ler_snapshot():
+    try:
+        with open(AGREGADOS_ARQUIVO, "r", encoding="utf-8") as f:
+            dados = json.load(f)
+        if dados.get("versao") != VERSAO or dados.get("geracao") is None:
+            return None
+        for nome in SERIES:
+            # No arquivo as frequências ficam como trincas [valor, quantidade, ordem], pois
+            # as chaves de um objeto JSON seriam convertidas para texto.
+            trincas = dados[nome]["frequencias"]
+            dados[nome]["frequencias"] = {valor: quantidade for valor, quantidade, _ in trincas}
+            dados[nome]["ordem"] = {valor: ordem for valor, _, ordem in trincas}
+    except (json.JSONDecodeError, IOError, KeyError, TypeError, ValueError):
+        return None
+    return dados
+
+def _aplicar_journal(dados):
+    # Aplica as linhas novas do journal (a partir da posição já lida). Só contam as linhas
+    # da geração do snapshot: se uma compactação caiu antes de esvaziar o journal, as linhas
+    # dele já estão no snapshot novo, que tem outra geração.
+    try:
+        with open(AGREGADOS_JOURNAL, "rb") as f:
+            f.seek(_estado["posicao"])
+            for linha in f:
+                if not linha.endswith(b"\n"):
+                    break
+                _estado["posicao"] += len(linha)
+                try:
+                    registro = json.loads(linha)
+                    if registro["geracao"] == dados["geracao"]:
+                        _aplicar(dados, registro["operacoes"])
+                except (ValueError, KeyError, TypeError, IndexError):
+                    continue
+    except FileNotFoundError:
+        _estado["posicao"] = 0
+
+def _carregar():
+    # Chamado com a trava dos agregados.
+    assinatura = _assinatura()
+    if assinatura is None:
+        return reconstruir()
+    if _estado["assinatura"] != assinatura or _tamanho_journal() < _estado["posicao"]:
+        dados = _ler_snapshot()
+        if dados is None:
+            return reconstruir()
+        _estado["assinatura"] = assinatura
+        _estado["dados"] = dados
+        _estado["posicao"] = 0
+    _aplicar_journal(_estado["dados"])
+    return _estado["dados"]
+
+def _salvar(dados):
+    # Compactação: grava o snapshot completo, com uma nova geração, e esvazia o journal.
+    dados["geracao"] = time.time_ns()
+    salvo = dict(dados)
+    for nome in SERIES:
+        serie = dados[nome]
+        salvo[nome] = {campo: valor for campo, valor in serie.items() if campo != "ordem"}
+        salvo[nome]["frequencias"] = [[valor, quantidade, serie["ordem"][valor]] for valor, quantidade in serie["frequencias"].items()]
+
+    temporario = travas.temporario(AGREGADOS_ARQUIVO)
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(salvo, f)
+    os.replace(temporario, AGREGADOS_ARQUIVO)
+    open(AGREGADOS_JOURNAL, "w").close()
+
+    _estado["assinatura"] = _assinatura()
+    _estado["dados"] = dados
+    _estado["posicao"] = 0
+
+def compactar():
+    with travar():
+        if _tamanho_journal():
+            _salvar(_carregar())
+
+def preparar():
+    # Garante que os agregados existem antes de uma escrita; se precisarem ser
+    # reconstruídos depois dela, a alteração seria contada duas vezes.
+    with travar():
+        _carregar()
+
+def _atualizar(operacoes):
+    if not operacoes:
+        return
+    with travar():
+        dados = _carregar()
+        linha = (json.dumps({"geracao": dados["geracao"], "operacoes": operacoes}) + "\n").encode("utf-8")
+        with open(AGREGADOS_JOURNAL, "ab") as f:
+            inicio = f.tell()
+            if inicio != _estado["posicao"]:
+                # Linha incompleta de um processo que caiu: é isolada e ignorada.
+                linha = b"\n" + linha
+            f.write(linha)
+        if inicio == _estado["posicao"]:
+            _aplicar(dados, operacoes)
+            _estado["posicao"] += len(linha)
+        else:
+            _aplicar_journal(dados)
+        if _estado["posicao"] > LIMITE_JOURNAL:
+            _salvar(dados)
+
+def usuarios_inseridos(usuarios):
+    operacoes = []
+    for usuario in usuarios:
+        if "idade" in usuario:
+            operacoes.append(["+", "idades", usuario["idade"]])
+        if "genero" in usuario:
+            operacoes.append(["+", "generos", usuario["genero"]])
+    _atualizar(operacoes)
+
+def usuario_removido(usuario):
+    operacoes = []
+    if "idade" in usuario:
+        operacoes.append(["-", "idades", usuario["idade"]])
+    if "genero" in usuario:
+        operacoes.append(["-", "generos", usuario["genero"]])
+    _atualizar(operacoes)
+
+def usuario_alterado(antes, depois):
+    operacoes = []
+    for campo, serie in (("idade", "idades"), ("genero", "generos")):
+        if antes.get(campo) != depois.get(campo):
+            if campo in antes:
+                operacoes.append(["-", serie, antes[campo]])
+            if campo in depois:
+                operacoes.append(["+", serie, depois[campo]])
+    _atualizar(operacoes)
+
+def acessos_alterados(alteracoes):
+    # alteracoes: lista de (antes, depois), onde cada item é (quantidade, tempo) do registro
+    # de acesso do par (usuario, curso); antes é None para o primeiro acesso.
+    operacoes = []
+    for antes, depois in alteracoes:
+        if antes is not None:
+            operacoes.append(["-", "acessos_quantidade", antes[0]])
+            operacoes.append(["-", "acessos_tempo", antes[1]])
+        operacoes.append(["+", "acessos_quantidade", depois[0]])
+        operacoes.append(["+", "acessos_tempo", depois[1]])
+    _atualizar(operacoes)
+
+def avaliacao_registrada(avaliacao):
+    if avaliacao.get("nota") is None:
+        return
+    _atualizar([["nota", avaliacao.get("curso", "Desconhecido"), avaliacao.get("nivel", "não especificado"), avaliacao["nota"]]])
+
+# Os leitores devolvem cópias feitas com a trava: os dicionários internos são alterados no
+# lugar pelas escritas de outras sessões (servidor) e trocados quando o snapshot é relido.
+def _copiar_serie(serie):
+    return dict(serie, frequencias=dict(serie["frequencias"]), ordem=dict(serie["ordem"]))
+
+def _copiar_notas(grupos):
+    return {chave: dict(agregado, histograma=list(agregado["histograma"])) for chave, agregado in grupos.items()}
+
+def serie(nome):
+    with travar():
+        return _copiar_serie(_carregar()[nome])
+
+def notas_por_curso():
+    with travar():
+        return _copiar_notas(_carregar()["cursos"])
+
+def notas_por_nivel():
+    with travar():
+        return _copiar_notas(_carregar()["niveis"])
+
+def media_notas(agregado):
+    if not agregado or not agregado["contagem"]:
+        return None
+    return agregado["soma"] / agregado["contagem"]
+
+def descrever_notas(agregado):
+    media = media_notas(agregado)
+    if media is None:
+        return "sem avaliações"
+    return f"média {media:.1f} ({agregado['contagem']} avaliações)"
+
+def media(serie):
+    if not serie["contagem"]:
+        return 0
+    valor = serie["soma"] / serie["contagem"]
+    if isinstance(serie["soma"], int) and valor.is_integer():
+        return int(valor)
+    return valor
+
+def moda(serie):
+    if not serie["frequencias"]:
+        return 'Sem moda'
+    ordem = serie["ordem"]
+    return min(serie["frequencias"].items(), key=lambda item: (-item[1], ordem[item[0]]))[0]
+
+def mediana(serie):
+    n = serie["contagem"]
+    if not n:
+        return 0
+    meio = n // 2
+    anterior = None
+    acumulado = 0
+    for valor in sorted(serie["frequencias"]):
+        acumulado += serie["frequencias"][valor]
+        if n % 2 == 0 and anterior is None and acumulado >= meio:
+            anterior = valor
+        if acumulado > meio:
+            if n % 2:
+                return valor
+            return (anterior + valor) / 2
+    return 0
+
+def _confere(obtido, esperado):
+    if isinstance(esperado, str) or isinstance(obtido, str):
+        return obtido == esperado
+    return math.isclose(obtido, esperado, rel_tol=1e-9, abs_tol=1e-9)
+
+def verificar():
+    # Compara média, mediana e moda dos agregados e do motor em colunas com o módulo
+    # statistics sobre os dados brutos. Devolve (diferenças, avisos); um empate na moda
+    # resolvido de outra forma pelos agregados (ver a regra de empate acima) é só um aviso.
+    colunas = colunar.carregar_colunas()
+    diferencas = []
+    avisos = []
+
+    def conferir(caminho, descricao, obtido, esperado):
+        if not _confere(obtido, esperado):
+            diferencas.append(f"{caminho} {descricao}: {obtido!r} (statistics: {esperado!r})")
+
+    for nome in SERIES:
+        coluna = colunas[nome]
+        valores = coluna.tolist() if hasattr(coluna, "tolist") else list(coluna)
+        if not valores:
+            continue
+        agregada = serie(nome)
+        numerica = nome != "generos"
+
+        if numerica:
+            conferir("colunar", f"{nome} média", colunar.media(coluna), statistics.mean(valores))
+            conferir("colunar", f"{nome} mediana", colunar.mediana(coluna), statistics.median(valores))
+            conferir("agregados", f"{nome} média", media(agregada), statistics.mean(valores))
+            conferir("agregados", f"{nome} mediana", mediana(agregada), statistics.median(valores))
+        conferir("colunar", f"{nome} moda", colunar.moda(coluna), statistics.mode(valores))
+
+        esperada = statistics.mode(valores)
+        obtida = moda(agregada)
+        if not _confere(obtida, esperada):
+            if agregada["frequencias"].get(obtida) == valores.count(esperada):
+                avisos.append(f"agregados {nome} moda: empate entre {obtida!r} e {esperada!r} resolvido pela ordem dos agregados")
+            else:
+                diferencas.append(f"agregados {nome} moda: {obtida!r} (statistics: {esperada!r})")
+        if agregada["contagem"] != len(valores):
+            diferencas.append(f"agregados {nome} contagem: {agregada['contagem']} (dados: {len(valores)})")
+
+    notas = colunas["notas"].tolist() if hasattr(colunas["notas"], "tolist") else list(colunas["notas"])
+    for grupos, resumos in ((colunas["cursos_notas"], notas_por_curso()), (colunas["niveis_notas"], notas_por_nivel())):
+        por_grupo = {}
+        for grupo, nota in zip(grupos, notas):
+            por_grupo.setdefault(grupo, []).append(nota)
+        for grupo in set(por_grupo) | set(resumos):
+            esperado = statistics.mean(por_grupo[grupo]) if grupo in por_grupo else None
+            obtido = media_notas(resumos.get(grupo))
+            if (obtido is None) != (esperado is None) or (esperado is not None and not _confere(obtido, esperado)):
+                diferencas.append(f"agregados notas de {grupo} média: {obtido!r} (statistics: {esperado!r})")
+    return diferencas, avisos
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstrói ou confere os agregados das estatísticas.")
+    parser.add_argument("--verificar", action="store_true",
+                        help="Compara agregados e motor em colunas com o módulo statistics, sem reconstruir.")
+    args = parser.parse_args()
+
+    if not args.verificar:
+        reconstruir()
+        print(f"Agregados reconstruídos em {AGREGADOS_ARQUIVO}.")
+        sys.exit(0)
+
+    diferencas, avisos = verificar()
+    for aviso in avisos:
+        print(f"Aviso: {aviso}")
+    for diferenca in diferencas:
+        print(f"Diferença: {diferenca}")
+    if diferencas:
+        sys.exit(1)
+    print("Agregados e motor em colunas conferem com o módulo statistics.")
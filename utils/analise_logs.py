@@ -0,0 +1,204 @@
+import argparse
+import json
+import os
+import re
+from datetime import datetime, timedelta
+
+from utils import travas
+from utils.log import ARQUIVOS_LOG, LOG_BACKUPS
+
+# Análise dos logs em fluxo: cada arquivo é lido linha a linha a partir da última posição
+# processada, e os eventos são somados em contadores por hora (e por usuário e dia).
+# O estado fica em ESTADO_ARQUIVO, então cada execução só lê o que foi escrito desde a anterior.
+ESTADO_ARQUIVO = "logs/analise_logs.json"
+VERSAO = 1
+
+# Linhas no formato antigo (texto): "2025-05-19 12:50:50,088 - INFO - mensagem". Os arquivos
+# antigos misturam UTF-8 e Latin-1, por isso os acentos são aceitos como qualquer caractere.
+_LINHA_TEXTO = re.compile(r"^(\d{4}-\d{2}-\d{2}) (\d{2}):\d{2}:\d{2},\d+ - (\w+) - (.*)$")
+_MENSAGENS_TEXTO = [
+    (re.compile(r"^Admin '(?P<usuario>.*)' logado\.$"), "login_admin"),
+    (re.compile(r"^Tentativa de login admin inv\S*lida\.$"), "login_admin_invalido"),
+    (re.compile(r"^Admin realizou logout\.$"), "logout_admin"),
+    (re.compile(r"^Curso cadastrado: (?P<curso>.*) \((?P<nivel_curso>[^()]*)\)$"), "cadastro_curso"),
+    (re.compile(r"^Curso editado: (?P<curso>.*) \((?P<nivel_curso>[^()]*)\)$"), "edicao_curso"),
+    (re.compile(r"^Curso exclu\S*do: (?P<curso>.*)$"), "exclusao_curso"),
+    (re.compile(r"^Usu\S*rio '(?P<usuario>.*)' autenticado\.$"), "login_usuario"),
+    (re.compile(r"^Usu\S*rio '(?P<usuario>.*)' cadastrado\.$"), "cadastro_usuario"),
+    (re.compile(r"^Usu\S*rio '(?P<usuario>.*)' exclu\S*do\.$"), "exclusao_usuario"),
+    (re.compile(r"^Backup criado: (?P<arquivo>.*)$"), "backup"),
+    (re.compile(r"^In\S*cio da execu\S*o do sistema\.$"), "inicio"),
+    (re.compile(r"^Encerramento do sistema solicitado\.$"), "encerramento"),
+    (re.compile(r"^Usu\S*rio selecionou o menu de usu\S*rio\.$"), "menu_usuario"),
+    (re.compile(r"^Usu\S*rio selecionou o menu de administrador\.$"), "menu_admin"),
+]
+
+def _decodificar(linha):
+    try:
+        return linha.decode("utf-8")
+    except UnicodeDecodeError:
+        return linha.decode("latin-1")
+
+def interpretar_linha(linha):
+    # Retorna (hora "AAAA-MM-DDTHH", evento, usuario) ou None para linhas não reconhecidas.
+    texto = _decodificar(linha).strip()
+    if texto.startswith("{"):
+        try:
+            registro = json.loads(texto)
+            momento = registro["momento"]
+        except (ValueError, KeyError, TypeError):
+            return None
+        evento = registro.get("evento")
+        if not evento:
+            return None
+        return f"{momento[:10]}T{momento[11:13]}", evento, registro.get("usuario")
+
+    correspondencia = _LINHA_TEXTO.match(texto)
+    if not correspondencia:
+        return None
+    data, hora, _, mensagem = correspondencia.groups()
+    for padrao, evento in _MENSAGENS_TEXTO:
+        campos = padrao.match(mensagem)
+        if campos:
+            return f"{data}T{hora}", evento, campos.groupdict().get("usuario")
+    return None
+
+def _novo_estado():
+    return {"versao": VERSAO, "arquivos": {}, "contagens": {}, "usuarios": {}}
+
+def carregar_estado():
+    try:
+        with open(ESTADO_ARQUIVO, "r", encoding="utf-8") as f:
+            estado = json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return _novo_estado()
+    return estado if estado.get("versao") == VERSAO else _novo_estado()
+
+def _salvar_estado(estado):
+    temporario = travas.temporario(ESTADO_ARQUIVO)
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(estado, f, ensure_ascii=False)
+    os.replace(temporario, ESTADO_ARQUIVO)
+
+def _contar(estado, hora, evento, usuario):
+    por_hora = estado["contagens"].setdefault(evento, {})
+    por_hora[hora] = por_hora.get(hora, 0) + 1
+    if usuario:
+        por_dia = estado["usuarios"].setdefault(evento, {}).setdefault(usuario, {})
+        por_dia[hora[:10]] = por_dia.get(hora[:10], 0) + 1
+
+def _ler_a_partir(caminho, posicao, estado):
+    # Lê só as linhas completas; uma linha ainda sendo escrita fica para a próxima execução.
+    linhas = 0
+    with open(caminho, "rb") as f:
+        f.seek(posicao)
+        for linha in f:
+            if not linha.endswith(b"\n"):
+                break
+            posicao += len(linha)
+            linhas += 1
+            interpretado = interpretar_linha(linha)
+            if interpretado:
+                _contar(estado, *interpretado)
+    return posicao, linhas
+
+def _backups(arquivo):
+    # Arquivos rotacionados, do mais antigo (arquivo.N) para o mais novo (arquivo.1).
+    backups = []
+    for i in range(LOG_BACKUPS, 0, -1):
+        candidato = f"{arquivo}.{i}"
+        try:
+            backups.append((candidato, os.stat(candidato).st_ino))
+        except OSError:
+            continue
+    return backups
+
+def atualizar(reiniciar=False):
+    with travas.travar(ESTADO_ARQUIVO):
+        estado = _novo_estado() if reiniciar else carregar_estado()
+        linhas = 0
+        for arquivo in ARQUIVOS_LOG.values():
+            try:
+                inode = os.stat(arquivo).st_ino
+            except OSError:
+                continue
+            anterior = estado["arquivos"].get(arquivo)
+            posicao = anterior["posicao"] if anterior else 0
+
+            if anterior is None or anterior["inode"] != inode:
+                # Primeira leitura ou arquivo rotacionado: lê os backups mais novos que a
+                # última posição conhecida (ou todos) e depois o arquivo atual desde o início.
+                pendentes = _backups(arquivo)
+                inodes = [i for _, i in pendentes]
+                if anterior is not None and anterior["inode"] in inodes:
+                    inicio = inodes.index(anterior["inode"])
+                    linhas += _ler_a_partir(pendentes[inicio][0], posicao, estado)[1]
+                    pendentes = pendentes[inicio + 1:]
+                for backup, _ in pendentes:
+                    linhas += _ler_a_partir(backup, 0, estado)[1]
+                posicao = 0
+            elif os.path.getsize(arquivo) < posicao:
+                posicao = 0
+
+            posicao, lidas = _ler_a_partir(arquivo, posicao, estado)
+            linhas += lidas
+            estado["arquivos"][arquivo] = {"inode": inode, "posicao": posicao}
+
+        _salvar_estado(estado)
+        return estado, linhas
+
+def serie(estado, evento, por="hora", desde=None):
+    # Contagens do evento por hora ("AAAA-MM-DDTHH") ou por dia ("AAAA-MM-DD").
+    resultado = {}
+    for hora, quantidade in estado["contagens"].get(evento, {}).items():
+        if desde and hora[:10] < desde:
+            continue
+        chave = hora[:10] if por == "dia" else hora
+        resultado[chave] = resultado.get(chave, 0) + quantidade
+    return dict(sorted(resultado.items()))
+
+def por_usuario(estado, evento, desde=None):
+    resultado = {}
+    for usuario, dias in estado["usuarios"].get(evento, {}).items():
+        total = sum(n for dia, n in dias.items() if not desde or dia >= desde)
+        if total:
+            resultado[usuario] = total
+    return dict(sorted(resultado.items(), key=lambda item: item[1], reverse=True))
+
+def totais(estado):
+    return {evento: sum(horas.values()) for evento, horas in sorted(estado["contagens"].items())}
+
+def main():
+    parser = argparse.ArgumentParser(description="Contadores de eventos a partir dos logs do sistema.")
+    parser.add_argument("--evento", help="Evento a detalhar (ex.: login_admin_invalido, login_usuario).")
+    parser.add_argument("--por", choices=["hora", "dia"], default="hora", help="Agrupamento da série do evento.")
+    parser.add_argument("--por-usuario", action="store_true", help="Contagem do evento por usuário.")
+    parser.add_argument("--desde", help="Data inicial (AAAA-MM-DD).")
+    parser.add_argument("--dias", type=int, help="Considera só os últimos N dias.")
+    parser.add_argument("--reiniciar", action="store_true", help="Refaz a análise desde o início dos arquivos.")
+    args = parser.parse_args()
+
+    estado, linhas = atualizar(args.reiniciar)
+    desde = args.desde
+    if args.dias:
+        desde = (datetime.now() - timedelta(days=args.dias - 1)).strftime("%Y-%m-%d")
+    print(f"Linhas novas processadas: {linhas}\n")
+
+    if args.evento and args.por_usuario:
+        resultado = por_usuario(estado, args.evento, desde)
+        titulo = f"{args.evento} por usuário"
+    elif args.evento:
+        resultado = serie(estado, args.evento, args.por, desde)
+        titulo = f"{args.evento} por {args.por}"
+    else:
+        resultado = totais(estado)
+        titulo = "Total por evento"
+
+    print(f"=== {titulo} ===")
+    if not resultado:
+        print("Nenhum registro encontrado.")
+    for chave, quantidade in resultado.items():
+        print(f"{chave:<40} {quantidade:>6}")
+
+if __name__ == "__main__":
+    main()
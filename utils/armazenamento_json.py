@@ -0,0 +1,568 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+from utils import metricas, travas
+
+USUARIO_ARQUIVO = "data/usuario.json"
+CURSO_ARQUIVO = "data/cursos.json"
+ACESSO_ARQUIVO = "data/acessos.json"
+AVALIACOES_ARQUIVO = "data/avaliacoes.json"
+
+# Catálogo leve dos cursos (nome, nível, tamanho e posição do conteúdo) e arquivo com os
+# conteúdos concatenados. Ambos são derivados de cursos.json e regenerados quando ele muda.
+CATALOGO_ARQUIVO = "data/cursos_catalogo.json"
+CONTEUDO_ARQUIVO = "data/cursos_conteudo.dat"
+
+# Cache dos arquivos de dados já carregados: arquivo -> (assinatura, dados, posição no journal, índice).
+# A assinatura (mtime, tamanho e inode) é a versão do arquivo: toda gravação cria um arquivo
+# novo com os.replace, e o arquivo só é lido novamente quando a versão no disco muda.
+_cache = {}
+_trava_cache = threading.RLock()
+
+def _assinatura(arquivo):
+    try:
+        st = os.stat(arquivo)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+@contextmanager
+def _escrita(arquivo):
+    # Trava do arquivo (entre processos) antes da trava do cache (entre threads). Com ela,
+    # carregar_dados compara a versão em cache com a do disco e relê o arquivo se outro
+    # processo o gravou; a alteração é então reaplicada sobre a versão mais recente.
+    with travas.travar(arquivo), _trava_cache:
+        yield
+
+def _chave_usuario(usuario):
+    return usuario["usuario"]
+
+def _chave_usuario_curso(registro):
+    return (registro["usuario"], registro["curso"])
+
+# Arquivos com índice em memória: arquivo -> função que extrai a chave de cada registro.
+# O índice é reconstruído junto com o cache e mantido pelas operações de escrita.
+_CHAVES_INDICE = {
+    USUARIO_ARQUIVO: _chave_usuario,
+    ACESSO_ARQUIVO: _chave_usuario_curso,
+    AVALIACOES_ARQUIVO: _chave_usuario_curso,
+}
+
+def _indexar(arquivo, dados):
+    chave = _CHAVES_INDICE.get(arquivo)
+    if chave is None:
+        return None
+    indice = {}
+    for registro in dados:
+        indice.setdefault(chave(registro), registro)
+    return indice
+
+def _aplicar_acesso(acessos, indice, evento):
+    acesso_existente = indice.get((evento["usuario"], evento["curso"]))
+
+    # Eventos agregados pelo buffer de acessos trazem a quantidade e o primeiro acesso do lote.
+    quantidade = evento.get("quantidade", 1)
+
+    if acesso_existente:
+        acesso_existente["quantidade"] += quantidade
+        acesso_existente["tempo"] += evento["tempo"]
+        acesso_existente["ultimo_acesso"] = evento["timestamp"]
+    else:
+        novo_acesso = {
+            "usuario": evento["usuario"],
+            "curso": evento["curso"],
+            "nivel": evento["nivel"],
+            "quantidade": quantidade,
+            "tempo": evento["tempo"],
+            "primeiro_acesso": evento.get("primeiro_acesso", evento["timestamp"]),
+            "ultimo_acesso": evento["timestamp"]
+        }
+        acessos.append(novo_acesso)
+        indice[(evento["usuario"], evento["curso"])] = novo_acesso
+
+def _aplicar_avaliacao(avaliacoes, indice, evento):
+    avaliacoes.append(evento)
+    indice.setdefault((evento["usuario"], evento["curso"]), evento)
+
+# Arquivos cujas escritas são eventos anexados a um journal (um JSON por linha).
+# O snapshot .json só é reescrito na compactação.
+_JOURNAIS = {
+    ACESSO_ARQUIVO: _aplicar_acesso,
+    AVALIACOES_ARQUIVO: _aplicar_avaliacao,
+}
+
+def arquivo_journal(arquivo):
+    return os.path.splitext(arquivo)[0] + ".jsonl"
+
+def _arquivo_compactacao(arquivo):
+    return os.path.splitext(arquivo)[0] + ".compactacao"
+
+# A compactação troca o snapshot e depois esvazia o journal. Se o processo cair entre as duas
+# etapas, o journal seria aplicado de novo sobre um snapshot que já o contém (e os acessos
+# seriam contados em dobro). Antes da troca é gravado um marcador com o inode do novo
+# snapshot; enquanto ele existir, a compactação é concluída (ou descartada) antes de
+# qualquer leitura ou escrita: se o snapshot em uso é o novo, o journal já está nele.
+def _marcar_compactacao(arquivo, temporario):
+    marcador = _arquivo_compactacao(arquivo)
+    temporario_marcador = travas.temporario(marcador)
+    with open(temporario_marcador, "w", encoding="utf-8") as f:
+        f.write(str(os.stat(temporario).st_ino))
+    os.replace(temporario_marcador, marcador)
+
+def _concluir_compactacao(arquivo):
+    # Chamado com a trava exclusiva do arquivo.
+    marcador = _arquivo_compactacao(arquivo)
+    try:
+        with open(marcador, "r", encoding="utf-8") as f:
+            inode = int(f.read())
+    except FileNotFoundError:
+        return
+    except ValueError:
+        inode = None
+    try:
+        trocado = inode is not None and os.stat(arquivo).st_ino == inode
+    except FileNotFoundError:
+        trocado = False
+    if trocado:
+        open(arquivo_journal(arquivo), "w").close()
+    os.remove(marcador)
+
+@metricas.cronometrar("ler_json", rotulo=metricas.nome_arquivo)
+def _ler_json(arquivo):
+    try:
+        with open(arquivo, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return []
+
+def _aplicar_journal(arquivo, dados, indice, posicao):
+    journal = arquivo_journal(arquivo)
+    aplicar = _JOURNAIS[arquivo]
+    try:
+        with open(journal, "rb") as f:
+            f.seek(posicao)
+            for linha in f:
+                if not linha.endswith(b"\n"):
+                    # Linha ainda sendo escrita por outro processo; é relida na próxima carga.
+                    break
+                posicao += len(linha)
+                try:
+                    aplicar(dados, indice, json.loads(linha))
+                except (ValueError, KeyError):
+                    continue
+    except FileNotFoundError:
+        return 0
+    return posicao
+
+@metricas.cronometrar("carregar_dados", rotulo=metricas.nome_arquivo)
+def carregar_dados(arquivo):
+    # Os dados retornados são compartilhados entre os módulos: quem alterar a lista
+    # deve persistir a alteração com salvar_dados.
+    if arquivo in _JOURNAIS:
+        if os.path.exists(_arquivo_compactacao(arquivo)):
+            with _escrita(arquivo):
+                _concluir_compactacao(arquivo)
+        # Snapshot e journal são lidos sob a trava compartilhada, para que uma compactação
+        # em outro processo não seja vista pela metade (snapshot novo com o journal antigo).
+        with travas.travar(arquivo, compartilhada=True):
+            return _carregar(arquivo)
+    return _carregar(arquivo)
+
+def _carregar(arquivo):
+    with _trava_cache:
+        assinatura = _assinatura(arquivo)
+        em_cache = _cache.get(arquivo)
+
+        if em_cache and em_cache[0] == assinatura:
+            metricas.contar("cache_dados", arquivo=os.path.basename(arquivo), resultado="acerto")
+            assinatura, dados, posicao, indice = em_cache
+        else:
+            metricas.contar("cache_dados", arquivo=os.path.basename(arquivo), resultado="falta")
+            dados = _ler_json(arquivo) if assinatura else []
+            posicao = 0
+            indice = _indexar(arquivo, dados)
+
+        if arquivo in _JOURNAIS:
+            posicao = _aplicar_journal(arquivo, dados, indice, posicao)
+
+        _cache[arquivo] = (assinatura, dados, posicao, indice)
+        return dados
+
+def _indice(arquivo):
+    carregar_dados(arquivo)
+    with _trava_cache:
+        return _cache[arquivo][3]
+
+@metricas.cronometrar("gravar_json", rotulo=metricas.nome_arquivo)
+def _gravar(arquivo, dados):
+    # Chamado com a trava do arquivo já obtida.
+    with _trava_cache:
+        temporario = travas.temporario(arquivo)
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(dados, f, indent=4)
+
+        if arquivo in _JOURNAIS:
+            # O snapshot já contém todos os eventos aplicados até aqui.
+            _concluir_compactacao(arquivo)
+            _marcar_compactacao(arquivo, temporario)
+            os.replace(temporario, arquivo)
+            _concluir_compactacao(arquivo)
+        else:
+            os.replace(temporario, arquivo)
+
+        em_cache = _cache.get(arquivo)
+        if em_cache and em_cache[1] is dados and em_cache[3] is not None:
+            indice = em_cache[3]
+        else:
+            indice = _indexar(arquivo, dados)
+        _cache[arquivo] = (_assinatura(arquivo), dados, 0, indice)
+
+@metricas.cronometrar("salvar_dados", rotulo=metricas.nome_arquivo)
+def salvar_dados(arquivo, dados):
+    with _escrita(arquivo):
+        _gravar(arquivo, dados)
+        if arquivo == CURSO_ARQUIVO:
+            _gerar_catalogo(dados)
+
+def registrar_eventos(arquivo, eventos, sincronizar=False):
+    bloco = "".join(json.dumps(evento) + "\n" for evento in eventos).encode("utf-8")
+    if not bloco:
+        return
+    with _escrita(arquivo):
+        _concluir_compactacao(arquivo)
+        journal = arquivo_journal(arquivo)
+        with open(journal, "ab") as f:
+            inicio = f.tell()
+            f.write(bloco)
+            if sincronizar:
+                f.flush()
+                os.fsync(f.fileno())
+
+        em_cache = _cache.get(arquivo)
+        if em_cache and em_cache[2] == inicio:
+            # Nenhum outro processo escreveu no journal desde a última carga:
+            # aplica os eventos direto na memória, sem reler o arquivo.
+            assinatura, dados, _, indice = em_cache
+            for evento in eventos:
+                _JOURNAIS[arquivo](dados, indice, evento)
+            _cache[arquivo] = (assinatura, dados, inicio + len(bloco), indice)
+
+def registrar_evento(arquivo, evento):
+    registrar_eventos(arquivo, [evento])
+
+def registrar_acessos(acessos):
+    registrar_eventos(ACESSO_ARQUIVO, [
+        {
+            "usuario": a["usuario"],
+            "curso": a["curso"],
+            "nivel": a["nivel"],
+            "quantidade": a["quantidade"],
+            "tempo": a["tempo"],
+            "primeiro_acesso": a["primeiro_acesso"],
+            "timestamp": a["ultimo_acesso"]
+        }
+        for a in acessos
+    ], sincronizar=True)
+
+def registrar_avaliacao(avaliacao):
+    registrar_evento(AVALIACOES_ARQUIVO, avaliacao)
+
+def compactar_journal(arquivo=None):
+    arquivos = [arquivo] if arquivo else list(_JOURNAIS)
+    for arq in arquivos:
+        # Com a trava exclusiva nenhum evento é anexado entre a leitura e o truncamento.
+        with _escrita(arq):
+            journal = arquivo_journal(arq)
+            if os.path.exists(journal) and os.path.getsize(journal) > 0:
+                salvar_dados(arq, carregar_dados(arq))
+
+def _ler_bytes(arquivo):
+    try:
+        with open(arquivo, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return b""
+
+def copia_bruta(arquivo, anterior=None):
+    # Para os backups: conteúdo cru do snapshot e do journal (b"" se não houver), lidos juntos
+    # sob a trava compartilhada e sem decodificar os dados. Devolve (assinatura, snapshot,
+    # journal); se a assinatura for igual a "anterior", nada é lido e o conteúdo vem None.
+    journal = arquivo_journal(arquivo) if arquivo in _JOURNAIS else None
+    if journal and os.path.exists(_arquivo_compactacao(arquivo)):
+        with _escrita(arquivo):
+            _concluir_compactacao(arquivo)
+    with travas.travar(arquivo, compartilhada=True):
+        assinatura = [list(a) if a else None for a in (_assinatura(arquivo), journal and _assinatura(journal))]
+        if assinatura == anterior:
+            return assinatura, None, None
+        return assinatura, _ler_bytes(arquivo) or b"[]", _ler_bytes(journal) if journal else b""
+
+def aplicar_journal_bruto(arquivo, dados, conteudo):
+    # Aplica sobre "dados" os eventos de um journal cru (ver copia_bruta).
+    aplicar = _JOURNAIS[arquivo]
+    indice = _indexar(arquivo, dados)
+    for linha in conteudo.splitlines(keepends=True):
+        if not linha.endswith(b"\n"):
+            break
+        try:
+            aplicar(dados, indice, json.loads(linha))
+        except (ValueError, KeyError):
+            continue
+    return dados
+
+def invalidar_cache(arquivo=None):
+    with _trava_cache:
+        if arquivo is None:
+            _cache.clear()
+        else:
+            _cache.pop(arquivo, None)
+
+def buscar_usuario(nome):
+    return _indice(USUARIO_ARQUIVO).get(nome)
+
+def inserir_usuario(usuario):
+    return bool(inserir_usuarios([usuario]))
+
+def inserir_usuarios(novos):
+    # Retorna os usuários inseridos; nomes cadastrados por outra sessão são ignorados.
+    with _escrita(USUARIO_ARQUIVO):
+        usuarios = carregar_dados(USUARIO_ARQUIVO)
+        indice = _indice(USUARIO_ARQUIVO)
+        inseridos = []
+        for usuario in novos:
+            if usuario["usuario"] in indice:
+                continue
+            usuarios.append(usuario)
+            indice[usuario["usuario"]] = usuario
+            inseridos.append(usuario)
+        if inseridos:
+            salvar_dados(USUARIO_ARQUIVO, usuarios)
+        return inseridos
+
+def atualizar_usuario(nome_antigo, alteracoes):
+    # Os campos alterados são aplicados sobre o registro relido com a trava, e não sobre a
+    # cópia da sessão: a edição de outra sessão nos demais campos não é desfeita.
+    with _escrita(USUARIO_ARQUIVO):
+        usuarios = carregar_dados(USUARIO_ARQUIVO)
+        indice = _indice(USUARIO_ARQUIVO)
+        atual = indice.get(nome_antigo)
+        if atual is None:
+            return None
+        novo_nome = alteracoes.get("usuario", nome_antigo)
+        if novo_nome != nome_antigo and novo_nome in indice:
+            return None
+        usuario = dict(atual, **alteracoes)
+        usuarios[usuarios.index(atual)] = usuario
+        del indice[nome_antigo]
+        indice[novo_nome] = usuario
+        salvar_dados(USUARIO_ARQUIVO, usuarios)
+        return usuario
+
+def remover_usuario(nome):
+    with _escrita(USUARIO_ARQUIVO):
+        usuarios = carregar_dados(USUARIO_ARQUIVO)
+        atual = _indice(USUARIO_ARQUIVO).pop(nome, None)
+        if atual is not None:
+            usuarios.remove(atual)
+            salvar_dados(USUARIO_ARQUIVO, usuarios)
+
+# Catálogo em memória: lista geral na ordem de cursos.json e índices por nível e por nome.
+# As escritas de cursos atualizam os índices incrementalmente em vez de refazer o catálogo.
+_catalogo = {"origem": None, "cursos": [], "por_nivel": {}, "por_nome": {}, "tamanho_vivo": 0}
+
+def _usar_catalogo(origem, entradas):
+    _catalogo["origem"] = origem
+    _catalogo["cursos"] = []
+    _catalogo["por_nivel"] = {}
+    _catalogo["por_nome"] = {}
+    _catalogo["tamanho_vivo"] = 0
+    for ordem, e in enumerate(entradas):
+        _indexar_curso(dict(e, ordem=ordem))
+
+def _indexar_curso(entrada):
+    _catalogo["cursos"].append(entrada)
+    _catalogo["por_nivel"].setdefault(entrada["nivel"], []).append(entrada)
+    _catalogo["por_nome"][entrada["nome"].lower()] = entrada
+    _catalogo["tamanho_vivo"] += entrada["tamanho"]
+
+def _desindexar_curso(entrada):
+    _catalogo["cursos"].remove(entrada)
+    _catalogo["por_nivel"][entrada["nivel"]].remove(entrada)
+    del _catalogo["por_nome"][entrada["nome"].lower()]
+    _catalogo["tamanho_vivo"] -= entrada["tamanho"]
+
+def _anexar_conteudo(conteudo):
+    # Só é chamado com a trava de cursos.json: o arquivo de conteúdo cresce apenas no fim,
+    # então as posições já registradas continuam válidas para os outros processos.
+    corpo = (conteudo or "").encode("utf-8")
+    with open(CONTEUDO_ARQUIVO, "ab") as f:
+        offset = f.tell()
+        f.write(corpo)
+    return offset, len(corpo)
+
+def _salvar_catalogo():
+    origem = _assinatura(CURSO_ARQUIVO)
+    entradas = [{campo: e[campo] for campo in ("nome", "nivel", "tamanho", "offset")} for e in _catalogo["cursos"]]
+    temporario = travas.temporario(CATALOGO_ARQUIVO)
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump({"origem": origem, "cursos": entradas}, f, indent=4)
+    os.replace(temporario, CATALOGO_ARQUIVO)
+    _catalogo["origem"] = origem
+
+def _gerar_catalogo(cursos):
+    entradas = []
+    temporario = travas.temporario(CONTEUDO_ARQUIVO)
+    with open(temporario, "wb") as f:
+        for curso in cursos:
+            corpo = (curso.get("conteudo") or "").encode("utf-8")
+            entradas.append({
+                "nome": curso["nome"],
+                "nivel": curso.get("nivel"),
+                "tamanho": len(corpo),
+                "offset": f.tell()
+            })
+            f.write(corpo)
+    os.replace(temporario, CONTEUDO_ARQUIVO)
+
+    _usar_catalogo(None, entradas)
+    _salvar_catalogo()
+
+def _carregar_catalogo():
+    with _trava_cache:
+        if _catalogo["origem"] == _assinatura(CURSO_ARQUIVO):
+            return _catalogo
+
+    # O catálogo pode ter de ser regerado: isso é feito com a trava de cursos.json.
+    with _escrita(CURSO_ARQUIVO):
+        origem = _assinatura(CURSO_ARQUIVO)
+        if _catalogo["origem"] == origem:
+            return _catalogo
+
+        salvo = _ler_json(CATALOGO_ARQUIVO)
+        if (isinstance(salvo, dict) and origem is not None and salvo.get("origem") == list(origem)
+                and os.path.exists(CONTEUDO_ARQUIVO)):
+            _usar_catalogo(origem, salvo["cursos"])
+        else:
+            _gerar_catalogo(carregar_dados(CURSO_ARQUIVO))
+        return _catalogo
+
+def _gravar_cursos(cursos):
+    _gravar(CURSO_ARQUIVO, cursos)
+    # Conteúdos substituídos ou excluídos ficam como espaço morto no arquivo de conteúdo;
+    # quando ele passa a ocupar mais que o conteúdo vivo, o arquivo é refeito.
+    if os.path.getsize(CONTEUDO_ARQUIVO) > 2 * max(_catalogo["tamanho_vivo"], 1):
+        _gerar_catalogo(cursos)
+    else:
+        _salvar_catalogo()
+
+def carregar_conteudo(curso):
+    while True:
+        catalogo = _carregar_catalogo()
+        with _trava_cache:
+            origem = catalogo["origem"]
+            entrada = catalogo["por_nome"].get(curso["nome"].lower())
+            if entrada is None:
+                return ""
+            with open(CONTEUDO_ARQUIVO, "rb") as f:
+                # cursos.json é regravado antes de o arquivo de conteúdo ser refeito: se a
+                # versão não mudou após a abertura, as posições do catálogo valem para ele.
+                if _assinatura(CURSO_ARQUIVO) != origem:
+                    continue
+                f.seek(entrada["offset"])
+                return f.read(entrada["tamanho"]).decode("utf-8")
+
+def listar_cursos():
+    return _carregar_catalogo()["cursos"]
+
+def cursos_por_nivel(nivel):
+    return list(_carregar_catalogo()["por_nivel"].get(nivel, []))
+
+def _posicao_apos(lista, ordem):
+    # Busca binária: posição do primeiro curso com ordem maior que a informada.
+    inicio, fim = 0, len(lista)
+    while inicio < fim:
+        meio = (inicio + fim) // 2
+        if lista[meio]["ordem"] <= ordem:
+            inicio = meio + 1
+        else:
+            fim = meio
+    return inicio
+
+def pagina_cursos(nivel=None, apos=None, antes=None, deslocamento=0, limite=10):
+    # Janela da listagem sem copiar a lista inteira: os cursos depois do cursor "apos", os
+    # "limite" cursos antes do cursor "antes" ou, sem cursor, a partir da posição "deslocamento".
+    # O cursor é a "ordem" do curso, e as listas do catálogo já estão nessa ordem.
+    catalogo = _carregar_catalogo()
+    with _trava_cache:
+        lista = catalogo["cursos"] if nivel is None else catalogo["por_nivel"].get(nivel, [])
+        if apos is not None:
+            inicio = _posicao_apos(lista, apos)
+        elif antes is not None:
+            fim = _posicao_apos(lista, antes - 1)
+            return [dict(e) for e in lista[max(fim - limite, 0):fim]]
+        else:
+            inicio = deslocamento
+        return [dict(e) for e in lista[inicio:inicio + limite]]
+
+def contar_cursos(nivel=None):
+    catalogo = _carregar_catalogo()
+    if nivel is None:
+        return len(catalogo["cursos"])
+    return len(catalogo["por_nivel"].get(nivel, []))
+
+def buscar_curso(nome):
+    return _carregar_catalogo()["por_nome"].get(nome.lower())
+
+def inserir_curso(curso):
+    with _escrita(CURSO_ARQUIVO):
+        _carregar_catalogo()
+        cursos = carregar_dados(CURSO_ARQUIVO)
+        cursos.append(curso)
+
+        offset, tamanho = _anexar_conteudo(curso.get("conteudo"))
+        ordem = _catalogo["cursos"][-1]["ordem"] + 1 if _catalogo["cursos"] else 0
+        _indexar_curso({"nome": curso["nome"], "nivel": curso.get("nivel"), "tamanho": tamanho, "offset": offset, "ordem": ordem})
+        _gravar_cursos(cursos)
+
+def atualizar_curso(nome_antigo, curso):
+    with _escrita(CURSO_ARQUIVO):
+        _carregar_catalogo()
+        cursos = carregar_dados(CURSO_ARQUIVO)
+        for i, c in enumerate(cursos):
+            if c["nome"] == nome_antigo:
+                # Campos ausentes (ex.: conteúdo não editado) mantêm o valor atual.
+                atualizado = dict(c)
+                atualizado.update((campo, curso[campo]) for campo in ("nome", "conteudo", "nivel") if campo in curso)
+                cursos[i] = atualizado
+
+                entrada = _catalogo["por_nome"][nome_antigo.lower()]
+                _desindexar_curso(entrada)
+                entrada = dict(entrada, nome=atualizado["nome"], nivel=atualizado.get("nivel"))
+                if "conteudo" in curso:
+                    entrada["offset"], entrada["tamanho"] = _anexar_conteudo(curso["conteudo"])
+                _indexar_curso(entrada)
+
+                # Mantém a ordem original de cadastro nas listagens.
+                _catalogo["cursos"].sort(key=lambda e: e["ordem"])
+                _catalogo["por_nivel"][entrada["nivel"]].sort(key=lambda e: e["ordem"])
+                _gravar_cursos(cursos)
+                return True
+        return False
+
+def remover_curso(nome):
+    with _escrita(CURSO_ARQUIVO):
+        _carregar_catalogo()
+        entrada = _catalogo["por_nome"].get(nome.lower())
+        if entrada is None or entrada["nome"] != nome:
+            return
+        _desindexar_curso(entrada)
+        cursos = [c for c in carregar_dados(CURSO_ARQUIVO) if c["nome"] != nome]
+        _gravar_cursos(cursos)
+
+def buscar_acesso(usuario, curso):
+    return _indice(ACESSO_ARQUIVO).get((usuario, curso))
+
+def avaliacao_existe(usuario, curso):
+    return (usuario, curso) in _indice(AVALIACOES_ARQUIVO)
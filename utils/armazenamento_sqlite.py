@@ -0,0 +1,345 @@
+import json
+import os
+import sqlite3
+import threading
+
+from utils import metricas, travas
+
+USUARIO_ARQUIVO = "data/usuario.json"
+CURSO_ARQUIVO = "data/cursos.json"
+ACESSO_ARQUIVO = "data/acessos.json"
+AVALIACOES_ARQUIVO = "data/avaliacoes.json"
+
+BANCO_ARQUIVO = os.environ.get("SISTEMA_BANCO", "data/sistema.db")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    usuario TEXT NOT NULL UNIQUE,
+    senha TEXT NOT NULL,
+    tipo TEXT,
+    genero TEXT,
+    idade INTEGER
+);
+CREATE TABLE IF NOT EXISTS cursos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome TEXT NOT NULL,
+    nome_chave TEXT NOT NULL UNIQUE,
+    conteudo TEXT,
+    nivel TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_cursos_nivel ON cursos (nivel);
+CREATE TABLE IF NOT EXISTS acessos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    usuario TEXT NOT NULL,
+    curso TEXT NOT NULL,
+    nivel TEXT,
+    quantidade INTEGER NOT NULL,
+    tempo REAL NOT NULL,
+    primeiro_acesso TEXT,
+    ultimo_acesso TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_acessos_usuario_curso ON acessos (usuario, curso);
+CREATE TABLE IF NOT EXISTS avaliacoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    usuario TEXT NOT NULL,
+    curso TEXT NOT NULL,
+    nivel TEXT,
+    nota INTEGER NOT NULL,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_usuario_curso ON avaliacoes (usuario, curso);
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_timestamp ON avaliacoes (timestamp);
+CREATE TABLE IF NOT EXISTS versoes (
+    tabela TEXT PRIMARY KEY,
+    versao INTEGER NOT NULL
+);
+"""
+
+
+# Arquivo JSON -> (tabela, colunas expostas como chaves do dicionário).
+TABELAS = {
+    USUARIO_ARQUIVO: ("usuarios", ("usuario", "senha", "tipo", "genero", "idade")),
+    CURSO_ARQUIVO: ("cursos", ("nome", "conteudo", "nivel")),
+    ACESSO_ARQUIVO: ("acessos", ("usuario", "curso", "nivel", "quantidade", "tempo", "primeiro_acesso", "ultimo_acesso")),
+    AVALIACOES_ARQUIVO: ("avaliacoes", ("usuario", "curso", "nivel", "nota", "timestamp")),
+}
+
+_local = threading.local()
+_trava_criacao = threading.Lock()
+
+def _criar_banco():
+    # O banco é montado e migrado em um arquivo temporário e só então renomeado: se a
+    # migração falhar (ex.: nomes de curso repetidos nos JSON), não fica um banco vazio que
+    # as execuções seguintes tomariam como já migrado.
+    temporario = travas.temporario(BANCO_ARQUIVO)
+    conexao = sqlite3.connect(temporario)
+    try:
+        conexao.executescript(ESQUEMA)
+        migrar_de_json(conexao)
+        conexao.close()
+        os.replace(temporario, BANCO_ARQUIVO)
+    except BaseException:
+        conexao.close()
+        for arquivo in (temporario, temporario + "-journal"):
+            if os.path.exists(arquivo):
+                os.remove(arquivo)
+        raise
+
+def conectar():
+    # Uma conexão por thread; o banco é criado e migrado dos JSON na primeira conexão.
+    conexao = getattr(_local, "conexao", None)
+    if conexao is None:
+        # A trava entre processos evita que duas sessões criem e migrem o banco ao mesmo tempo.
+        with _trava_criacao, travas.travar(BANCO_ARQUIVO):
+            if not os.path.exists(BANCO_ARQUIVO):
+                _criar_banco()
+            conexao = sqlite3.connect(BANCO_ARQUIVO, timeout=30)
+            conexao.row_factory = sqlite3.Row
+            conexao.executescript(ESQUEMA)
+        _local.conexao = conexao
+    return conexao
+
+def _alterada(conexao, tabela):
+    # Versão da tabela, incrementada em cada transação que a altera: com ela o backup sabe
+    # quais tabelas mudaram sem ler os dados (ver copia_bruta).
+    conexao.execute(
+        "INSERT INTO versoes (tabela, versao) VALUES (?, 1) ON CONFLICT (tabela) DO UPDATE SET versao = versao + 1",
+        (tabela,)
+    )
+
+def _linhas(tabela, colunas, registros):
+    for registro in registros:
+        linha = [registro.get(coluna) for coluna in colunas]
+        if tabela == "cursos":
+            linha.append(registro["nome"].lower())
+        yield linha
+
+def _substituir_tabela(conexao, arquivo, registros):
+    tabela, colunas = TABELAS[arquivo]
+    nomes = list(colunas) + (["nome_chave"] if tabela == "cursos" else [])
+    conexao.execute(f"DELETE FROM {tabela}")
+    _alterada(conexao, tabela)
+    conexao.executemany(
+        f"INSERT INTO {tabela} ({', '.join(nomes)}) VALUES ({', '.join('?' for _ in nomes)})",
+        _linhas(tabela, colunas, registros)
+    )
+
+def migrar_de_json(conexao=None):
+    conexao = conexao or conectar()
+    from utils import armazenamento_json
+
+    with conexao:
+        for arquivo in TABELAS:
+            # O backend JSON já considera os eventos pendentes nos journals.
+            _substituir_tabela(conexao, arquivo, armazenamento_json.carregar_dados(arquivo))
+
+def _para_dict(linha):
+    return dict(linha) if linha is not None else None
+
+@metricas.cronometrar("carregar_dados", rotulo=metricas.nome_arquivo)
+def carregar_dados(arquivo):
+    tabela, colunas = TABELAS[arquivo]
+    cursor = conectar().execute(f"SELECT {', '.join(colunas)} FROM {tabela} ORDER BY id")
+    return [dict(linha) for linha in cursor]
+
+@metricas.cronometrar("salvar_dados", rotulo=metricas.nome_arquivo)
+def salvar_dados(arquivo, dados):
+    conexao = conectar()
+    with conexao:
+        _substituir_tabela(conexao, arquivo, dados)
+
+def registrar_acessos(acessos):
+    conexao = conectar()
+    with conexao:
+        _alterada(conexao, "acessos")
+        for a in acessos:
+            cursor = conexao.execute(
+                "UPDATE acessos SET quantidade = quantidade + ?, tempo = tempo + ?, ultimo_acesso = ? "
+                "WHERE usuario = ? AND curso = ?",
+                (a["quantidade"], a["tempo"], a["ultimo_acesso"], a["usuario"], a["curso"])
+            )
+            if cursor.rowcount == 0:
+                conexao.execute(
+                    "INSERT INTO acessos (usuario, curso, nivel, quantidade, tempo, primeiro_acesso, ultimo_acesso) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (a["usuario"], a["curso"], a["nivel"], a["quantidade"], a["tempo"], a["primeiro_acesso"], a["ultimo_acesso"])
+                )
+
+def registrar_avaliacao(avaliacao):
+    conexao = conectar()
+    with conexao:
+        _alterada(conexao, "avaliacoes")
+        conexao.execute(
+            "INSERT INTO avaliacoes (usuario, curso, nivel, nota, timestamp) VALUES (?, ?, ?, ?, ?)",
+            (avaliacao["usuario"], avaliacao["curso"], avaliacao.get("nivel"), avaliacao["nota"], avaliacao.get("timestamp"))
+        )
+
+def buscar_acesso(usuario, curso):
+    cursor = conectar().execute(
+        "SELECT usuario, curso, nivel, quantidade, tempo, primeiro_acesso, ultimo_acesso "
+        "FROM acessos WHERE usuario = ? AND curso = ?", (usuario, curso)
+    )
+    return _para_dict(cursor.fetchone())
+
+def avaliacao_existe(usuario, curso):
+    cursor = conectar().execute(
+        "SELECT 1 FROM avaliacoes WHERE usuario = ? AND curso = ? LIMIT 1", (usuario, curso)
+    )
+    return cursor.fetchone() is not None
+
+def compactar_journal(arquivo=None):
+    # O SQLite já grava cada linha no lugar; não há journal para compactar.
+    pass
+
+def copia_bruta(arquivo, anterior=None):
+    # Para os backups (ver armazenamento_json.copia_bruta). O banco não tem um arquivo por
+    # tabela: a assinatura é o inode do banco e a versão da tabela e, se mudou, a tabela é
+    # serializada como o arquivo JSON correspondente.
+    tabela = TABELAS[arquivo][0]
+    conexao = conectar()
+    versao = conexao.execute("SELECT versao FROM versoes WHERE tabela = ?", (tabela,)).fetchone()
+    assinatura = [os.stat(BANCO_ARQUIVO).st_ino, versao[0] if versao else None]
+    if assinatura == anterior:
+        return assinatura, None, None
+    return assinatura, json.dumps(carregar_dados(arquivo)).encode("utf-8"), b""
+
+def buscar_usuario(nome):
+    cursor = conectar().execute(
+        "SELECT usuario, senha, tipo, genero, idade FROM usuarios WHERE usuario = ?", (nome,)
+    )
+    return _para_dict(cursor.fetchone())
+
+def inserir_usuario(usuario):
+    return bool(inserir_usuarios([usuario]))
+
+def inserir_usuarios(novos):
+    # Retorna os usuários inseridos; nomes cadastrados por outra sessão são ignorados.
+    conexao = conectar()
+    inseridos = []
+    with conexao:
+        _alterada(conexao, "usuarios")
+        for u in novos:
+            cursor = conexao.execute(
+                "INSERT OR IGNORE INTO usuarios (usuario, senha, tipo, genero, idade) VALUES (?, ?, ?, ?, ?)",
+                (u["usuario"], u["senha"], u.get("tipo"), u.get("genero"), u.get("idade"))
+            )
+            if cursor.rowcount:
+                inseridos.append(u)
+    return inseridos
+
+def atualizar_usuario(nome_antigo, alteracoes):
+    # Só as colunas alteradas entram no UPDATE; devolve o registro resultante (ou None).
+    campos = [c for c in TABELAS[USUARIO_ARQUIVO][1] if c in alteracoes]
+    conexao = conectar()
+    try:
+        with conexao:
+            if campos:
+                _alterada(conexao, "usuarios")
+                cursor = conexao.execute(
+                    f"UPDATE usuarios SET {', '.join(f'{c} = ?' for c in campos)} WHERE usuario = ?",
+                    [alteracoes[c] for c in campos] + [nome_antigo]
+                )
+                if not cursor.rowcount:
+                    return None
+            linha = conexao.execute(
+                "SELECT usuario, senha, tipo, genero, idade FROM usuarios WHERE usuario = ?",
+                (alteracoes.get("usuario", nome_antigo),)
+            ).fetchone()
+    except sqlite3.IntegrityError:
+        # Novo nome cadastrado por outra sessão depois da verificação.
+        return None
+    return _para_dict(linha)
+
+def remover_usuario(nome):
+    conexao = conectar()
+    with conexao:
+        _alterada(conexao, "usuarios")
+        conexao.execute("DELETE FROM usuarios WHERE usuario = ?", (nome,))
+
+# As listagens trazem só os metadados; o conteúdo é lido com carregar_conteudo ao abrir o curso.
+def listar_cursos():
+    cursor = conectar().execute("SELECT nome, nivel, length(conteudo) AS tamanho FROM cursos ORDER BY id")
+    return [dict(linha) for linha in cursor]
+
+def cursos_por_nivel(nivel):
+    cursor = conectar().execute(
+        "SELECT nome, nivel, length(conteudo) AS tamanho FROM cursos WHERE nivel = ? ORDER BY id", (nivel,)
+    )
+    return [dict(linha) for linha in cursor]
+
+def carregar_conteudo(curso):
+    cursor = conectar().execute("SELECT conteudo FROM cursos WHERE nome_chave = ?", (curso["nome"].lower(),))
+    linha = cursor.fetchone()
+    return (linha[0] or "") if linha else ""
+
+def pagina_cursos(nivel=None, apos=None, antes=None, deslocamento=0, limite=10):
+    # Paginação por cursor (o id do curso, exposto como "ordem"): a janela é lida direto da
+    # chave primária ou do índice de nível, sem percorrer as páginas anteriores.
+    filtros, parametros = [], []
+    if nivel is not None:
+        filtros.append("nivel = ?")
+        parametros.append(nivel)
+    if apos is not None:
+        filtros.append("id > ?")
+        parametros.append(apos)
+    if antes is not None:
+        filtros.append("id < ?")
+        parametros.append(antes)
+    consulta = "SELECT id AS ordem, nome, nivel, length(conteudo) AS tamanho FROM cursos"
+    if filtros:
+        consulta += " WHERE " + " AND ".join(filtros)
+    if antes is not None:
+        cursor = conectar().execute(consulta + " ORDER BY id DESC LIMIT ?", parametros + [limite])
+        return [dict(linha) for linha in reversed(cursor.fetchall())]
+    cursor = conectar().execute(consulta + " ORDER BY id LIMIT ? OFFSET ?", parametros + [limite, deslocamento if apos is None else 0])
+    return [dict(linha) for linha in cursor]
+
+def contar_cursos(nivel=None):
+    if nivel is None:
+        cursor = conectar().execute("SELECT COUNT(*) FROM cursos")
+    else:
+        cursor = conectar().execute("SELECT COUNT(*) FROM cursos WHERE nivel = ?", (nivel,))
+    return cursor.fetchone()[0]
+
+def buscar_curso(nome):
+    cursor = conectar().execute(
+        "SELECT nome, nivel, length(conteudo) AS tamanho FROM cursos WHERE nome_chave = ?", (nome.lower(),)
+    )
+    return _para_dict(cursor.fetchone())
+
+def inserir_curso(curso):
+    conexao = conectar()
+    with conexao:
+        _alterada(conexao, "cursos")
+        conexao.execute(
+            "INSERT INTO cursos (nome, nome_chave, conteudo, nivel) VALUES (?, ?, ?, ?)",
+            (curso["nome"], curso["nome"].lower(), curso.get("conteudo"), curso.get("nivel"))
+        )
+
+def atualizar_curso(nome_antigo, curso):
+    # Como no backend JSON, campos ausentes (ex.: conteúdo não editado) mantêm o valor atual.
+    valores = {campo: curso[campo] for campo in ("nome", "conteudo", "nivel") if campo in curso}
+    if "nome" in valores:
+        valores["nome_chave"] = valores["nome"].lower()
+    if not valores:
+        return (buscar_curso(nome_antigo) or {}).get("nome") == nome_antigo
+    conexao = conectar()
+    with conexao:
+        _alterada(conexao, "cursos")
+        cursor = conexao.execute(
+            # nome_chave usa o índice único; a comparação com nome mantém o nome exato.
+            f"UPDATE cursos SET {', '.join(f'{c} = ?' for c in valores)} WHERE nome_chave = ? AND nome = ?",
+            list(valores.values()) + [nome_antigo.lower(), nome_antigo]
+        )
+    return cursor.rowcount > 0
+
+def remover_curso(nome):
+    conexao = conectar()
+    with conexao:
+        _alterada(conexao, "cursos")
+        conexao.execute("DELETE FROM cursos WHERE nome_chave = ? AND nome = ?", (nome.lower(), nome))
+
+if __name__ == "__main__":
+    migrar_de_json()
+    print(f"Dados de data/*.json migrados para {BANCO_ARQUIVO}.")
@@ -0,0 +1,213 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from utils import agregados, armazenamento_json, busca, travas
+from utils.repositorio import copia_bruta, salvar_dados, USUARIO_ARQUIVO, CURSO_ARQUIVO, ACESSO_ARQUIVO, AVALIACOES_ARQUIVO
+
+# Backups endereçados por conteúdo: cada versão de um arquivo de dados é gravada uma única
+# vez, comprimida, em objetos/<hash>.gz; cada backup (snapshot) é um pequeno JSON que aponta
+# para o hash de cada arquivo. Um backup igual ao anterior não é gravado.
+#
+# O backup é criado na exclusão de conta, no caminho da requisição: os arquivos são copiados
+# crus (sem decodificar e recodificar o JSON) e só os que mudaram desde o último backup são
+# lidos. fontes.json guarda, por arquivo, a assinatura (mtime, tamanho, inode) da última
+# cópia e os hashes dos objetos correspondentes. O journal de eventos de um arquivo, se
+# houver, vira um objeto próprio ("journais" no snapshot), aplicado ao restaurar.
+BACKUP_PASTA = "data/backups"
+OBJETOS_PASTA = os.path.join(BACKUP_PASTA, "objetos")
+SNAPSHOTS_PASTA = os.path.join(BACKUP_PASTA, "snapshots")
+FONTES_ARQUIVO = os.path.join(BACKUP_PASTA, "fontes.json")
+ARQUIVOS = (USUARIO_ARQUIVO, CURSO_ARQUIVO, ACESSO_ARQUIVO, AVALIACOES_ARQUIVO)
+
+# Retenção: mantém os N backups mais recentes e o mais recente de cada uma das últimas N horas
+# e dos últimos N dias.
+RETENCAO_RECENTES = int(os.environ.get("SISTEMA_BACKUP_RECENTES", "10"))
+RETENCAO_HORARIA = int(os.environ.get("SISTEMA_BACKUP_HORARIOS", "24"))
+RETENCAO_DIARIA = int(os.environ.get("SISTEMA_BACKUP_DIARIOS", "30"))
+
+def _caminho_objeto(hash_conteudo):
+    return os.path.join(OBJETOS_PASTA, hash_conteudo[:2], hash_conteudo + ".gz")
+
+def _gravar_atomico(arquivo, conteudo):
+    temporario = travas.temporario(arquivo)
+    with open(temporario, "wb") as f:
+        f.write(conteudo)
+    os.replace(temporario, arquivo)
+
+def _gravar_objeto(conteudo):
+    hash_conteudo = hashlib.sha256(conteudo).hexdigest()
+    caminho = _caminho_objeto(hash_conteudo)
+    if not os.path.exists(caminho):
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        # Nível 1: no caminho da exclusão de conta, a velocidade vale mais que a taxa de compressão.
+        _gravar_atomico(caminho, gzip.compress(conteudo, compresslevel=1))
+    return hash_conteudo
+
+def _ler_objeto(hash_conteudo):
+    with open(_caminho_objeto(hash_conteudo), "rb") as f:
+        return gzip.decompress(f.read())
+
+def _ler_fontes():
+    try:
+        with open(FONTES_ARQUIVO, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return {}
+
+def _objetos_existem(fonte):
+    return all(os.path.exists(_caminho_objeto(h)) for h in (fonte.get("arquivo"), fonte.get("journal")) if h)
+
+def _copiar(arquivo, anterior):
+    assinatura, conteudo, journal = copia_bruta(arquivo, anterior.get("assinatura"))
+    if conteudo is None:
+        if _objetos_existem(anterior):
+            return anterior
+        # Objeto apagado fora da retenção: copia de novo.
+        assinatura, conteudo, journal = copia_bruta(arquivo)
+    return {
+        "assinatura": assinatura,
+        "arquivo": _gravar_objeto(conteudo),
+        "journal": _gravar_objeto(journal) if journal else None,
+    }
+
+def listar_backups():
+    # Lista de (identificador, snapshot), do mais antigo para o mais recente.
+    try:
+        nomes = sorted(n for n in os.listdir(SNAPSHOTS_PASTA) if n.endswith(".json"))
+    except FileNotFoundError:
+        return []
+    backups = []
+    for nome in nomes:
+        try:
+            with open(os.path.join(SNAPSHOTS_PASTA, nome), "r", encoding="utf-8") as f:
+                backups.append((nome[:-len(".json")], json.load(f)))
+        except (json.JSONDecodeError, IOError):
+            continue
+    return backups
+
+def criar_backup(motivo=""):
+    # Retorna o identificador do novo backup, ou None se os dados não mudaram desde o último.
+    with travas.travar(BACKUP_PASTA):
+        fontes = _ler_fontes()
+        arquivos = {}
+        journais = {}
+        for arquivo in ARQUIVOS:
+            # Os dados vêm do backend em uso (JSON com journal ou SQLite), no formato dos arquivos.
+            fonte = fontes[arquivo] = _copiar(arquivo, fontes.get(arquivo, {}))
+            arquivos[arquivo] = fonte["arquivo"]
+            if fonte["journal"]:
+                journais[arquivo] = fonte["journal"]
+        os.makedirs(BACKUP_PASTA, exist_ok=True)
+        _gravar_atomico(FONTES_ARQUIVO, json.dumps(fontes, indent=4).encode("utf-8"))
+
+        backups = listar_backups()
+        if backups and backups[-1][1]["arquivos"] == arquivos and backups[-1][1].get("journais", {}) == journais:
+            return None
+
+        momento = datetime.now()
+        identificador = momento.strftime("%Y%m%dT%H%M%S%f")
+        snapshot = {"momento": momento.isoformat(timespec="seconds"), "motivo": motivo, "arquivos": arquivos}
+        if journais:
+            snapshot["journais"] = journais
+        os.makedirs(SNAPSHOTS_PASTA, exist_ok=True)
+        _gravar_atomico(os.path.join(SNAPSHOTS_PASTA, identificador + ".json"), json.dumps(snapshot, indent=4).encode("utf-8"))
+        aplicar_retencao()
+        return identificador
+
+def aplicar_retencao(recentes=RETENCAO_RECENTES, horarios=RETENCAO_HORARIA, diarios=RETENCAO_DIARIA):
+    with travas.travar(BACKUP_PASTA):
+        backups = listar_backups()
+        manter = {identificador for identificador, _ in backups[-max(recentes, 1):]}
+        for tamanho_chave, limite in ((13, horarios), (10, diarios)):
+            # Do mais recente para o mais antigo: o primeiro de cada hora/dia é o que fica.
+            periodos = []
+            for identificador, snapshot in reversed(backups):
+                periodo = snapshot["momento"][:tamanho_chave]
+                if periodo not in periodos:
+                    if len(periodos) == limite:
+                        break
+                    periodos.append(periodo)
+                    manter.add(identificador)
+
+        removidos = 0
+        for identificador, _ in backups:
+            if identificador not in manter:
+                os.remove(os.path.join(SNAPSHOTS_PASTA, identificador + ".json"))
+                removidos += 1
+
+        # Objetos que nenhum backup restante usa são apagados.
+        usados = {
+            h for identificador, s in backups if identificador in manter
+            for h in list(s["arquivos"].values()) + list(s.get("journais", {}).values())
+        }
+        if os.path.isdir(OBJETOS_PASTA):
+            for raiz, _, nomes in os.walk(OBJETOS_PASTA):
+                for nome in nomes:
+                    if nome.endswith(".gz") and nome[:-len(".gz")] not in usados:
+                        os.remove(os.path.join(raiz, nome))
+        return removidos
+
+def restaurar(identificador, arquivos=None):
+    backups = dict(listar_backups())
+    if identificador not in backups:
+        raise ValueError(f"Backup '{identificador}' não encontrado.")
+    snapshot = backups[identificador]
+    arquivos = arquivos or list(snapshot["arquivos"])
+
+    # Os agregados das estatísticas e o índice da busca são refeitos a partir dos dados restaurados.
+    with agregados.travar(), busca.travar():
+        for arquivo in arquivos:
+            dados = json.loads(_ler_objeto(snapshot["arquivos"][arquivo]))
+            journal = snapshot.get("journais", {}).get(arquivo)
+            if journal:
+                armazenamento_json.aplicar_journal_bruto(arquivo, dados, _ler_objeto(journal))
+            salvar_dados(arquivo, dados)
+        agregados.reconstruir()
+        if CURSO_ARQUIVO in arquivos:
+            busca.reconstruir()
+    return arquivos
+
+def main():
+    parser = argparse.ArgumentParser(description="Backups dos arquivos de dados.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    criar = comandos.add_parser("criar", help="Cria um backup (se os dados mudaram).")
+    criar.add_argument("--motivo", default="manual")
+    comandos.add_parser("listar", help="Lista os backups existentes.")
+    restaurar_cmd = comandos.add_parser("restaurar", help="Restaura um backup.")
+    restaurar_cmd.add_argument("identificador", help="Identificador do backup (ou 'ultimo').")
+    restaurar_cmd.add_argument("--arquivo", action="append", choices=ARQUIVOS, help="Restaura só este arquivo.")
+    comandos.add_parser("limpar", help="Aplica a política de retenção.")
+    args = parser.parse_args()
+
+    if args.comando == "criar":
+        identificador = criar_backup(args.motivo)
+        print(f"Backup criado: {identificador}" if identificador else "Dados sem alterações desde o último backup.")
+    elif args.comando == "listar":
+        backups = listar_backups()
+        if not backups:
+            print("Nenhum backup encontrado.")
+        for identificador, snapshot in backups:
+            print(f"{identificador}  {snapshot['momento']}  {snapshot.get('motivo', '')}")
+    elif args.comando == "restaurar":
+        identificador = args.identificador
+        if identificador == "ultimo":
+            backups = listar_backups()
+            if not backups:
+                print("Nenhum backup encontrado.")
+                return
+            identificador = backups[-1][0]
+        try:
+            restaurados = restaurar(identificador, args.arquivo)
+        except ValueError as erro:
+            print(erro)
+            return
+        print(f"Backup {identificador} restaurado: {', '.join(restaurados)}")
+    elif args.comando == "limpar":
+        print(f"Backups removidos: {aplicar_retencao()}")
+
+if __name__ == "__main__":
+    main()
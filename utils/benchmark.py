@@ -0,0 +1,234 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from utils import gerar_dados
+
+# Micro-benchmarks dos caminhos mais usados da camada de dados e das estatísticas. Os dados
+# são gerados (utils/gerar_dados.py) em uma pasta temporária, usada como diretório de trabalho,
+# com o backend de SISTEMA_BACKEND. Cada caso é repetido até REPETICOES vezes ou TEMPO_MAXIMO
+# segundos; o resultado traz operações por segundo, latências p50/p99 e o pico de memória
+# alocada por uma execução (tracemalloc), e é salvo em RESULTADOS_PASTA para comparação.
+RESULTADOS_PASTA = "benchmarks/resultados"
+REPETICOES = 200
+TEMPO_MAXIMO = 2.0
+# Aumento do p50 (em %) a partir do qual a comparação acusa regressão.
+LIMIAR_REGRESSAO = 20.0
+
+def _percentil(ordenados, p):
+    indice = min(len(ordenados) - 1, max(0, int(round(p / 100 * (len(ordenados) - 1)))))
+    return ordenados[indice]
+
+def medir(funcao, preparar=None, repeticoes=REPETICOES, tempo_maximo=TEMPO_MAXIMO):
+    # preparar() (fora da medição) devolve os argumentos de cada execução.
+    duracoes = []
+    limite = time.perf_counter() + tempo_maximo
+    while len(duracoes) < repeticoes and (len(duracoes) < 3 or time.perf_counter() < limite):
+        argumentos = preparar() if preparar else ()
+        inicio = time.perf_counter_ns()
+        funcao(*argumentos)
+        duracoes.append(time.perf_counter_ns() - inicio)
+
+    # Uma execução a mais, com o tracemalloc ligado, só para o pico de memória.
+    argumentos = preparar() if preparar else ()
+    tracemalloc.start()
+    try:
+        funcao(*argumentos)
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    duracoes.sort()
+    return {
+        "execucoes": len(duracoes),
+        "ops_s": round(len(duracoes) / (sum(duracoes) / 1e9), 2),
+        "p50_us": round(_percentil(duracoes, 50) / 1000, 2),
+        "p99_us": round(_percentil(duracoes, 99) / 1000, 2),
+        "pico_kb": round(pico / 1024, 1),
+    }
+
+def casos(usuarios, semente=42):
+    # Lista de (nome, funcao, preparar). Importado aqui: os módulos de dados só são carregados
+    # depois que o diretório de trabalho aponta para a massa gerada.
+    from utils import agregados, colunar, repositorio
+    from utils.repositorio import (
+        carregar_dados, salvar_dados, buscar_usuario, avaliacao_existe, registrar_acesso,
+        USUARIO_ARQUIVO, CURSO_ARQUIVO, ACESSO_ARQUIVO, AVALIACOES_ARQUIVO
+    )
+
+    rng = random.Random(semente)
+    lista_cursos = carregar_dados(CURSO_ARQUIVO)
+
+    def usuario_qualquer():
+        # Metade dos nomes existe, metade não (login com usuário errado).
+        indice = rng.randrange(usuarios * 2)
+        return (gerar_dados.nome_usuario(indice),)
+
+    def par_avaliacao():
+        curso = lista_cursos[rng.randrange(len(lista_cursos))]
+        return (gerar_dados.nome_usuario(rng.randrange(usuarios)), curso["nome"])
+
+    def novo_acesso():
+        curso = lista_cursos[rng.randrange(len(lista_cursos))]
+        return (
+            gerar_dados.nome_usuario(rng.randrange(usuarios)), curso["nome"], curso["nivel"],
+            round(rng.uniform(1, 300), 2), datetime.now().isoformat()
+        )
+
+    resultado = []
+    if repositorio.BACKEND == "json":
+        from utils.armazenamento_json import invalidar_cache
+
+        def sem_cache(arquivo):
+            # Leitura sem cache: o arquivo é lido e decodificado de novo.
+            def preparar():
+                invalidar_cache(arquivo)
+                return (arquivo,)
+            return preparar
+
+        for arquivo in (USUARIO_ARQUIVO, ACESSO_ARQUIVO):
+            nome = os.path.splitext(os.path.basename(arquivo))[0]
+            resultado.append((f"carregar_dados[{nome}] (frio)", carregar_dados, sem_cache(arquivo)))
+    for arquivo in (USUARIO_ARQUIVO, ACESSO_ARQUIVO, AVALIACOES_ARQUIVO):
+        nome = os.path.splitext(os.path.basename(arquivo))[0]
+        resultado.append((f"carregar_dados[{nome}]", carregar_dados, lambda arquivo=arquivo: (arquivo,)))
+
+    usuarios_salvos = carregar_dados(USUARIO_ARQUIVO)
+    resultado += [
+        ("salvar_dados[usuario]", salvar_dados, lambda: (USUARIO_ARQUIVO, usuarios_salvos)),
+        ("buscar_usuario (login)", buscar_usuario, usuario_qualquer),
+        ("avaliacao_existe", avaliacao_existe, par_avaliacao),
+        ("registrar_acesso (upsert)", registrar_acesso, novo_acesso),
+        # As mesmas consultas das telas de estatísticas (sem os gráficos).
+        ("estatisticas_usuarios", lambda: (
+            [f(agregados.serie("idades")) for f in (agregados.media, agregados.moda, agregados.mediana)],
+            dict(agregados.serie("generos")["frequencias"])
+        ), None),
+        ("estatisticas_acessos", lambda: [
+            f(agregados.serie(s)) for s in ("acessos_quantidade", "acessos_tempo") for f in (agregados.media, agregados.moda, agregados.mediana)
+        ], None),
+        ("estatisticas_avaliacoes", lambda: [
+            agregados.descrever_notas(a) for a in list(agregados.notas_por_curso().values()) + list(agregados.notas_por_nivel().values())
+        ], None),
+        ("colunas (resumo completo)", lambda: [
+            colunar.resumo(coluna) for nome, coluna in colunar.carregar_colunas().items() if nome in ("idades", "acessos_tempo", "notas")
+        ], None),
+        ("agregados.reconstruir", agregados.reconstruir, None),
+    ]
+    return resultado
+
+def executar(tamanho, cursos=21, repeticoes=REPETICOES, tempo_maximo=TEMPO_MAXIMO, dados=None, filtro=None):
+    # tamanho: quantidade de usuários e de acessos; as avaliações são a metade.
+    usuarios, acessos, avaliacoes = tamanho, tamanho, tamanho // 2
+    diretorio_original = os.getcwd()
+    trabalho = tempfile.mkdtemp(prefix="benchmark-")
+    try:
+        pasta_dados = os.path.join(trabalho, "data")
+        if dados:
+            shutil.copytree(dados, pasta_dados)
+        else:
+            print(f"Gerando dados: {usuarios} usuários, {cursos} cursos, {acessos} acessos, {avaliacoes} avaliações...")
+            gerar_dados.gerar(pasta_dados, usuarios, cursos, acessos, avaliacoes)
+        os.chdir(trabalho)
+
+        from utils import agregados, repositorio
+        repositorio.carregar_dados(repositorio.USUARIO_ARQUIVO)
+        agregados.preparar()
+
+        print(f"{'Caso':<36} {'ops/s':>12} {'p50 (us)':>12} {'p99 (us)':>12} {'pico (KB)':>10}")
+        resultados = {}
+        for nome, funcao, preparar in casos(usuarios):
+            if filtro and filtro not in nome:
+                continue
+            resultados[nome] = medir(funcao, preparar, repeticoes, tempo_maximo)
+            r = resultados[nome]
+            print(f"{nome:<36} {r['ops_s']:>12.1f} {r['p50_us']:>12.1f} {r['p99_us']:>12.1f} {r['pico_kb']:>10.1f}")
+        return {
+            "momento": datetime.now().isoformat(timespec="seconds"),
+            "backend": repositorio.BACKEND,
+            "tamanho": tamanho,
+            "cursos": cursos,
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "resultados": resultados,
+        }
+    finally:
+        os.chdir(diretorio_original)
+        shutil.rmtree(trabalho, ignore_errors=True)
+
+def salvar(execucao, pasta=RESULTADOS_PASTA):
+    os.makedirs(pasta, exist_ok=True)
+    nome = f"{execucao['momento'].replace(':', '').replace('-', '')}-{execucao['backend']}-{execucao['tamanho']}.json"
+    caminho = os.path.join(pasta, nome)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(execucao, f, indent=4, ensure_ascii=False)
+    return caminho
+
+def anterior(execucao, pasta=RESULTADOS_PASTA, ignorar=None):
+    # Resultado salvo mais recente com o mesmo backend e tamanho.
+    padrao = os.path.join(pasta, f"*-{execucao['backend']}-{execucao['tamanho']}.json")
+    for caminho in sorted(glob.glob(padrao), reverse=True):
+        if caminho != ignorar:
+            return caminho
+    return None
+
+def comparar(atual, base, limiar=LIMIAR_REGRESSAO):
+    # Lista de (nome, p50 base, p50 atual, variação %, regressão?).
+    linhas = []
+    for nome, resultado in atual["resultados"].items():
+        referencia = base["resultados"].get(nome)
+        if not referencia or not referencia["p50_us"]:
+            continue
+        variacao = (resultado["p50_us"] - referencia["p50_us"]) / referencia["p50_us"] * 100
+        linhas.append((nome, referencia["p50_us"], resultado["p50_us"], variacao, variacao > limiar))
+    return linhas
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks da camada de dados e das estatísticas.")
+    parser.add_argument("--tamanho", type=int, default=1000, help="Quantidade de usuários e de acessos (avaliações: metade).")
+    parser.add_argument("--cursos", type=int, default=21)
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES, help="Execuções máximas por caso.")
+    parser.add_argument("--tempo-maximo", type=float, default=TEMPO_MAXIMO, help="Segundos máximos por caso.")
+    parser.add_argument("--dados", help="Usa uma cópia desta pasta de dados em vez de gerar (ex.: saída de utils.gerar_dados).")
+    parser.add_argument("--caso", help="Executa só os casos cujo nome contém este texto.")
+    parser.add_argument("--comparar", help="Arquivo de resultado para comparar, ou 'anterior' (mesmo backend e tamanho).")
+    parser.add_argument("--limiar", type=float, default=LIMIAR_REGRESSAO, help="Aumento do p50 (%%) considerado regressão.")
+    parser.add_argument("--nao-salvar", action="store_true", help="Não grava o resultado em benchmarks/resultados.")
+    args = parser.parse_args()
+
+    execucao = executar(args.tamanho, args.cursos, args.repeticoes, args.tempo_maximo, args.dados, args.caso)
+
+    caminho = None
+    if not args.nao_salvar:
+        caminho = salvar(execucao)
+        print(f"\nResultado salvo em {caminho}")
+
+    if not args.comparar:
+        return
+    base_caminho = anterior(execucao, ignorar=caminho) if args.comparar == "anterior" else args.comparar
+    if not base_caminho or not os.path.exists(base_caminho):
+        print("Nenhum resultado anterior para comparar.")
+        return
+    with open(base_caminho, "r", encoding="utf-8") as f:
+        base = json.load(f)
+
+    print(f"\nComparação com {base_caminho} (p50):")
+    regressoes = 0
+    for nome, antes, depois, variacao, regressao in comparar(execucao, base, args.limiar):
+        regressoes += regressao
+        print(f"{nome:<36} {antes:>12.1f} {depois:>12.1f} {variacao:>+9.1f}%{'  REGRESSÃO' if regressao else ''}")
+    if regressoes:
+        print(f"\n{regressoes} caso(s) acima do limiar de {args.limiar:.0f}%.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import atexit
+import os
+import threading
+
+from utils.repositorio import registrar_acessos
+
+# Modo de durabilidade do buffer de acessos:
+#   "eventos" -> descarrega ao atingir LIMITE_EVENTOS acessos registrados;
+#   "tempo"   -> descarrega só pelo temporizador.
+# Em ambos os modos um acesso nunca fica mais que INTERVALO_DESCARGA segundos no buffer (o
+# temporizador é armado no primeiro acesso pendente), e o buffer também é descarregado no
+# logout e ao encerrar o sistema.
+MODO_DURABILIDADE = os.environ.get("SISTEMA_DURABILIDADE", "eventos")
+LIMITE_EVENTOS = int(os.environ.get("SISTEMA_LIMITE_EVENTOS", "20"))
+INTERVALO_DESCARGA = float(os.environ.get("SISTEMA_INTERVALO_DESCARGA", "5"))
+
+# (usuario, curso) -> acesso agregado ainda não gravado.
+_pendentes = {}
+_eventos_pendentes = 0
+_trava = threading.Lock()
+_temporizador = None
+
+def registrar_acesso(usuario, curso, nivel, tempo, timestamp):
+    global _eventos_pendentes
+
+    with _trava:
+        acesso = _pendentes.get((usuario, curso))
+        if acesso:
+            acesso["quantidade"] += 1
+            acesso["tempo"] += tempo
+            acesso["ultimo_acesso"] = timestamp
+        else:
+            _pendentes[(usuario, curso)] = {
+                "usuario": usuario,
+                "curso": curso,
+                "nivel": nivel,
+                "quantidade": 1,
+                "tempo": tempo,
+                "primeiro_acesso": timestamp,
+                "ultimo_acesso": timestamp
+            }
+        _eventos_pendentes += 1
+        atingiu_limite = MODO_DURABILIDADE == "eventos" and _eventos_pendentes >= LIMITE_EVENTOS
+
+    if atingiu_limite:
+        descarregar()
+    else:
+        _agendar_descarga()
+
+def _agendar_descarga():
+    global _temporizador
+
+    with _trava:
+        if _temporizador is not None:
+            return
+        _temporizador = threading.Timer(INTERVALO_DESCARGA, descarregar)
+        _temporizador.daemon = True
+        _temporizador.start()
+
+def descarregar():
+    global _pendentes, _eventos_pendentes, _temporizador
+
+    with _trava:
+        lote = list(_pendentes.values())
+        _pendentes = {}
+        _eventos_pendentes = 0
+        if _temporizador is not None:
+            _temporizador.cancel()
+            _temporizador = None
+
+    if lote:
+        registrar_acessos(lote)
+
+def pendentes():
+    with _trava:
+        return _eventos_pendentes
+
+atexit.register(descarregar)
@@ -0,0 +1,359 @@
+import argparse
+import bisect
+import json
+import math
+import os
+import re
+import time
+import unicodedata
+from functools import lru_cache
+
+from utils import travas
+
+INDICE_ARQUIVO = "data/indice_busca.json"
+# Como nos agregados: cada alteração de curso só anexa ao journal as seções já analisadas do
+# curso (um JSON por linha); o índice completo é regravado apenas na compactação (periódica,
+# ao sair ou quando o journal passa de LIMITE_JOURNAL bytes).
+INDICE_JOURNAL = "data/indice_busca.jsonl"
+LIMITE_JOURNAL = int(os.environ.get("SISTEMA_BUSCA_LIMITE_JOURNAL", str(1024 * 1024)))
+
+# Índice invertido da busca nos cursos: cada seção do conteúdo (o trecho antes do primeiro
+# "Módulo N" e cada módulo) é um documento, e cada termo aponta para os documentos em que
+# aparece, com a frequência. Os termos são normalizados sem acentos e em minúsculas, então
+# "modulo", "Módulo" e "MÓDULO" são o mesmo termo. O índice é mantido a cada alteração de
+# curso (só o curso alterado é processado de novo) e reconstruído se estiver ausente ou em
+# versão anterior.
+VERSAO = 2
+
+# Os termos do nome do curso contam como PESO_NOME ocorrências em cada seção do curso, e os
+# do título da seção ("Módulo 5: Segurança de Redes") valem PESO_TITULO ocorrências a mais.
+PESO_NOME = 1
+PESO_TITULO = 2
+# Parâmetros do BM25 (ranqueamento).
+BM25_K1 = 1.2
+BM25_B = 0.75
+TAMANHO_TRECHO = 160
+
+_SECAO = re.compile(r"^[ \t]*M[oó]dulo\s+\d+", re.IGNORECASE | re.MULTILINE)
+_PALAVRA = re.compile(r"\w+")
+_STOPWORDS = {
+    "a", "ao", "aos", "as", "com", "como", "da", "das", "de", "do", "dos", "e", "em", "na", "nas",
+    "no", "nos", "o", "os", "ou", "para", "pela", "pelas", "pelo", "pelos", "por", "que", "se",
+    "sem", "sua", "suas", "seu", "seus", "um", "uma", "umas", "uns", "mais", "ser", "sao", "sobre",
+}
+
+_estado = {"assinatura": None, "dados": None, "termos": None, "posicao": 0}
+
+def travar():
+    # Mantida durante a escrita do curso e a atualização do índice. Na restauração de backup
+    # ela é obtida depois da trava dos agregados; sempre antes das travas dos arquivos de dados.
+    return travas.travar(INDICE_ARQUIVO)
+
+@lru_cache(maxsize=None)
+def _normalizar_caractere(caractere):
+    # Sempre um caractere, para que as posições do texto normalizado valham no original.
+    sem_acento = "".join(c for c in unicodedata.normalize("NFKD", caractere) if not unicodedata.combining(c))
+    return sem_acento.lower()[:1] or caractere
+
+def normalizar(texto):
+    return "".join(_normalizar_caractere(c) for c in texto)
+
+def termos(texto):
+    return [t for t in _PALAVRA.findall(normalizar(texto)) if t not in _STOPWORDS and (len(t) > 1 or t.isdigit())]
+
+def secoes(conteudo):
+    # Lista de (titulo, inicio, fim) com as posições de cada seção no conteúdo.
+    inicios = [0] + [m.start() for m in _SECAO.finditer(conteudo) if m.start() > 0]
+    resultado = []
+    for inicio, fim in zip(inicios, inicios[1:] + [len(conteudo)]):
+        trecho = conteudo[inicio:fim].strip()
+        if not trecho:
+            continue
+        resultado.append((trecho.split("\n", 1)[0].strip(), inicio, fim))
+    return resultado
+
+def _novo_indice():
+    return {"versao": VERSAO, "geracao": None, "proximo": 0, "documentos": {}, "termos": {}, "cursos": {}}
+
+def _analisar_curso(curso):
+    # Seções do curso como [titulo, inicio, fim, frequencias dos termos]; é o que vai para o
+    # journal, para que a reaplicação não precise ler e processar o conteúdo de novo.
+    conteudo = curso.get("conteudo") or ""
+    termos_nome = termos(curso["nome"])
+    analisadas = []
+    for titulo, inicio, fim in secoes(conteudo) or [(curso["nome"], 0, 0)]:
+        frequencias = {}
+        for termo in termos(conteudo[inicio:fim]):
+            frequencias[termo] = frequencias.get(termo, 0) + 1
+        for termo in termos_nome:
+            frequencias[termo] = frequencias.get(termo, 0) + PESO_NOME
+        for termo in termos(titulo):
+            frequencias[termo] = frequencias.get(termo, 0) + PESO_TITULO
+        analisadas.append([titulo, inicio, fim, frequencias])
+    return analisadas
+
+def _inserir_curso(dados, nome, nivel, analisadas):
+    ids = []
+    for numero, (titulo, inicio, fim, frequencias) in enumerate(analisadas):
+        identificador = str(dados["proximo"])
+        dados["proximo"] += 1
+        dados["documentos"][identificador] = {
+            "curso": nome, "nivel": nivel, "secao": numero, "titulo": titulo,
+            "inicio": inicio, "fim": fim, "tamanho": sum(frequencias.values()), "termos": list(frequencias)
+        }
+        for termo, frequencia in frequencias.items():
+            dados["termos"].setdefault(termo, {})[identificador] = frequencia
+        ids.append(identificador)
+    dados["cursos"][nome] = ids
+
+def _indexar_curso(dados, curso):
+    _inserir_curso(dados, curso["nome"], curso.get("nivel"), _analisar_curso(curso))
+
+def _desindexar_curso(dados, nome):
+    for identificador in dados["cursos"].pop(nome, []):
+        documento = dados["documentos"].pop(identificador, None)
+        if documento is None:
+            continue
+        # Só os termos do próprio documento precisam ser visitados.
+        for termo in documento["termos"]:
+            postagens = dados["termos"].get(termo)
+            if postagens is not None:
+                postagens.pop(identificador, None)
+                if not postagens:
+                    del dados["termos"][termo]
+
+# Operações gravadas no journal: ["-", nome] e ["+", nome, nivel, seções analisadas].
+def _aplicar(dados, operacoes):
+    for operacao in operacoes:
+        if operacao[0] == "-":
+            _desindexar_curso(dados, operacao[1])
+        elif operacao[0] == "+":
+            _inserir_curso(dados, operacao[1], operacao[2], operacao[3])
+    _estado["termos"] = None
+
+def reconstruir():
+    from utils.repositorio import listar_cursos, carregar_conteudo
+
+    dados = _novo_indice()
+    for curso in listar_cursos():
+        _indexar_curso(dados, dict(curso, conteudo=carregar_conteudo(curso)))
+    with travar():
+        _salvar(dados)
+    return dados
+
+def _assinatura():
+    try:
+        st = os.stat(INDICE_ARQUIVO)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def _tamanho_journal():
+    try:
+        return os.path.getsize(INDICE_JOURNAL)
+    except OSError:
+        return 0
+
+def _aplicar_journal(dados):
+    # Só contam as linhas da geração do índice gravado (ver agregados._aplicar_journal).
+    try:
+        with open(INDICE_JOURNAL, "rb") as f:
+            f.seek(_estado["posicao"])
+            for linha in f:
+                if not linha.endswith(b"\n"):
+                    break
+                _estado["posicao"] += len(linha)
+                try:
+                    registro = json.loads(linha)
+                    if registro["geracao"] == dados["geracao"]:
+                        _aplicar(dados, registro["operacoes"])
+                except (ValueError, KeyError, TypeError, IndexError):
+                    continue
+    except FileNotFoundError:
+        _estado["posicao"] = 0
+
+def _carregar():
+    # Chamado com a trava do índice.
+    assinatura = _assinatura()
+    if assinatura is None:
+        return reconstruir()
+    if _estado["assinatura"] != assinatura or _tamanho_journal() < _estado["posicao"]:
+        try:
+            with open(INDICE_ARQUIVO, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+            if dados.get("versao") != VERSAO or dados.get("geracao") is None:
+                return reconstruir()
+        except (json.JSONDecodeError, IOError):
+            return reconstruir()
+
+        _estado["assinatura"] = assinatura
+        _estado["dados"] = dados
+        _estado["termos"] = None
+        _estado["posicao"] = 0
+    _aplicar_journal(_estado["dados"])
+    return _estado["dados"]
+
+def _salvar(dados):
+    # Compactação: grava o índice completo, com uma nova geração, e esvazia o journal.
+    dados["geracao"] = time.time_ns()
+    temporario = travas.temporario(INDICE_ARQUIVO)
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False)
+    os.replace(temporario, INDICE_ARQUIVO)
+    open(INDICE_JOURNAL, "w").close()
+
+    _estado["assinatura"] = _assinatura()
+    _estado["dados"] = dados
+    _estado["termos"] = None
+    _estado["posicao"] = 0
+
+def compactar():
+    with travar():
+        if _tamanho_journal():
+            _salvar(_carregar())
+
+def preparar():
+    # Como em agregados.preparar: o índice deve existir antes da escrita do curso, senão a
+    # reconstrução feita depois dela já incluiria a alteração.
+    with travar():
+        _carregar()
+
+def _atualizar(operacoes):
+    with travar():
+        dados = _carregar()
+        linha = (json.dumps({"geracao": dados["geracao"], "operacoes": operacoes}, ensure_ascii=False) + "\n").encode("utf-8")
+        with open(INDICE_JOURNAL, "ab") as f:
+            inicio = f.tell()
+            if inicio != _estado["posicao"]:
+                # Linha incompleta de um processo que caiu: é isolada e ignorada.
+                linha = b"\n" + linha
+            f.write(linha)
+        if inicio == _estado["posicao"]:
+            _aplicar(dados, operacoes)
+            _estado["posicao"] += len(linha)
+        else:
+            _aplicar_journal(dados)
+        if _estado["posicao"] > LIMITE_JOURNAL:
+            _salvar(dados)
+
+def _inclusao(curso):
+    return ["+", curso["nome"], curso.get("nivel"), _analisar_curso(curso)]
+
+def curso_inserido(curso):
+    _atualizar([_inclusao(curso)])
+
+def curso_alterado(nome_antigo, curso):
+    _atualizar([["-", nome_antigo], _inclusao(curso)])
+
+def curso_removido(nome):
+    _atualizar([["-", nome]])
+
+def _termos_ordenados(dados):
+    if _estado["termos"] is None or _estado["dados"] is not dados:
+        _estado["termos"] = sorted(dados["termos"])
+    return _estado["termos"]
+
+def _expandir(dados, termo):
+    # Termo exato; se não existir no índice, os termos que começam com ele ("program" ->
+    # "programacao", "programas"...).
+    if termo in dados["termos"]:
+        return [termo]
+    ordenados = _termos_ordenados(dados)
+    inicio = bisect.bisect_left(ordenados, termo)
+    expandidos = []
+    for candidato in ordenados[inicio:]:
+        if not candidato.startswith(termo):
+            break
+        expandidos.append(candidato)
+    return expandidos
+
+def _trecho(conteudo, documento, consultados):
+    secao = conteudo[documento["inicio"]:documento["fim"]]
+    normalizado = normalizar(secao)
+    posicao = -1
+    for termo in consultados:
+        m = re.search(r"\b" + re.escape(termo), normalizado)
+        if m and (posicao < 0 or m.start() < posicao):
+            posicao = m.start()
+    if posicao < 0:
+        posicao = 0
+    inicio = max(0, posicao - TAMANHO_TRECHO // 3)
+    trecho = " ".join(secao[inicio:inicio + TAMANHO_TRECHO].split())
+    if inicio > 0:
+        trecho = "..." + trecho
+    if inicio + TAMANHO_TRECHO < len(secao):
+        trecho += "..."
+    return trecho
+
+def buscar(consulta, limite=10):
+    # Lista de resultados ordenados por relevância (BM25), cada um com curso, nível, título da
+    # seção, pontuação e um trecho do conteúdo em volta do primeiro termo encontrado.
+    from utils.repositorio import carregar_conteudo
+
+    # A pontuação é feita com a trava do índice: as escritas de curso de outras sessões
+    # alteram o índice no lugar. Os conteúdos (trechos) são lidos depois, fora dela.
+    with travar():
+        melhores, consultados = _pontuar(_carregar(), consulta, limite)
+
+    conteudos = {}
+    resultados = []
+    for documento, pontuacao in melhores:
+        nome = documento["curso"]
+        if nome not in conteudos:
+            conteudos[nome] = carregar_conteudo({"nome": nome})
+        resultados.append({
+            "curso": nome,
+            "nivel": documento["nivel"],
+            "secao": documento["titulo"],
+            "pontuacao": round(pontuacao, 3),
+            "trecho": _trecho(conteudos[nome], documento, consultados),
+        })
+    return resultados
+
+def _pontuar(dados, consulta, limite):
+    # Devolve ([(cópia do documento, pontuação)], termos consultados), dos melhores ao piores.
+    documentos = dados["documentos"]
+    if not documentos:
+        return [], []
+    media_tamanho = sum(d["tamanho"] for d in documentos.values()) / len(documentos)
+
+    pontuacoes = {}
+    consultados = []
+    for termo in dict.fromkeys(termos(consulta)):
+        for expandido in _expandir(dados, termo):
+            consultados.append(expandido)
+            postagens = dados["termos"][expandido]
+            idf = math.log(1 + (len(documentos) - len(postagens) + 0.5) / (len(postagens) + 0.5))
+            for identificador, frequencia in postagens.items():
+                tamanho = documentos[identificador]["tamanho"]
+                peso = frequencia * (BM25_K1 + 1) / (
+                    frequencia + BM25_K1 * (1 - BM25_B + BM25_B * tamanho / media_tamanho)
+                )
+                pontuacoes[identificador] = pontuacoes.get(identificador, 0) + idf * peso
+
+    melhores = sorted(pontuacoes.items(), key=lambda item: item[1], reverse=True)[:limite]
+    return [(dict(documentos[identificador]), pontuacao) for identificador, pontuacao in melhores], consultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Busca nos nomes e conteúdos dos cursos.")
+    parser.add_argument("consulta", nargs="?", help="Termos da busca.")
+    parser.add_argument("--limite", type=int, default=10, help="Quantidade máxima de resultados.")
+    parser.add_argument("--reconstruir", action="store_true", help="Refaz o índice a partir dos cursos.")
+    args = parser.parse_args()
+
+    if args.reconstruir:
+        dados = reconstruir()
+        print(f"Índice reconstruído: {len(dados['documentos'])} seções, {len(dados['termos'])} termos.")
+    if not args.consulta:
+        return
+
+    inicio = time.perf_counter()
+    resultados = buscar(args.consulta, args.limite)
+    duracao = (time.perf_counter() - inicio) * 1000
+    print(f"{len(resultados)} resultado(s) em {duracao:.1f} ms\n")
+    for resultado in resultados:
+        print(f"{resultado['curso']} ({resultado['nivel']}) - {resultado['secao']} [{resultado['pontuacao']}]")
+        print(f"    {resultado['trecho']}\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import statistics
+from collections import Counter
+
+# Motor de estatísticas em colunas: cada campo (idades, acessos, tempos, notas) vira um
+# array NumPy e os cálculos são vetorizados. Sem NumPy, as mesmas funções usam listas e o
+# módulo statistics, com os mesmos resultados.
+
+# O NumPy só é importado no primeiro cálculo, para não pesar na inicialização do sistema.
+_numpy = []
+
+def _np():
+    if not _numpy:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy.append(numpy)
+    return _numpy[0]
+
+def para_coluna(valores):
+    np = _np()
+    valores = list(valores)
+    if np is None:
+        return valores
+    return np.asarray(valores)
+
+def _inteira(coluna):
+    np = _np()
+    return np is not None and isinstance(coluna, np.ndarray) and coluna.dtype.kind in "iub"
+
+def _escalar(valor):
+    return valor.item() if hasattr(valor, "item") else valor
+
+def carregar_colunas():
+    from utils.repositorio import carregar_dados, USUARIO_ARQUIVO, ACESSO_ARQUIVO, AVALIACOES_ARQUIVO
+
+    usuarios = carregar_dados(USUARIO_ARQUIVO)
+    acessos = carregar_dados(ACESSO_ARQUIVO)
+    avaliacoes = [av for av in carregar_dados(AVALIACOES_ARQUIVO) if av.get("nota") is not None]
+
+    return {
+        "idades": para_coluna(u["idade"] for u in usuarios if "idade" in u),
+        "generos": [u["genero"] for u in usuarios if "genero" in u],
+        "acessos_quantidade": para_coluna(a["quantidade"] for a in acessos if "quantidade" in a),
+        "acessos_tempo": para_coluna(a["tempo"] for a in acessos if "tempo" in a),
+        "notas": para_coluna(av["nota"] for av in avaliacoes),
+        "cursos_notas": [av.get("curso", "Desconhecido") for av in avaliacoes],
+        "niveis_notas": [av.get("nivel", "não especificado") for av in avaliacoes],
+    }
+
+def media(coluna):
+    np = _np()
+    if len(coluna) == 0:
+        return 0
+    if np is None or not isinstance(coluna, np.ndarray):
+        return statistics.mean(coluna)
+    if _inteira(coluna):
+        # Soma exata em inteiros, como statistics.mean: inteiro quando a divisão é exata.
+        soma = int(coluna.sum(dtype=np.int64))
+        quociente, resto = divmod(soma, len(coluna))
+        return quociente if resto == 0 else soma / len(coluna)
+    return float(np.mean(coluna))
+
+def mediana(coluna):
+    np = _np()
+    n = len(coluna)
+    if n == 0:
+        return 0
+    if np is None or not isinstance(coluna, np.ndarray):
+        return statistics.median(coluna)
+    meio = n // 2
+    if n % 2:
+        return _escalar(np.partition(coluna, meio)[meio])
+    particionado = np.partition(coluna, [meio - 1, meio])
+    return (_escalar(particionado[meio - 1]) + _escalar(particionado[meio])) / 2
+
+def frequencias(coluna):
+    np = _np()
+    # Valor -> quantidade, na ordem da primeira ocorrência de cada valor.
+    if np is None or not isinstance(coluna, np.ndarray):
+        return dict(Counter(coluna))
+    if len(coluna) == 0:
+        return {}
+    valores, primeiros, contagens = np.unique(coluna, return_index=True, return_counts=True)
+    ordem = np.argsort(primeiros, kind="stable")
+    return {_escalar(valores[i]): int(contagens[i]) for i in ordem}
+
+def moda(coluna):
+    np = _np()
+    if len(coluna) == 0:
+        return 'Sem moda'
+    if np is None or not isinstance(coluna, np.ndarray):
+        return statistics.mode(coluna)
+    # Como statistics.mode: entre os valores mais frequentes, o que aparece primeiro.
+    valores, primeiros, contagens = np.unique(coluna, return_index=True, return_counts=True)
+    candidatos = np.flatnonzero(contagens == contagens.max())
+    return _escalar(valores[candidatos[np.argmin(primeiros[candidatos])]])
+
+def percentis(coluna, ps=(25, 50, 75, 90, 99)):
+    np = _np()
+    if len(coluna) == 0:
+        return {}
+    if np is None or not isinstance(coluna, np.ndarray):
+        ordenados = sorted(coluna)
+        resultado = {}
+        for p in ps:
+            # Interpolação linear entre as posições vizinhas (mesmo método padrão do NumPy).
+            posicao = (len(ordenados) - 1) * p / 100
+            inferior = int(posicao)
+            superior = min(inferior + 1, len(ordenados) - 1)
+            resultado[p] = ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+        return resultado
+    return {p: float(v) for p, v in zip(ps, np.percentile(coluna, ps))}
+
+def histograma(coluna, bins=10):
+    np = _np()
+    if len(coluna) == 0:
+        return [], []
+    if np is None or not isinstance(coluna, np.ndarray):
+        minimo, maximo = min(coluna), max(coluna)
+        if minimo == maximo:
+            minimo, maximo = minimo - 0.5, maximo + 0.5
+        largura = (maximo - minimo) / bins
+        contagens = [0] * bins
+        for valor in coluna:
+            contagens[min(int((valor - minimo) / largura), bins - 1)] += 1
+        return contagens, [minimo + largura * i for i in range(bins + 1)]
+    contagens, bordas = np.histogram(coluna, bins=bins)
+    return contagens.tolist(), bordas.tolist()
+
+def resumo(coluna):
+    return {
+        "quantidade": len(coluna),
+        "media": media(coluna),
+        "mediana": mediana(coluna),
+        "moda": moda(coluna),
+        "percentis": percentis(coluna),
+    }
+
+def agrupar_por_curso(cursos, notas):
+    np = _np()
+    # curso -> contagem, soma, mínima e máxima das notas, na ordem da primeira avaliação.
+    if np is None or not isinstance(notas, np.ndarray):
+        grupos = {}
+        for curso, nota in zip(cursos, notas):
+            grupo = grupos.get(curso)
+            if grupo is None:
+                grupos[curso] = {"contagem": 1, "soma": nota, "minima": nota, "maxima": nota}
+            else:
+                grupo["contagem"] += 1
+                grupo["soma"] += nota
+                grupo["minima"] = min(grupo["minima"], nota)
+                grupo["maxima"] = max(grupo["maxima"], nota)
+        return grupos
+
+    if len(notas) == 0:
+        return {}
+    nomes, primeiros, codigos = np.unique(np.asarray(cursos, dtype=object), return_index=True, return_inverse=True)
+    contagens = np.bincount(codigos, minlength=len(nomes))
+    somas = np.bincount(codigos, weights=notas, minlength=len(nomes))
+    # Notas ordenadas por curso: mínimo e máximo de cada grupo com reduceat.
+    ordem = np.argsort(codigos, kind="stable")
+    inicios = np.concatenate(([0], np.cumsum(contagens)[:-1]))
+    minimas = np.minimum.reduceat(notas[ordem], inicios)
+    maximas = np.maximum.reduceat(notas[ordem], inicios)
+
+    grupos = {}
+    for i in np.argsort(primeiros, kind="stable"):
+        soma = somas[i]
+        grupos[nomes[i]] = {
+            "contagem": int(contagens[i]),
+            "soma": int(soma) if _inteira(notas) else float(soma),
+            "minima": _escalar(minimas[i]),
+            "maxima": _escalar(maximas[i]),
+        }
+    return grupos
+
+def contar_notas(grupos, notas, minima=1, maxima=5):
+    # grupo -> quantidade de cada nota inteira entre minima e maxima.
+    np = _np()
+    faixa = maxima - minima + 1
+    if np is None or not isinstance(notas, np.ndarray):
+        contagens = {}
+        for grupo, nota in zip(grupos, notas):
+            if minima <= nota <= maxima:
+                contagens.setdefault(grupo, [0] * faixa)[int(nota) - minima] += 1
+        return contagens
+
+    if len(notas) == 0:
+        return {}
+    nomes, codigos = np.unique(np.asarray(grupos, dtype=object), return_inverse=True)
+    validas = (notas >= minima) & (notas <= maxima)
+    posicoes = codigos[validas] * faixa + (notas[validas].astype(np.int64) - minima)
+    tabela = np.bincount(posicoes, minlength=len(nomes) * faixa).reshape(len(nomes), faixa)
+    return {nomes[i]: tabela[i].tolist() for i in range(len(nomes)) if tabela[i].any()}
@@ -1,24 +1,22 @@
-import json
-import statistics
-import matplotlib.pyplot as plt
+from utils import agregados, metricas, sessao
+from utils.buffer_acessos import descarregar as descarregar_acessos
 
-def carregar_dados(arquivo):
-    with open(arquivo, 'r', encoding='utf-8') as f:
-        return json.load(f)
+def _plt():
+    # O matplotlib demora a carregar; só é importado quando um gráfico é gerado.
+    import matplotlib.pyplot as plt
+    return plt
 
-def calcular_media(valores):
-    return statistics.mean(valores) if valores else 0
-
-def calcular_moda(valores):
-    try:
-        return statistics.mode(valores)
-    except statistics.StatisticsError:
-        return 'Sem moda'
-
-def calcular_mediana(valores):
-    return statistics.median(valores) if valores else 0
+def _graficos_disponiveis():
+    # Sessões remotas (modo servidor) não têm onde exibir janelas.
+    if sessao.em_sessao():
+        print("Gráfico não exibido em sessão remota (use python -m utils.relatorio).")
+        return False
+    return True
 
 def gerar_grafico(valores, titulo, xlabel):
+    if not _graficos_disponiveis():
+        return
+    plt = _plt()
     plt.figure(figsize=(8, 5))
     plt.hist(valores, bins=10, color='skyblue', edgecolor='black')
     plt.title(titulo)
@@ -26,10 +24,21 @@ def gerar_grafico(valores, titulo, xlabel):
     plt.ylabel('Frequência')
     plt.show()
 
+def gerar_grafico_frequencias(frequencias, titulo, xlabel):
+    if not _graficos_disponiveis():
+        return
+    plt = _plt()
+    plt.figure(figsize=(8, 5))
+    plt.hist(list(frequencias.keys()), weights=list(frequencias.values()), bins=10, color='skyblue', edgecolor='black')
+    plt.title(titulo)
+    plt.xlabel(xlabel)
+    plt.ylabel('Frequência')
+    plt.show()
+
 def gerar_estatisticas_usuarios():
-    usuarios = carregar_dados('data/usuario.json')
-    idades = [user['idade'] for user in usuarios if 'idade' in user]
-    generos = [user['genero'] for user in usuarios if 'genero' in user]
+    with metricas.medir("estatisticas", "usuarios"):
+        idades = agregados.serie("idades")
+        generos = agregados.serie("generos")
 
     while True:
         print("\n=== Menu Estatísticas Usuário")
@@ -40,33 +49,35 @@ def gerar_estatisticas_usuarios():
         escolha = input("Escolha uma opção entre (1-3): ").strip()
 
         if escolha == '1':
-            if not idades:
+            if not idades["contagem"]:
                 print("Não há estatísticas de idades para exibir.")
             else:
-                media_idade = calcular_media(idades)
-                moda_idade = calcular_moda(idades)
-                mediana_idade = calcular_mediana(idades)
+                with metricas.medir("estatisticas", "idades"):
+                    media_idade = agregados.media(idades)
+                    moda_idade = agregados.moda(idades)
+                    mediana_idade = agregados.mediana(idades)
                 print(f'Média das idades: {media_idade}')
                 print(f'Moda das idades: {moda_idade}')
                 print(f'Mediana das idades: {mediana_idade}')
-                gerar_grafico(idades, 'Distribuição de Idades', 'Idade')
+                gerar_grafico_frequencias(idades["frequencias"], 'Distribuição de Idades', 'Idade')
 
         elif escolha == '2':
-            if not generos:
+            if not generos["contagem"]:
                 print("Não há estatísticas de gênero para exibir.")
             else:
-                from collections import Counter
-                contagem_generos = Counter(generos)
+                contagem_generos = generos["frequencias"]
                 print("Contagem de gêneros:")
                 for genero, quantidade in contagem_generos.items():
                  print(f"  {genero.capitalize()}: {quantidade}")
 
-                plt.figure(figsize=(6,4))
-                plt.bar(contagem_generos.keys(), contagem_generos.values(), color='lightgreen', edgecolor='black')
-                plt.title('Distribuição de Gênero')
-                plt.xlabel('Gênero')
-                plt.ylabel('Quantidade')
-                plt.show()
+                if _graficos_disponiveis():
+                    plt = _plt()
+                    plt.figure(figsize=(6,4))
+                    plt.bar(contagem_generos.keys(), contagem_generos.values(), color='lightgreen', edgecolor='black')
+                    plt.title('Distribuição de Gênero')
+                    plt.xlabel('Gênero')
+                    plt.ylabel('Quantidade')
+                    plt.show()
 
         elif escolha == '3':
             print("Saindo das estatísticas de usuários.")
@@ -75,11 +86,12 @@ def gerar_estatisticas_usuarios():
             print("Opção inválida, tente novamente.")
 
 def gerar_estatisticas_acessos():
-    acessos = carregar_dados('data/acessos.json')
-    num_acessos = [acesso['quantidade'] for acesso in acessos if 'quantidade' in acesso]
-    tempos = [acesso['tempo'] for acesso in acessos if 'tempo' in acesso]
+    with metricas.medir("estatisticas", "acessos"):
+        descarregar_acessos()
+        num_acessos = agregados.serie("acessos_quantidade")
+        tempos = agregados.serie("acessos_tempo")
 
-    if not num_acessos and not tempos:
+    if not num_acessos["contagem"] and not tempos["contagem"]:
         print("Não há estatísticas de acessos para exibir.")
         return
 
@@ -91,28 +103,30 @@ def gerar_estatisticas_acessos():
         escolha = input("Escolha uma opção entre (1-3): ").strip()
 
         if escolha == '1':
-            if not num_acessos:
+            if not num_acessos["contagem"]:
                 print("Não há dados de número de acessos para exibir.")
             else:
-                media_acessos = calcular_media(num_acessos)
-                moda_acessos = calcular_moda(num_acessos)
-                mediana_acessos = calcular_mediana(num_acessos)
+                with metricas.medir("estatisticas", "numero_acessos"):
+                    media_acessos = agregados.media(num_acessos)
+                    moda_acessos = agregados.moda(num_acessos)
+                    mediana_acessos = agregados.mediana(num_acessos)
                 print(f'Média de acessos: {media_acessos}')
                 print(f'Moda de acessos: {moda_acessos}')
                 print(f'Mediana de acessos: {mediana_acessos}')
-                gerar_grafico(num_acessos, 'Número de Acessos', 'Quantidade')
+                gerar_grafico_frequencias(num_acessos["frequencias"], 'Número de Acessos', 'Quantidade')
 
         elif escolha == '2':
-            if not tempos:
+            if not tempos["contagem"]:
                 print("Não há dados de tempo de acesso para exibir.")
             else:
-                media_tempo = calcular_media(tempos)
-                moda_tempo = calcular_moda(tempos)
-                mediana_tempo = calcular_mediana(tempos)
+                with metricas.medir("estatisticas", "tempo_acesso"):
+                    media_tempo = agregados.media(tempos)
+                    moda_tempo = agregados.moda(tempos)
+                    mediana_tempo = agregados.mediana(tempos)
                 print(f'Média do tempo de acesso: {media_tempo}')
                 print(f'Moda do tempo de acesso: {moda_tempo}')
                 print(f'Mediana do tempo de acesso: {mediana_tempo}')
-                gerar_grafico(tempos, 'Tempo Médio de Uso', 'Tempo (minutos)')
+                gerar_grafico_frequencias(tempos["frequencias"], 'Tempo Médio de Uso', 'Tempo (minutos)')
 
         elif escolha == '3':
             print("Saindo das estatísticas de acessos.")
@@ -120,40 +134,44 @@ def gerar_estatisticas_acessos():
         else:
             print("Opção inválida, tente novamente.")
 
-def gerar_estatisticas_avaliacoes():
-    avaliacoes = carregar_dados('data/avaliacoes.json')
-    if not avaliacoes:
-        print("Não há avaliações para exibir estatísticas.")
-        return
-
-    # Agrupar avaliações por curso
-    avaliacoes_por_curso = {}
-    for av in avaliacoes:
-        curso = av.get("curso", "Desconhecido")
-        nota = av.get("nota")
-        if nota is not None:
-            avaliacoes_por_curso.setdefault(curso, []).append(nota)
+def _distribuicao(notas):
+    return ", ".join(f"{nota}: {quantidade}" for nota, quantidade in enumerate(notas["histograma"], agregados.NOTA_MINIMA))
 
+def gerar_estatisticas_avaliacoes():
+    with metricas.medir("estatisticas", "avaliacoes"):
+        avaliacoes_por_curso = agregados.notas_por_curso()
+        avaliacoes_por_nivel = agregados.notas_por_nivel()
     if not avaliacoes_por_curso:
-        print("Nenhuma avaliação válida encontrada.")
+        print("Não há avaliações para exibir estatísticas.")
         return
 
     print("=== Estatísticas de Avaliações por Curso ===")
     medias = []
     cursos = []
     for curso, notas in avaliacoes_por_curso.items():
-        media = statistics.mean(notas)
-        maxima = max(notas)
-        minima = min(notas)
-        quantidade = len(notas)
+        media = notas["soma"] / notas["contagem"]
+        maxima = notas["maxima"]
+        minima = notas["minima"]
+        quantidade = notas["contagem"]
         cursos.append(curso)
         medias.append(media)
         print(f"Curso: {curso}")
         print(f"  Quantidade de avaliações: {quantidade}")
         print(f"  Média das notas: {media:.2f}")
         print(f"  Nota máxima: {maxima}")
-        print(f"  Nota mínima: {minima}\n")
+        print(f"  Nota mínima: {minima}")
+        print(f"  Distribuição (1 a 5): {_distribuicao(notas)}\n")
 
+    print("=== Avaliações por Nível ===")
+    for nivel, notas in avaliacoes_por_nivel.items():
+        print(f"Nível: {nivel}")
+        print(f"  Quantidade de avaliações: {notas['contagem']}")
+        print(f"  Média das notas: {agregados.media_notas(notas):.2f}")
+        print(f"  Distribuição (1 a 5): {_distribuicao(notas)}\n")
+
+    if not _graficos_disponiveis():
+        return
+    plt = _plt()
     plt.figure(figsize=(10,6))
     plt.bar(cursos, medias, color='lightblue', edgecolor='black')
     plt.title('Média das Notas por Curso')
@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from utils.armazenamento_json import USUARIO_ARQUIVO, CURSO_ARQUIVO, ACESSO_ARQUIVO, AVALIACOES_ARQUIVO
+
+# Gerador de massa de dados sintética nos formatos de data/*.json, para testes de carga e
+# benchmarks. Os registros são gravados um a um (sem montar a lista em memória), então
+# também servem tamanhos grandes (milhões de linhas). A mesma semente gera os mesmos dados.
+NIVEIS = ("iniciante", "intermediário", "avançado")
+GENEROS = ("masculino", "feminino")
+TEMAS = (
+    "Lógica Computacional", "Infraestrutura", "Cibersegurança", "Tecnologia da Informação",
+    "Programação", "Segurança Digital", "Banco de Dados", "Redes", "Computação em Nuvem", "Análise de Dados",
+)
+PALAVRAS = (
+    "algoritmo", "dados", "rede", "segurança", "sistema", "servidor", "variável", "função", "estrutura",
+    "criptografia", "protocolo", "armazenamento", "usuário", "acesso", "lógica", "programação", "nuvem",
+    "monitoramento", "política", "informação", "processo", "módulo", "exemplo", "prático", "análise",
+)
+# Nota 1 a 5, com mais notas altas, como nos dados reais.
+PESOS_NOTAS = (5, 10, 25, 35, 25)
+DIAS_HISTORICO = 180
+
+_senha_padrao = []
+
+def _hash_senha_padrao():
+    # Um único hash bcrypt (da senha "senha123") é reutilizado por todos os usuários: calcular
+    # um hash por usuário levaria horas nos tamanhos maiores.
+    if not _senha_padrao:
+        from utils.senhas import hash_senha
+        _senha_padrao.append(hash_senha("senha123"))
+    return _senha_padrao[0]
+
+def _gravar_lista(caminho, registros):
+    # Uma lista JSON com um registro por linha; o arquivo é trocado só no fim.
+    temporario = caminho + ".tmp"
+    quantidade = 0
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write("[")
+        for registro in registros:
+            f.write(",\n" if quantidade else "\n")
+            f.write(json.dumps(registro, ensure_ascii=False))
+            quantidade += 1
+        f.write("\n]\n")
+    os.replace(temporario, caminho)
+    return quantidade
+
+def _momento(rng, agora):
+    return (agora - timedelta(seconds=rng.randrange(DIAS_HISTORICO * 86400))).isoformat()
+
+def nome_usuario(indice):
+    return f"usuario{indice:07d}"
+
+def gerar_cursos(quantidade, rng):
+    for i in range(quantidade):
+        nivel = NIVEIS[i % len(NIVEIS)]
+        tema = TEMAS[(i // len(NIVEIS)) % len(TEMAS)]
+        rodada = i // (len(NIVEIS) * len(TEMAS))
+        nome = f"{tema} {nivel.capitalize()}" + (f" {rodada + 1}" if rodada else "")
+        partes = ["Objetivo", "", f"Apresentar {tema.lower()} no nível {nivel}.", ""]
+        for modulo in range(1, 4):
+            partes.append(f"Módulo {modulo}: {rng.choice(PALAVRAS).capitalize()} e {rng.choice(PALAVRAS)}")
+            partes.append("")
+            partes.append(" ".join(rng.choice(PALAVRAS) for _ in range(60)).capitalize() + ".")
+            partes.append("")
+        yield {"nome": nome, "conteudo": "\n".join(partes).strip(), "nivel": nivel}
+
+def gerar_usuarios(quantidade, rng):
+    senha = _hash_senha_padrao()
+    for i in range(quantidade):
+        yield {
+            "usuario": nome_usuario(i),
+            "senha": senha,
+            "tipo": "usuario",
+            "genero": rng.choice(GENEROS),
+            "idade": max(10, min(80, int(rng.gauss(27, 9)))),
+        }
+
+def _pares(quantidade, usuarios, cursos):
+    # Pares (usuario, curso) sem repetição: a cada volta sobre os usuários, cada um recebe o
+    # próximo curso a partir de um deslocamento próprio (espalha os usuários entre os cursos).
+    for i in range(quantidade):
+        usuario = i % usuarios
+        deslocamento = (usuario * 7919) % len(cursos)
+        yield nome_usuario(usuario), cursos[(deslocamento + i // usuarios) % len(cursos)]
+
+def gerar_acessos(quantidade, usuarios, cursos, rng):
+    agora = datetime.now()
+    for usuario, curso in _pares(quantidade, usuarios, cursos):
+        acessos = 1 + int(rng.expovariate(0.3))
+        primeiro = _momento(rng, agora)
+        yield {
+            "usuario": usuario,
+            "curso": curso["nome"],
+            "nivel": curso["nivel"],
+            "quantidade": acessos,
+            "tempo": round(acessos * rng.expovariate(1 / 120), 2),
+            "primeiro_acesso": primeiro,
+            "ultimo_acesso": max(primeiro, _momento(rng, agora)),
+        }
+
+def gerar_avaliacoes(quantidade, usuarios, cursos, rng):
+    agora = datetime.now()
+    notas = rng.choices(range(1, 6), weights=PESOS_NOTAS, k=min(quantidade, 100000))
+    for i, (usuario, curso) in enumerate(_pares(quantidade, usuarios, cursos)):
+        yield {
+            "usuario": usuario,
+            "curso": curso["nome"],
+            "nivel": curso["nivel"],
+            "nota": notas[i % len(notas)],
+            "timestamp": _momento(rng, agora),
+        }
+
+def gerar(pasta, usuarios=1000, cursos=21, acessos=1000, avaliacoes=500, semente=42):
+    # Grava os quatro arquivos em "pasta" com os nomes usados pelo sistema. Cada usuário tem no
+    # máximo um acesso e uma avaliação por curso, então acessos e avaliações ficam limitados a
+    # usuarios * cursos.
+    limite = usuarios * cursos
+    if acessos > limite or avaliacoes > limite:
+        raise ValueError(f"Acessos e avaliações devem ser no máximo usuários x cursos ({limite}).")
+
+    rng = random.Random(semente)
+    os.makedirs(pasta, exist_ok=True)
+    lista_cursos = list(gerar_cursos(cursos, rng))
+    quantidades = {}
+    for arquivo, registros in (
+        (CURSO_ARQUIVO, lista_cursos),
+        (USUARIO_ARQUIVO, gerar_usuarios(usuarios, rng)),
+        (ACESSO_ARQUIVO, gerar_acessos(acessos, usuarios, lista_cursos, rng)),
+        (AVALIACOES_ARQUIVO, gerar_avaliacoes(avaliacoes, usuarios, lista_cursos, rng)),
+    ):
+        quantidades[arquivo] = _gravar_lista(os.path.join(pasta, os.path.basename(arquivo)), registros)
+    return quantidades
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera arquivos de dados sintéticos (usuários, cursos, acessos e avaliações).")
+    parser.add_argument("--pasta", default="benchmarks/dados", help="Pasta de destino dos arquivos JSON.")
+    parser.add_argument("--usuarios", type=int, default=1000)
+    parser.add_argument("--cursos", type=int, default=21)
+    parser.add_argument("--acessos", type=int, default=1000)
+    parser.add_argument("--avaliacoes", type=int, default=500)
+    parser.add_argument("--semente", type=int, default=42, help="Semente do gerador aleatório.")
+    parser.add_argument("--forcar", action="store_true", help="Permite gravar na pasta data/ do sistema.")
+    args = parser.parse_args()
+
+    if os.path.abspath(args.pasta) == os.path.abspath("data") and not args.forcar:
+        print("A pasta data/ contém os dados do sistema; use --forcar para substituí-los.")
+        return
+
+    inicio = time.perf_counter()
+    try:
+        quantidades = gerar(args.pasta, args.usuarios, args.cursos, args.acessos, args.avaliacoes, args.semente)
+    except ValueError as erro:
+        print(erro)
+        return
+    for arquivo, quantidade in quantidades.items():
+        print(f"{os.path.join(args.pasta, os.path.basename(arquivo))}: {quantidade} registros")
+    print(f"Dados gerados em {time.perf_counter() - inicio:.1f} s.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime
+
+from utils import travas
+
+# Configuração única dos logs do sistema: nome do logger -> arquivo de destino.
+ARQUIVOS_LOG = {
+    'app': "logs/logger_system.log",
+    'admin': "logs/logger_admin.log",
+    'lusuario': "logs/logger_user.log",
+}
+
+# Cada arquivo é rotacionado ao atingir LOG_TAMANHO_MAXIMO bytes, mantendo LOG_BACKUPS cópias.
+# Vários processos (sessões, servidor, simulador) gravam nos mesmos arquivos: ver _HandlerRotativo.
+LOG_TAMANHO_MAXIMO = int(os.environ.get("SISTEMA_LOG_MAX_BYTES", str(1024 * 1024)))
+LOG_BACKUPS = int(os.environ.get("SISTEMA_LOG_BACKUPS", "5"))
+
+# Atributos próprios do LogRecord; o que vier além deles (via extra=) vira campo do JSON.
+_ATRIBUTOS_PADRAO = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+_configurado = False
+_trava = threading.Lock()
+_ouvinte = None
+
+class FormatadorJSON(logging.Formatter):
+    # Uma linha JSON por registro: momento, nível, logger, mensagem e os campos do evento
+    # (evento, usuario, curso, duracao...).
+    def format(self, record):
+        registro = {
+            "momento": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+        }
+        for campo, valor in vars(record).items():
+            if campo not in _ATRIBUTOS_PADRAO:
+                registro.setdefault(campo, valor)
+        if record.exc_info:
+            registro["erro"] = self.formatException(record.exc_info)
+        return json.dumps(registro, ensure_ascii=False, default=str)
+
+class _HandlerRotativo(logging.handlers.RotatingFileHandler):
+    # Cada gravação (e a eventual rotação) é feita com a trava do arquivo de log (utils.travas),
+    # então só um processo rotaciona por vez e nenhum grava no meio da renomeação. Se outro
+    # processo já rotacionou, o arquivo aberto aqui virou a cópia .1: ele é fechado e o handler
+    # reabre o arquivo novo antes de gravar (o tamanho é medido no arquivo atual, em "a").
+    def emit(self, record):
+        try:
+            with travas.travar(self.baseFilename):
+                self._reabrir_se_rotacionado()
+                super().emit(record)
+        except Exception:
+            self.handleError(record)
+
+    def _reabrir_se_rotacionado(self):
+        if self.stream is None:
+            return
+        try:
+            atual = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            atual = None
+        aberto = os.fstat(self.stream.fileno())
+        if atual is None or (atual.st_dev, atual.st_ino) != (aberto.st_dev, aberto.st_ino):
+            self.stream.close()
+            self.stream = None
+
+class _HandlerFila(logging.handlers.QueueHandler):
+    # Como o QueueHandler padrão, mas o traceback vai para o campo "erro" em vez de ser
+    # anexado ao texto da mensagem.
+    def prepare(self, record):
+        registro = copy.copy(record)
+        registro.msg = registro.message = record.getMessage()
+        registro.args = None
+        if record.exc_info:
+            registro.erro = logging.Formatter().formatException(record.exc_info)
+        registro.exc_info = None
+        registro.exc_text = None
+        return registro
+
+def configurar_logs():
+    # As mensagens entram em uma fila (QueueHandler) e uma thread (QueueListener) grava os
+    # arquivos, fora da thread que atende o usuário.
+    global _configurado, _ouvinte
+
+    with _trava:
+        if _configurado:
+            return
+        formatador = FormatadorJSON()
+        handlers = []
+        for nome, arquivo in ARQUIVOS_LOG.items():
+            handler = _HandlerRotativo(
+                arquivo, maxBytes=LOG_TAMANHO_MAXIMO, backupCount=LOG_BACKUPS, encoding="utf-8", delay=True
+            )
+            handler.setFormatter(formatador)
+            handler.addFilter(logging.Filter(nome))
+            handlers.append(handler)
+
+        fila = queue.Queue(-1)
+        _ouvinte = logging.handlers.QueueListener(fila, *handlers)
+        _ouvinte.start()
+        atexit.register(encerrar_logs)
+
+        for nome in ARQUIVOS_LOG:
+            logger = logging.getLogger(nome)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(_HandlerFila(fila))
+        _configurado = True
+
+def encerrar_logs():
+    # Grava o que ainda está na fila; chamado ao sair do processo.
+    global _ouvinte
+
+    with _trava:
+        if _ouvinte is not None:
+            _ouvinte.stop()
+            _ouvinte = None
+
+def obter_logger(nome):
+    configurar_logs()
+    return logging.getLogger(nome)
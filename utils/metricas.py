@@ -0,0 +1,180 @@
+import atexit
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from utils import travas
+
+# Métricas dos caminhos mais usados (leitura e gravação dos dados, bcrypt, estatísticas):
+# contadores e histogramas de latência, exportados no formato texto do Prometheus em um
+# arquivo (coletor "textfile" do node_exporter) e, opcionalmente, em um endpoint HTTP local.
+# Desligadas por padrão: com SISTEMA_METRICAS desligado, cronometrar() devolve a própria
+# função (sem custo algum) e medir()/contar()/acompanhar() só testam ATIVO.
+ATIVO = os.environ.get("SISTEMA_METRICAS", "0") not in ("", "0")
+METRICAS_ARQUIVO = os.environ.get("SISTEMA_METRICAS_ARQUIVO", "logs/metricas.prom")
+METRICAS_PORTA = int(os.environ.get("SISTEMA_METRICAS_PORTA", "0"))
+METRICAS_HOST = os.environ.get("SISTEMA_METRICAS_HOST", "127.0.0.1")
+INTERVALO_GRAVACAO = float(os.environ.get("SISTEMA_METRICAS_INTERVALO", "15"))
+
+# Limites (em segundos) dos baldes dos histogramas.
+LIMITES = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_histogramas = {}
+_contadores = {}
+_trava = threading.Lock()
+_NULO = nullcontext()
+
+def registrar(operacao, duracao, alvo=""):
+    chave = (operacao, alvo)
+    balde = bisect.bisect_left(LIMITES, duracao)
+    with _trava:
+        histograma = _histogramas.get(chave)
+        if histograma is None:
+            histograma = _histogramas[chave] = {"baldes": [0] * (len(LIMITES) + 1), "soma": 0.0, "contagem": 0}
+        histograma["baldes"][balde] += 1
+        histograma["soma"] += duracao
+        histograma["contagem"] += 1
+
+def contar(nome, quantidade=1, **rotulos):
+    if not ATIVO:
+        return
+    chave = (nome, tuple(sorted(rotulos.items())))
+    with _trava:
+        _contadores[chave] = _contadores.get(chave, 0) + quantidade
+
+@contextmanager
+def _medir(operacao, alvo):
+    inicio = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        contar("erros", operacao=operacao, alvo=alvo)
+        raise
+    finally:
+        registrar(operacao, time.perf_counter() - inicio, alvo)
+
+def medir(operacao, alvo=""):
+    # Cronômetro para um trecho de código: with metricas.medir("estatisticas", "idades"): ...
+    if not ATIVO:
+        return _NULO
+    return _medir(operacao, alvo)
+
+def cronometrar(operacao, rotulo=None):
+    # Decorador. rotulo(*args, **kwargs) dá o alvo da chamada (ex.: o arquivo de dados).
+    def decorador(funcao):
+        if not ATIVO:
+            return funcao
+
+        # Sem o _medir (gerador) no caminho de cada chamada: só dois perf_counter e o registro.
+        @functools.wraps(funcao)
+        def cronometrada(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            except BaseException:
+                contar("erros", operacao=operacao, alvo=rotulo(*args, **kwargs) if rotulo else "")
+                raise
+            finally:
+                registrar(operacao, time.perf_counter() - inicio, rotulo(*args, **kwargs) if rotulo else "")
+        return cronometrada
+    return decorador
+
+def nome_arquivo(arquivo, *args, **kwargs):
+    return os.path.basename(arquivo)
+
+def acompanhar(operacao, futuro):
+    # Mede um Future do envio ao término (fila do pool + execução).
+    if ATIVO:
+        inicio = time.perf_counter()
+        futuro.add_done_callback(lambda f: registrar(operacao, time.perf_counter() - inicio))
+    return futuro
+
+def zerar():
+    with _trava:
+        _histogramas.clear()
+        _contadores.clear()
+
+def _rotulos(pares):
+    if not pares:
+        return ""
+    valores = (str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, v in pares)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pares, valores)) + "}"
+
+def texto():
+    with _trava:
+        histogramas = {chave: dict(h, baldes=list(h["baldes"])) for chave, h in _histogramas.items()}
+        contadores = dict(_contadores)
+
+    linhas = [
+        "# HELP sistema_operacao_segundos Duração das operações instrumentadas.",
+        "# TYPE sistema_operacao_segundos histogram",
+    ]
+    for (operacao, alvo), h in sorted(histogramas.items()):
+        base = [("operacao", operacao), ("alvo", alvo)]
+        acumulado = 0
+        for limite, quantidade in zip(LIMITES + (float("inf"),), h["baldes"]):
+            acumulado += quantidade
+            le = "+Inf" if limite == float("inf") else repr(limite)
+            linhas.append(f"sistema_operacao_segundos_bucket{_rotulos(base + [('le', le)])} {acumulado}")
+        linhas.append(f"sistema_operacao_segundos_sum{_rotulos(base)} {h['soma']:.6f}")
+        linhas.append(f"sistema_operacao_segundos_count{_rotulos(base)} {h['contagem']}")
+
+    for nome in sorted({nome for nome, _ in contadores}):
+        linhas.append(f"# TYPE sistema_{nome}_total counter")
+        for (chave, pares), valor in sorted(contadores.items()):
+            if chave == nome:
+                linhas.append(f"sistema_{nome}_total{_rotulos(list(pares))} {valor}")
+    return "\n".join(linhas) + "\n"
+
+def gravar(arquivo=METRICAS_ARQUIVO):
+    pasta = os.path.dirname(arquivo)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    temporario = travas.temporario(arquivo)
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(texto())
+    os.replace(temporario, arquivo)
+
+def servir(porta=METRICAS_PORTA, host=METRICAS_HOST):
+    # O http.server só é importado aqui, para não pesar na inicialização do sistema.
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Endpoint(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            corpo = texto().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, formato, *args):
+            # As requisições do coletor não vão para a saída dos menus.
+            pass
+
+    servidor = ThreadingHTTPServer((host, porta), Endpoint)
+    threading.Thread(target=servidor.serve_forever, name="metricas-http", daemon=True).start()
+    return servidor
+
+def iniciar(intervalo=INTERVALO_GRAVACAO):
+    # Chamado na inicialização do sistema e do servidor: grava o arquivo de métricas a cada
+    # "intervalo" segundos e na saída e, com SISTEMA_METRICAS_PORTA, abre o endpoint HTTP.
+    if not ATIVO:
+        return None
+
+    def executar():
+        while not parar.wait(intervalo):
+            gravar()
+
+    parar = threading.Event()
+    threading.Thread(target=executar, name="metricas-arquivo", daemon=True).start()
+    atexit.register(gravar)
+    if METRICAS_PORTA:
+        servir()
+    return parar
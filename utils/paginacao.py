@@ -0,0 +1,81 @@
+import os
+
+# Listagens paginadas dos menus. Cada listagem guarda uma "janela": o cursor da página atual
+# (a ordem do item anterior a ela) e o número da página. Só os itens da página são buscados,
+# com a função de página do repositório; avançar e voltar usam o cursor, e ir para uma página
+# qualquer usa a posição.
+TAMANHO_PAGINA = int(os.environ.get("SISTEMA_TAMANHO_PAGINA", "10"))
+
+def janela(buscar, contar, tamanho=TAMANHO_PAGINA):
+    # buscar(apos=, antes=, deslocamento=, limite=) devolve os itens (com "ordem") e contar()
+    # o total de itens da listagem.
+    return {"buscar": buscar, "contar": contar, "tamanho": tamanho, "pagina": 1, "apos": None}
+
+def _ir_para(estado, pagina):
+    itens = estado["buscar"](deslocamento=(pagina - 1) * estado["tamanho"], limite=estado["tamanho"])
+    estado["pagina"] = pagina
+    estado["apos"] = itens[0]["ordem"] - 1 if itens and pagina > 1 else None
+    return itens
+
+def pagina_atual(estado):
+    itens = estado["buscar"](apos=estado["apos"], limite=estado["tamanho"])
+    if not itens and estado["pagina"] > 1:
+        # Os itens da página foram excluídos: volta para a última página que existir.
+        paginas = max(1, -(-estado["contar"]() // estado["tamanho"]))
+        itens = _ir_para(estado, min(estado["pagina"], paginas))
+    return itens
+
+def _navegar(estado, itens, comando, paginas):
+    if comando == "p" and estado["pagina"] < paginas and itens:
+        estado["apos"] = itens[-1]["ordem"]
+        estado["pagina"] += 1
+    elif comando == "a" and estado["pagina"] > 1 and itens:
+        anteriores = estado["buscar"](antes=itens[0]["ordem"], limite=estado["tamanho"])
+        estado["pagina"] -= 1
+        if estado["pagina"] == 1 or not anteriores:
+            estado["pagina"], estado["apos"] = 1, None
+        else:
+            estado["apos"] = anteriores[0]["ordem"] - 1
+    elif comando.startswith("i") and comando[1:].strip().isdigit() and 1 <= int(comando[1:]) <= paginas:
+        _ir_para(estado, int(comando[1:]))
+    else:
+        return False
+    return True
+
+def escolher(estado, formatar, pergunta, voltar="Voltar", titulo=None):
+    # Mostra a página atual e repete até o usuário escolher um item (devolvido) ou a opção 0
+    # (devolve None). Os itens são numerados na listagem inteira, não só na página, e o número
+    # de um item de outra página também é aceito.
+    while True:
+        itens = pagina_atual(estado)
+        total = estado["contar"]()
+        paginas = max(1, -(-total // estado["tamanho"]))
+        primeiro = (estado["pagina"] - 1) * estado["tamanho"] + 1
+
+        if titulo:
+            print("===================================================")
+            print(" ")
+            print(titulo)
+            print(" ")
+            print("===================================================")
+        for numero, item in enumerate(itens, primeiro):
+            print(f"[{numero}] {formatar(item)}")
+        print(f"[0] {voltar}")
+        if paginas > 1:
+            print(f"Página {estado['pagina']} de {paginas} ({total} itens) - [P] Próxima  [A] Anterior  [I n] Ir para a página n")
+        print(" ")
+        print("===================================================")
+
+        escolha = input(pergunta).strip().lower()
+        if escolha == "0":
+            return None
+        if escolha.isdigit() and primeiro <= int(escolha) < primeiro + len(itens):
+            return itens[int(escolha) - primeiro]
+        if escolha.isdigit() and 1 <= int(escolha) <= total:
+            # Número de um item de outra página: busca só esse item.
+            item = estado["buscar"](deslocamento=int(escolha) - 1, limite=1)
+            if item:
+                return item[0]
+        if not escolha.isdigit() and _navegar(estado, itens, escolha, paginas):
+            continue
+        print("Opção inválida.\n")
@@ -0,0 +1,167 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from utils import agregados
+
+# Relatório não interativo: os gráficos das estatísticas são gravados em arquivos (PNG/SVG)
+# com o backend Agg do matplotlib, junto com um resumo em JSON. Cada gráfico é desenhado em
+# um processo separado e só é refeito quando o hash dos seus dados muda.
+PASTA_RELATORIO = "relatorios"
+RESUMO_ARQUIVO = "resumo.json"
+HASHES_ARQUIVO = ".hashes.json"
+FORMATOS = ("png", "svg")
+
+def _estatisticas_serie(serie):
+    return {
+        "quantidade": serie["contagem"],
+        "media": agregados.media(serie),
+        "moda": agregados.moda(serie),
+        "mediana": agregados.mediana(serie),
+    }
+
+def montar_graficos():
+    idades = agregados.serie("idades")
+    generos = agregados.serie("generos")
+    num_acessos = agregados.serie("acessos_quantidade")
+    tempos = agregados.serie("acessos_tempo")
+    notas = agregados.notas_por_curso()
+
+    graficos = [
+        {"nome": "idades", "tipo": "histograma", "titulo": "Distribuição de Idades", "xlabel": "Idade",
+         "ylabel": "Frequência", "dados": list(idades["frequencias"].items())},
+        {"nome": "generos", "tipo": "barras", "titulo": "Distribuição de Gênero", "xlabel": "Gênero",
+         "ylabel": "Quantidade", "dados": list(generos["frequencias"].items())},
+        {"nome": "acessos_quantidade", "tipo": "histograma", "titulo": "Número de Acessos", "xlabel": "Quantidade",
+         "ylabel": "Frequência", "dados": list(num_acessos["frequencias"].items())},
+        {"nome": "acessos_tempo", "tipo": "histograma", "titulo": "Tempo Médio de Uso", "xlabel": "Tempo (minutos)",
+         "ylabel": "Frequência", "dados": list(tempos["frequencias"].items())},
+        {"nome": "notas_cursos", "tipo": "barras", "titulo": "Média das Notas por Curso", "xlabel": "Curso",
+         "ylabel": "Média das Notas",
+         "dados": [(curso, n["soma"] / n["contagem"]) for curso, n in notas.items()]},
+    ]
+
+    resumo = {
+        "gerado_em": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "idades": _estatisticas_serie(idades),
+        "generos": dict(generos["frequencias"]),
+        "acessos_quantidade": _estatisticas_serie(num_acessos),
+        "acessos_tempo": _estatisticas_serie(tempos),
+        "avaliacoes": {
+            curso: {
+                "quantidade": n["contagem"],
+                "media": round(n["soma"] / n["contagem"], 2),
+                "maxima": n["maxima"],
+                "minima": n["minima"],
+                "histograma": n["histograma"],
+            }
+            for curso, n in notas.items()
+        },
+        "avaliacoes_niveis": {
+            nivel: {
+                "quantidade": n["contagem"],
+                "media": round(n["soma"] / n["contagem"], 2),
+                "histograma": n["histograma"],
+            }
+            for nivel, n in agregados.notas_por_nivel().items()
+        },
+    }
+    return graficos, resumo
+
+def hash_grafico(grafico, formatos):
+    conteudo = json.dumps([grafico, sorted(formatos)], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+def desenhar(grafico, pasta, formatos):
+    # Executado nos processos trabalhadores: o backend é escolhido antes de importar o pyplot.
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    rotulos = [rotulo for rotulo, _ in grafico["dados"]]
+    valores = [valor for _, valor in grafico["dados"]]
+
+    figura = plt.figure(figsize=(10, 6) if grafico["tipo"] == "barras" else (8, 5))
+    if not grafico["dados"]:
+        plt.text(0.5, 0.5, "Sem dados", ha="center", va="center")
+    elif grafico["tipo"] == "histograma":
+        plt.hist(rotulos, weights=valores, bins=10, color='skyblue', edgecolor='black')
+    else:
+        plt.bar([str(rotulo) for rotulo in rotulos], valores, color='lightblue', edgecolor='black')
+        plt.xticks(rotation=45, ha='right')
+    plt.title(grafico["titulo"])
+    plt.xlabel(grafico["xlabel"])
+    plt.ylabel(grafico["ylabel"])
+    plt.tight_layout()
+
+    arquivos = []
+    for formato in formatos:
+        arquivo = os.path.join(pasta, f"{grafico['nome']}.{formato}")
+        figura.savefig(arquivo, format=formato)
+        arquivos.append(arquivo)
+    plt.close(figura)
+    return arquivos
+
+def _ler_hashes(pasta):
+    try:
+        with open(os.path.join(pasta, HASHES_ARQUIVO), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return {}
+
+def _gravar_json(arquivo, dados):
+    temporario = arquivo + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(dados, f, indent=4, ensure_ascii=False)
+    os.replace(temporario, arquivo)
+
+def gerar_relatorio(pasta=PASTA_RELATORIO, formatos=FORMATOS, processos=None, forcar=False):
+    inicio = time.time()
+    os.makedirs(pasta, exist_ok=True)
+    graficos, resumo = montar_graficos()
+    hashes_anteriores = {} if forcar else _ler_hashes(pasta)
+
+    hashes = {}
+    pendentes = []
+    situacao = {}
+    for grafico in graficos:
+        hashes[grafico["nome"]] = hash_grafico(grafico, formatos)
+        arquivos = [os.path.join(pasta, f"{grafico['nome']}.{formato}") for formato in formatos]
+        if hashes_anteriores.get(grafico["nome"]) == hashes[grafico["nome"]] and all(os.path.exists(a) for a in arquivos):
+            situacao[grafico["nome"]] = {"arquivos": arquivos, "situacao": "inalterado"}
+        else:
+            pendentes.append(grafico)
+
+    if pendentes:
+        with ProcessPoolExecutor(max_workers=processos) as pool:
+            resultados = pool.map(desenhar, pendentes, [pasta] * len(pendentes), [formatos] * len(pendentes))
+            for grafico, arquivos in zip(pendentes, resultados):
+                situacao[grafico["nome"]] = {"arquivos": arquivos, "situacao": "gerado"}
+
+    resumo["graficos"] = {grafico["nome"]: situacao[grafico["nome"]] for grafico in graficos}
+    _gravar_json(os.path.join(pasta, RESUMO_ARQUIVO), resumo)
+    _gravar_json(os.path.join(pasta, HASHES_ARQUIVO), hashes)
+    return resumo, len(pendentes), time.time() - inicio
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera os gráficos das estatísticas em arquivos, sem interface gráfica.")
+    parser.add_argument("--saida", default=PASTA_RELATORIO, help="Pasta onde o relatório é gravado.")
+    parser.add_argument("--formatos", nargs="+", choices=FORMATOS, default=list(FORMATOS), help="Formatos das imagens.")
+    parser.add_argument("--processos", type=int, default=None, help="Processos usados para desenhar os gráficos.")
+    parser.add_argument("--forcar", action="store_true", help="Refaz todos os gráficos, mesmo sem alterações.")
+    args = parser.parse_args()
+
+    resumo, gerados, duracao = gerar_relatorio(args.saida, tuple(args.formatos), args.processos, args.forcar)
+
+    for nome, grafico in resumo["graficos"].items():
+        print(f"{nome}: {grafico['situacao']} ({', '.join(grafico['arquivos'])})")
+    print(f"Gráficos gerados: {gerados} de {len(resumo['graficos'])}")
+    print(f"Resumo: {os.path.join(args.saida, RESUMO_ARQUIVO)}")
+    print(f"Tempo total: {duracao:.2f} s")
+
+if __name__ == "__main__":
+    main()
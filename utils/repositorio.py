@@ -0,0 +1,145 @@
+import os
+import threading
+
+from utils import agregados, busca
+from utils.armazenamento_json import USUARIO_ARQUIVO, CURSO_ARQUIVO, ACESSO_ARQUIVO, AVALIACOES_ARQUIVO
+
+# Backend de armazenamento: "json" (arquivos em data/) ou "sqlite" (data/sistema.db).
+BACKEND = os.environ.get("SISTEMA_BACKEND", "json")
+
+INTERVALO_COMPACTACAO = 300
+
+if BACKEND == "sqlite":
+    from utils import armazenamento_sqlite as _backend
+else:
+    from utils import armazenamento_json as _backend
+
+carregar_dados = _backend.carregar_dados
+salvar_dados = _backend.salvar_dados
+buscar_acesso = _backend.buscar_acesso
+avaliacao_existe = _backend.avaliacao_existe
+copia_bruta = _backend.copia_bruta
+
+buscar_usuario = _backend.buscar_usuario
+
+listar_cursos = _backend.listar_cursos
+cursos_por_nivel = _backend.cursos_por_nivel
+pagina_cursos = _backend.pagina_cursos
+carregar_conteudo = _backend.carregar_conteudo
+contar_cursos = _backend.contar_cursos
+buscar_curso = _backend.buscar_curso
+
+# As escritas de usuários, acessos e avaliações também atualizam os agregados das estatísticas.
+# A trava dos agregados é mantida durante a escrita, para que o estado anterior lido aqui e
+# o agregado gravado depois correspondam aos dados, mesmo com várias sessões em paralelo.
+
+def inserir_usuario(usuario):
+    return bool(inserir_usuarios([usuario]))
+
+def inserir_usuarios(usuarios):
+    with agregados.travar():
+        agregados.preparar()
+        inseridos = _backend.inserir_usuarios(usuarios)
+        if inseridos:
+            agregados.usuarios_inseridos(inseridos)
+        return inseridos
+
+def atualizar_usuario(nome_antigo, alteracoes):
+    # alteracoes: só os campos editados. Devolve o registro gravado, ou None se a conta não
+    # existe mais ou o novo nome já está cadastrado.
+    with agregados.travar():
+        agregados.preparar()
+        atual = buscar_usuario(nome_antigo)
+        antes = dict(atual) if atual else None
+        atualizado = _backend.atualizar_usuario(nome_antigo, alteracoes)
+        if atualizado and antes:
+            agregados.usuario_alterado(antes, atualizado)
+        return atualizado
+
+def remover_usuario(nome):
+    with agregados.travar():
+        agregados.preparar()
+        atual = buscar_usuario(nome)
+        antes = dict(atual) if atual else None
+        _backend.remover_usuario(nome)
+        if antes:
+            agregados.usuario_removido(antes)
+
+def registrar_acessos(acessos):
+    with agregados.travar():
+        agregados.preparar()
+        alteracoes = []
+        no_lote = {}
+        for a in acessos:
+            chave = (a["usuario"], a["curso"])
+            if chave in no_lote:
+                antes = no_lote[chave]
+            else:
+                atual = buscar_acesso(*chave)
+                antes = (atual["quantidade"], atual["tempo"]) if atual else None
+            depois = (antes[0] + a["quantidade"], antes[1] + a["tempo"]) if antes else (a["quantidade"], a["tempo"])
+            no_lote[chave] = depois
+            alteracoes.append((antes, depois))
+        _backend.registrar_acessos(acessos)
+        agregados.acessos_alterados(alteracoes)
+
+def registrar_acesso(usuario, curso, nivel, tempo, timestamp):
+    registrar_acessos([{
+        "usuario": usuario,
+        "curso": curso,
+        "nivel": nivel,
+        "quantidade": 1,
+        "tempo": tempo,
+        "primeiro_acesso": timestamp,
+        "ultimo_acesso": timestamp
+    }])
+
+def registrar_avaliacao(avaliacao):
+    # A avaliação e o resumo de notas do curso e do nível são gravados sob a mesma trava, e a
+    # avaliação repetida é conferida de novo sob ela: duas sessões do mesmo usuário podem ter
+    # passado pela verificação da tela ao mesmo tempo. Retorna False se já havia avaliação.
+    with agregados.travar():
+        if _backend.avaliacao_existe(avaliacao["usuario"], avaliacao["curso"]):
+            return False
+        agregados.preparar()
+        _backend.registrar_avaliacao(avaliacao)
+        agregados.avaliacao_registrada(avaliacao)
+        return True
+
+# As escritas de cursos também atualizam o índice da busca, sob a trava do índice.
+
+def inserir_curso(curso):
+    with busca.travar():
+        busca.preparar()
+        _backend.inserir_curso(curso)
+        busca.curso_inserido(curso)
+
+def atualizar_curso(nome_antigo, curso):
+    with busca.travar():
+        busca.preparar()
+        atualizado = _backend.atualizar_curso(nome_antigo, curso)
+        atual = buscar_curso(curso.get("nome", nome_antigo))
+        if atual:
+            busca.curso_alterado(nome_antigo, dict(atual, conteudo=carregar_conteudo(atual)))
+        return atualizado
+
+def remover_curso(nome):
+    with busca.travar():
+        busca.preparar()
+        _backend.remover_curso(nome)
+        busca.curso_removido(nome)
+
+def compactar_journal(arquivo=None):
+    _backend.compactar_journal(arquivo)
+    if arquivo is None:
+        agregados.compactar()
+        busca.compactar()
+
+def iniciar_compactacao_periodica(intervalo=INTERVALO_COMPACTACAO):
+    def executar():
+        while not parar.wait(intervalo):
+            compactar_journal()
+
+    parar = threading.Event()
+    threading.Thread(target=executar, name="compactacao-journal", daemon=True).start()
+    return parar
@@ -0,0 +1,64 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from utils import metricas
+
+# O bcrypt (custo 12) leva ~250 ms por senha. Os cálculos rodam em um pool para não travar
+# a thread que atende o usuário: "thread" (padrão; o bcrypt libera o GIL) ou "processo".
+TIPO_POOL = os.environ.get("SISTEMA_POOL_SENHAS", "thread")
+MAX_TRABALHADORES = int(os.environ.get("SISTEMA_TRABALHADORES_SENHAS", str(os.cpu_count() or 1)))
+
+_pool = None
+_trava_pool = threading.Lock()
+
+# O bcrypt é importado dentro das funções, que rodam nos trabalhadores do pool. Com o pool de
+# processos, as métricas do bcrypt ficam nos processos do pool; hash_senha e verificar_senha
+# (fila + bcrypt) são medidas aqui.
+@metricas.cronometrar("bcrypt_hash")
+def _calcular_hash(senha: str) -> str:
+    import bcrypt
+    salt = bcrypt.gensalt()
+    hashed = bcrypt.hashpw(senha.encode('utf-8'), salt)
+    return hashed.decode('utf-8')
+
+@metricas.cronometrar("bcrypt_verificar")
+def _conferir(senha: str, hashed: str) -> bool:
+    import bcrypt
+    try:
+        return bcrypt.checkpw(senha.encode('utf-8'), hashed.encode('utf-8'))
+    except ValueError:
+        return False
+
+def obter_pool():
+    global _pool
+
+    with _trava_pool:
+        if _pool is None:
+            if TIPO_POOL == "processo":
+                _pool = ProcessPoolExecutor(max_workers=MAX_TRABALHADORES)
+            else:
+                _pool = ThreadPoolExecutor(max_workers=MAX_TRABALHADORES, thread_name_prefix="senhas")
+        return _pool
+
+def hash_senha_async(senha: str):
+    return metricas.acompanhar("hash_senha", obter_pool().submit(_calcular_hash, senha))
+
+def verificar_senha_async(senha: str, hashed: str):
+    return metricas.acompanhar("verificar_senha", obter_pool().submit(_conferir, senha, hashed))
+
+def hash_senha(senha: str) -> str:
+    return hash_senha_async(senha).result()
+
+def verificar_senha(senha: str, hashed: str) -> bool:
+    return verificar_senha_async(senha, hashed).result()
+
+def hash_senhas_em_lote(senhas, trabalhadores=None):
+    # Para importações em massa: divide os hashes em lotes distribuídos entre processos.
+    senhas = list(senhas)
+    if not senhas:
+        return []
+    trabalhadores = trabalhadores or MAX_TRABALHADORES
+    lote = max(1, len(senhas) // (trabalhadores * 4))
+    with ProcessPoolExecutor(max_workers=trabalhadores) as pool:
+        return list(pool.map(_calcular_hash, senhas, chunksize=lote))
@@ -0,0 +1,91 @@
+import getpass
+import io
+import sys
+import threading
+from contextlib import contextmanager
+
+# Redirecionamento da entrada e saída por thread. Os menus usam input, print e
+# getpass.getpass; com instalar(), sys.stdin, sys.stdout e getpass passam a consultar a
+# sessão da thread atual (ex.: um cliente TCP do servidor) e, sem sessão, usam o terminal.
+_local = threading.local()
+_originais = {}
+_trava = threading.Lock()
+
+def _atual():
+    return getattr(_local, "sessao", None)
+
+def em_sessao():
+    return _atual() is not None
+
+class _Saida:
+    def write(self, texto):
+        sessao = _atual()
+        if sessao is None:
+            return _originais["stdout"].write(texto)
+        sessao["escrever"](texto)
+        return len(texto)
+
+    def flush(self):
+        if _atual() is None:
+            _originais["stdout"].flush()
+
+    def fileno(self):
+        # Numa sessão não há descritor: assim o input() não usa o terminal do servidor.
+        if _atual() is not None:
+            raise io.UnsupportedOperation("fileno")
+        return _originais["stdout"].fileno()
+
+    def isatty(self):
+        return _atual() is None and _originais["stdout"].isatty()
+
+    def __getattr__(self, nome):
+        return getattr(_originais["stdout"], nome)
+
+class _Entrada:
+    def readline(self, *args):
+        sessao = _atual()
+        if sessao is None:
+            return _originais["stdin"].readline(*args)
+        return sessao["ler"]()
+
+    def fileno(self):
+        if _atual() is not None:
+            raise io.UnsupportedOperation("fileno")
+        return _originais["stdin"].fileno()
+
+    def isatty(self):
+        return _atual() is None and _originais["stdin"].isatty()
+
+    def __getattr__(self, nome):
+        return getattr(_originais["stdin"], nome)
+
+def _getpass(prompt="Password: ", stream=None):
+    sessao = _atual()
+    if sessao is None:
+        return _originais["getpass"](prompt, stream)
+    sessao["escrever"](prompt)
+    linha = sessao["ler"]()
+    if not linha:
+        raise EOFError
+    return linha.rstrip("\r\n")
+
+def instalar():
+    with _trava:
+        if _originais:
+            return
+        _originais["stdout"] = sys.stdout
+        _originais["stdin"] = sys.stdin
+        _originais["getpass"] = getpass.getpass
+        sys.stdout = _Saida()
+        sys.stdin = _Entrada()
+        getpass.getpass = _getpass
+
+@contextmanager
+def sessao(escrever, ler):
+    # escrever(texto) envia a saída; ler() devolve a próxima linha (com "\n") ou "" no fim.
+    instalar()
+    _local.sessao = {"escrever": escrever, "ler": ler}
+    try:
+        yield
+    finally:
+        _local.sessao = None
@@ -0,0 +1,310 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+from utils import travas
+
+# Simulador de carga dos menus: várias sessões roteirizadas (cadastro, login, ver um curso,
+# buscar, avaliar, editar a idade, sair; ou login de administrador e visualização de curso)
+# rodam em paralelo nos menus reais, com a entrada e o getpass trocados pelo roteiro (como no
+# modo servidor, via utils/sessao.py). Os dados são uma cópia de data/ (ou de --dados) em uma
+# pasta temporária, usada como diretório de trabalho. O relatório traz sessões por segundo,
+# a latência de cada passo e a contenção nas travas dos arquivos de dados.
+SENHA = "senha123"
+NIVEIS = ("iniciante", "intermediário", "avançado")
+
+def _percentil(ordenados, p):
+    indice = min(len(ordenados) - 1, max(0, int(round(p / 100 * (len(ordenados) - 1)))))
+    return ordenados[indice]
+
+def _passo(nome, respostas, marcador):
+    # O passo está certo se a saída produzida durante ele contém o marcador.
+    return {"nome": nome, "respostas": [str(r) for r in respostas], "marcador": marcador}
+
+def roteiro_aluno(indice, rng, cursos_por_nivel, termos_busca):
+    # cursos_por_nivel: lista de (opção do nível no menu, quantidade de cursos), só com os
+    # níveis que têm cursos.
+    usuario = f"simulado{indice:05d}"
+
+    def curso():
+        opcao, quantidade = rng.choice(cursos_por_nivel)
+        return opcao, rng.randint(1, quantidade)
+
+    visto, avaliado = curso(), curso()
+    passos = [
+        _passo("cadastro", ["1", usuario, SENHA, SENHA, rng.choice(("masculino", "feminino")), rng.randint(16, 60)],
+               "Cadastro realizado com sucesso"),
+        _passo("login", ["2", usuario, SENHA], f"Bem-vindo, {usuario}!"),
+        _passo("ver_curso", ["1", *visto, "", "0", "4"], "Acesso registrado"),
+    ]
+    if termos_busca:
+        passos.append(_passo("busca", ["2", rng.choice(termos_busca), "", ""], "resultado(s)"))
+    passos += [
+        _passo("avaliacao", ["3", *avaliado, rng.randint(1, 5)], "Avaliação registrada com sucesso"),
+        # Depois de editar os dados o menu volta para o menu não autenticado.
+        _passo("editar_perfil", ["4", "3", rng.randint(16, 60), "6"], "Dados atualizados com sucesso!"),
+        _passo("sair", ["3"], "Saindo do sistema."),
+    ]
+    return {"tipo": "aluno", "passos": passos}
+
+def roteiro_admin(rng, cursos_por_nivel):
+    from admins.admin import ADMIN_USUARIO, ADMIN_SENHA
+
+    opcao, quantidade = rng.choice(cursos_por_nivel)
+    return {"tipo": "admin", "passos": [
+        _passo("login_admin", [ADMIN_USUARIO, ADMIN_SENHA], "Acesso concedido"),
+        _passo("ver_curso_admin", ["2", opcao, rng.randint(1, quantidade), "", "0", "4"], "Conteúdo do curso"),
+        _passo("logout_admin", ["6", "s"], "Logout realizado com sucesso"),
+    ]}
+
+def roteiros(quantidade, fracao_admins=0.1, semente=42):
+    from utils import busca
+    from utils.repositorio import contar_cursos, pagina_cursos
+
+    cursos_por_nivel = [(str(i), contar_cursos(nivel)) for i, nivel in enumerate(NIVEIS, 1) if contar_cursos(nivel)]
+    if not cursos_por_nivel:
+        raise ValueError("Não há cursos cadastrados para simular.")
+    # Termos da busca: primeira palavra de cada nome de curso (sempre com resultado).
+    termos_busca = sorted({busca.termos(c["nome"])[0] for c in pagina_cursos(limite=100) if busca.termos(c["nome"])})
+
+    rng = random.Random(semente)
+    resultado = []
+    for indice in range(quantidade):
+        if rng.random() < fracao_admins:
+            resultado.append(roteiro_admin(rng, cursos_por_nivel))
+        else:
+            resultado.append(roteiro_aluno(indice, rng, cursos_por_nivel, termos_busca))
+    return resultado
+
+def executar_sessao(roteiro, pausa=0.0, rng=None):
+    # Roda um roteiro no menu real. A latência de um passo vai da primeira resposta dele até a
+    # primeira leitura do passo seguinte (ou o fim da sessão); a pausa entre os passos (tempo
+    # de "pensar" do usuário) fica fora da medição.
+    from utils import sessao
+
+    rng = rng or random.Random()
+    passos = roteiro["passos"]
+    saida = []
+    medidos = []
+    estado = {"passo": 0, "resposta": 0, "atual": None, "inicio": 0.0, "marca": 0}
+
+    def fechar(agora):
+        atual = estado["atual"]
+        if atual is None:
+            return
+        texto = "".join(saida[estado["marca"]:])
+        medidos.append({"nome": atual["nome"], "duracao": agora - estado["inicio"], "ok": atual["marcador"] in texto})
+        estado["atual"] = None
+
+    def ler():
+        agora = time.perf_counter()
+        if estado["passo"] >= len(passos):
+            # Roteiro esgotado: o menu pediu mais do que o previsto.
+            fechar(agora)
+            return ""
+        passo = passos[estado["passo"]]
+        if estado["resposta"] == 0:
+            fechar(agora)
+            if pausa and estado["passo"]:
+                time.sleep(rng.uniform(0, 2 * pausa))
+            estado["atual"], estado["inicio"], estado["marca"] = passo, time.perf_counter(), len(saida)
+        resposta = passo["respostas"][estado["resposta"]]
+        estado["resposta"] += 1
+        if estado["resposta"] == len(passo["respostas"]):
+            estado["passo"], estado["resposta"] = estado["passo"] + 1, 0
+        return resposta + "\n"
+
+    if roteiro["tipo"] == "admin":
+        from admins.admin import menu_admin as menu
+    else:
+        from user.usuario import menu_usuario as menu
+
+    erro = None
+    inicio = time.perf_counter()
+    with sessao.sessao(saida.append, ler):
+        try:
+            menu()
+        except EOFError:
+            erro = "roteiro esgotado antes do fim do menu"
+        except Exception as e:
+            erro = f"{type(e).__name__}: {e}"
+    fechar(time.perf_counter())
+
+    if erro is None:
+        falhos = [m["nome"] for m in medidos if not m["ok"]]
+        if falhos:
+            erro = f"passo '{falhos[0]}' sem a resposta esperada"
+        elif estado["passo"] < len(passos):
+            erro = "menu encerrado antes do fim do roteiro"
+    return {"tipo": roteiro["tipo"], "ok": erro is None, "erro": erro, "passos": medidos, "duracao": time.perf_counter() - inicio}
+
+def executar_lote(trabalho, lote, paralelas, pausa=0.0, semente=42):
+    # Roda um lote de roteiros em "paralelas" threads de um processo e devolve os resultados
+    # das sessões e a contenção nas travas. trabalho: pasta com data/ e logs/, que precisa ser
+    # o diretório atual antes da importação dos menus (os logs guardam o caminho absoluto).
+    from utils.buffer_acessos import descarregar as descarregar_acessos
+    from utils.log import encerrar_logs
+
+    os.chdir(trabalho)
+    travas.zerar_contencao()
+    try:
+        with ThreadPoolExecutor(max_workers=paralelas, thread_name_prefix="simulacao") as executor:
+            resultados = list(executor.map(
+                lambda item: executar_sessao(item[1], pausa, random.Random(semente + item[0])), lote
+            ))
+    finally:
+        # Antes de sair da pasta: nada pode ser gravado depois, fora dela.
+        descarregar_acessos()
+        encerrar_logs()
+    return resultados, travas.contencao()
+
+def _juntar_contencao(total, parcial):
+    for arquivo, registro in parcial.items():
+        atual = total.setdefault(arquivo, {"aquisicoes": 0, "espera_total": 0.0, "espera_maxima": 0.0})
+        atual["aquisicoes"] += registro["aquisicoes"]
+        atual["espera_total"] += registro["espera_total"]
+        atual["espera_maxima"] = max(atual["espera_maxima"], registro["espera_maxima"])
+
+def relatorio(resultados, contencao, duracao):
+    falhas = {}
+    latencias = {}
+    for resultado in resultados:
+        if not resultado["ok"]:
+            falhas[resultado["erro"]] = falhas.get(resultado["erro"], 0) + 1
+        for passo in resultado["passos"]:
+            medidas = latencias.setdefault(passo["nome"], {"duracoes": [], "falhas": 0})
+            medidas["duracoes"].append(passo["duracao"] * 1000)
+            medidas["falhas"] += not passo["ok"]
+
+    passos = {}
+    for nome, medidas in latencias.items():
+        duracoes = sorted(medidas["duracoes"])
+        passos[nome] = {
+            "quantidade": len(duracoes),
+            "falhas": medidas["falhas"],
+            "p50_ms": round(_percentil(duracoes, 50), 2),
+            "p95_ms": round(_percentil(duracoes, 95), 2),
+            "p99_ms": round(_percentil(duracoes, 99), 2),
+            "max_ms": round(duracoes[-1], 2),
+        }
+
+    travas_arquivos = {}
+    for arquivo, registro in sorted(contencao.items()):
+        travas_arquivos[arquivo] = {
+            "aquisicoes": registro["aquisicoes"],
+            "espera_total_ms": round(registro["espera_total"] * 1000, 2),
+            "espera_media_ms": round(registro["espera_total"] * 1000 / max(registro["aquisicoes"], 1), 3),
+            "espera_maxima_ms": round(registro["espera_maxima"] * 1000, 2),
+        }
+
+    concluidas = sum(r["ok"] for r in resultados)
+    return {
+        "sessoes": len(resultados),
+        "sessoes_ok": concluidas,
+        "sessoes_falhas": len(resultados) - concluidas,
+        "falhas": falhas,
+        "duracao_s": round(duracao, 3),
+        "sessoes_s": round(len(resultados) / duracao, 2) if duracao else 0.0,
+        "passos": passos,
+        "travas": travas_arquivos,
+    }
+
+def simular(sessoes=100, paralelas=10, processos=1, fracao_admins=0.1, pausa=0.0, dados=None, semente=42, manter=False):
+    diretorio_original = os.getcwd()
+    origem = os.path.abspath(dados or "data")
+    trabalho = tempfile.mkdtemp(prefix="simulacao-")
+    try:
+        shutil.copytree(origem, os.path.join(trabalho, "data"), ignore=shutil.ignore_patterns("backups", "*.lock", "*.tmp"))
+        os.makedirs(os.path.join(trabalho, "logs"))
+        os.chdir(trabalho)
+
+        from utils import repositorio
+        lista = roteiros(sessoes, fracao_admins, semente)
+        numerados = list(enumerate(lista))
+        processos = max(1, min(processos, len(numerados)))
+
+        print(f"Simulando {sessoes} sessões ({paralelas} em paralelo por processo, {processos} processo(s)) em {trabalho}...")
+        inicio = time.perf_counter()
+        if processos == 1:
+            resultados, contencao = executar_lote(trabalho, numerados, paralelas, pausa, semente)
+        else:
+            # "spawn": os processos não herdam conexões nem travas abertas neste processo.
+            resultados, contencao = [], {}
+            with ProcessPoolExecutor(max_workers=processos, mp_context=get_context("spawn")) as executor:
+                futuros = [
+                    executor.submit(executar_lote, trabalho, numerados[i::processos], paralelas, pausa, semente)
+                    for i in range(processos)
+                ]
+                for futuro in futuros:
+                    parciais, parcial_contencao = futuro.result()
+                    resultados += parciais
+                    _juntar_contencao(contencao, parcial_contencao)
+        duracao = time.perf_counter() - inicio
+
+        resultado = relatorio(resultados, contencao, duracao)
+        resultado.update({
+            "momento": datetime.now().isoformat(timespec="seconds"),
+            "backend": repositorio.BACKEND,
+            "paralelas": paralelas,
+            "processos": processos,
+            "pausa_s": pausa,
+        })
+        return resultado
+    finally:
+        os.chdir(diretorio_original)
+        if manter:
+            print(f"Dados da simulação mantidos em {trabalho}")
+        else:
+            shutil.rmtree(trabalho, ignore_errors=True)
+
+def imprimir(resultado):
+    print(f"\nSessões: {resultado['sessoes']} ({resultado['sessoes_ok']} concluídas, {resultado['sessoes_falhas']} com falha)"
+          f" em {resultado['duracao_s']:.1f} s - {resultado['sessoes_s']:.2f} sessões/s")
+    for erro, quantidade in resultado["falhas"].items():
+        print(f"    {quantidade}x {erro}")
+
+    print(f"\n{'Passo':<18} {'qtd':>6} {'falhas':>7} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'máx (ms)':>10}")
+    for nome, p in resultado["passos"].items():
+        print(f"{nome:<18} {p['quantidade']:>6} {p['falhas']:>7} {p['p50_ms']:>10.1f} {p['p95_ms']:>10.1f} {p['p99_ms']:>10.1f} {p['max_ms']:>10.1f}")
+
+    print(f"\n{'Trava':<32} {'aquisições':>11} {'espera total (ms)':>18} {'média (ms)':>11} {'máx (ms)':>10}")
+    for arquivo, t in resultado["travas"].items():
+        print(f"{arquivo:<32} {t['aquisicoes']:>11} {t['espera_total_ms']:>18.1f} {t['espera_media_ms']:>11.3f} {t['espera_maxima_ms']:>10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Simula sessões simultâneas nos menus de usuário e de administrador.")
+    parser.add_argument("--sessoes", type=int, default=100, help="Quantidade total de sessões.")
+    parser.add_argument("--paralelas", type=int, default=10, help="Sessões simultâneas em cada processo.")
+    parser.add_argument("--processos", type=int, default=1, help="Processos (cada um com --paralelas sessões).")
+    parser.add_argument("--admins", type=float, default=0.1, help="Fração das sessões que são de administrador.")
+    parser.add_argument("--pausa", type=float, default=0.0, help="Pausa média (s) entre os passos de uma sessão.")
+    parser.add_argument("--dados", help="Pasta de dados copiada para a simulação (padrão: data/).")
+    parser.add_argument("--semente", type=int, default=42, help="Semente dos roteiros.")
+    parser.add_argument("--saida", help="Grava o relatório em JSON neste arquivo.")
+    parser.add_argument("--manter", action="store_true", help="Não apaga a pasta temporária da simulação.")
+    args = parser.parse_args()
+
+    try:
+        resultado = simular(args.sessoes, args.paralelas, args.processos, args.admins, args.pausa, args.dados, args.semente, args.manter)
+    except ValueError as erro:
+        print(erro)
+        sys.exit(1)
+    imprimir(resultado)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=4, ensure_ascii=False)
+        print(f"\nRelatório salvo em {args.saida}")
+    if resultado["sessoes_falhas"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# Mede o tempo de importação dos módulos do sistema com "python -X importtime" e
+# compara o total com uma meta, para acompanhar o tempo de inicialização.
+META_PADRAO_MS = 150
+
+def medir(modulo="main"):
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True, text=True, cwd=os.getcwd()
+    )
+    if processo.returncode != 0:
+        raise RuntimeError(processo.stderr.strip().splitlines()[-1] if processo.stderr.strip() else "falha na importação")
+
+    # Linhas no formato "import time: self [us] | cumulative | imported package".
+    tempos = []
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith("import time:"):
+            continue
+        partes = linha[len("import time:"):].split("|")
+        if len(partes) != 3 or not partes[0].strip().isdigit():
+            continue
+        nome = partes[2].rstrip()
+        nivel = (len(nome) - len(nome.lstrip())) // 2
+        tempos.append((nome.strip(), int(partes[0]), int(partes[1]), nivel))
+    return tempos
+
+def relatorio(tempos, quantidade=15):
+    total_us = sum(proprio for _, proprio, _, _ in tempos)
+    linhas = [f"{'Módulo':<40} {'Próprio (ms)':>13} {'Acumulado (ms)':>15}"]
+    for nome, proprio, acumulado, _ in sorted(tempos, key=lambda t: t[2], reverse=True)[:quantidade]:
+        linhas.append(f"{nome:<40} {proprio / 1000:>13.1f} {acumulado / 1000:>15.1f}")
+    return total_us / 1000, "\n".join(linhas)
+
+def main():
+    parser = argparse.ArgumentParser(description="Relatório do tempo de importação do sistema.")
+    parser.add_argument("--modulo", default="main", help="Módulo importado na medição (padrão: main).")
+    parser.add_argument("--meta", type=float, default=META_PADRAO_MS, help="Tempo máximo aceito, em ms.")
+    parser.add_argument("--quantidade", type=int, default=15, help="Quantidade de módulos listados.")
+    args = parser.parse_args()
+
+    try:
+        tempos = medir(args.modulo)
+    except RuntimeError as erro:
+        print(f"Erro ao importar '{args.modulo}': {erro}")
+        sys.exit(2)
+
+    total_ms, tabela = relatorio(tempos, args.quantidade)
+    print(tabela)
+    print(f"\nTempo total de importação: {total_ms:.1f} ms (meta: {args.meta:.0f} ms)")
+    for pesado in ("matplotlib", "numpy", "bcrypt"):
+        if any(nome == pesado for nome, _, _, _ in tempos):
+            print(f"Atenção: '{pesado}' é importado na inicialização.")
+
+    if total_ms > args.meta:
+        print("Meta de tempo de importação não atingida.")
+        sys.exit(1)
+    print("Meta de tempo de importação atingida.")
+
+if __name__ == "__main__":
+    main()
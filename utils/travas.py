@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Sem fcntl (Windows) as travas só valem entre as threads do mesmo processo.
+    fcntl = None
+
+# Travas consultivas por arquivo de dados, em um arquivo ao lado (<arquivo>.lock).
+# Entre processos usam flock; dentro do processo, uma RLock por arquivo torna a trava
+# reentrante, de modo que uma escrita pode chamar outras funções que também a pedem.
+# Ordem de aquisição: agregados -> arquivo de dados -> trava do cache em memória.
+_travas = {}
+_trava_registro = threading.Lock()
+
+# Contenção por arquivo: quantas vezes a trava foi obtida (fora de reentradas) e quanto
+# tempo se esperou por ela, somando a espera entre threads e entre processos.
+_esperas = {}
+
+def _estado(arquivo):
+    with _trava_registro:
+        estado = _travas.get(arquivo)
+        if estado is None:
+            estado = _travas[arquivo] = {"trava": threading.RLock(), "descritor": None, "profundidade": 0, "exclusiva": False}
+        return estado
+
+def _flock(estado, arquivo, exclusiva):
+    if fcntl is None:
+        return
+    if estado["descritor"] is None:
+        estado["descritor"] = os.open(arquivo + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+    fcntl.flock(estado["descritor"], fcntl.LOCK_EX if exclusiva else fcntl.LOCK_SH)
+
+def _registrar_espera(arquivo, espera):
+    with _trava_registro:
+        registro = _esperas.get(arquivo)
+        if registro is None:
+            registro = _esperas[arquivo] = {"aquisicoes": 0, "espera_total": 0.0, "espera_maxima": 0.0}
+        registro["aquisicoes"] += 1
+        registro["espera_total"] += espera
+        registro["espera_maxima"] = max(registro["espera_maxima"], espera)
+
+def contencao():
+    # Cópia dos contadores: arquivo -> aquisições, espera total e espera máxima (segundos).
+    with _trava_registro:
+        return {arquivo: dict(registro) for arquivo, registro in _esperas.items()}
+
+def zerar_contencao():
+    with _trava_registro:
+        _esperas.clear()
+
+@contextmanager
+def travar(arquivo, compartilhada=False):
+    estado = _estado(arquivo)
+    inicio = time.perf_counter()
+    with estado["trava"]:
+        anterior = estado["exclusiva"]
+        if estado["profundidade"] == 0:
+            _flock(estado, arquivo, not compartilhada)
+            estado["exclusiva"] = not compartilhada
+            _registrar_espera(arquivo, time.perf_counter() - inicio)
+        elif not compartilhada and not anterior:
+            # Já travado como compartilhada por esta thread: promove para exclusiva.
+            _flock(estado, arquivo, True)
+            estado["exclusiva"] = True
+        estado["profundidade"] += 1
+        try:
+            yield
+        finally:
+            estado["profundidade"] -= 1
+            if estado["profundidade"] == 0:
+                if estado["descritor"] is not None:
+                    fcntl.flock(estado["descritor"], fcntl.LOCK_UN)
+                    os.close(estado["descritor"])
+                    estado["descritor"] = None
+                estado["exclusiva"] = False
+            elif estado["exclusiva"] and not anterior:
+                _flock(estado, arquivo, False)
+                estado["exclusiva"] = False
+
+def temporario(arquivo):
+    # Nome único por processo e thread, para que duas escritas não usem o mesmo temporário.
+    return f"{arquivo}.{os.getpid()}.{threading.get_ident()}.tmp"